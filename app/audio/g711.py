@@ -0,0 +1,116 @@
+import numpy as np
+from audio.resample import StreamingResampler
+
+PCM_RATE = 24000
+
+# wire formats: Realtime API input/output_audio_format names -> sample rate.
+# The API's G.711 formats are 8 kHz; the robot link uses them at 24 kHz.
+FORMATS = {"pcm16": 24000, "g711_ulaw": 8000, "g711_alaw": 8000}
+
+_SEG_UEND = np.array([0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF])
+_SEG_AEND = np.array([0x1F, 0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF])
+
+_tables = {}
+
+
+def _ulaw_tables():
+    # ITU-T G.711 mu-law (the classic Sun g711.c reference), for all 65536 inputs
+    x = np.arange(-32768, 32768, dtype=np.int32) >> 2
+    mask = np.where(x < 0, 0x7F, 0xFF)
+    mag = np.minimum(np.abs(x), 8159) + 33
+    seg = np.searchsorted(_SEG_UEND, mag)
+    code = np.where(seg >= 8, 0x7F, (seg << 4) | ((mag >> (seg + 1)) & 0xF))
+    enc = (code ^ mask).astype(np.uint8)
+
+    u = ~np.arange(256, dtype=np.int32) & 0xFF
+    t = (((u & 0x0F) << 3) + 0x84) << ((u & 0x70) >> 4)
+    dec = np.where(u & 0x80, 0x84 - t, t - 0x84).astype(np.int16)
+    return enc, dec
+
+
+def _alaw_tables():
+    x = np.arange(-32768, 32768, dtype=np.int32) >> 3
+    mask = np.where(x >= 0, 0xD5, 0x55)
+    mag = np.where(x >= 0, x, -x - 1)
+    seg = np.searchsorted(_SEG_AEND, mag)
+    shift = np.where(seg < 2, 1, seg)
+    code = np.where(seg >= 8, 0x7F, (np.minimum(seg, 7) << 4) | ((mag >> shift) & 0xF))
+    enc = (code ^ mask).astype(np.uint8)
+
+    a = np.arange(256, dtype=np.int32) ^ 0x55
+    seg = (a & 0x70) >> 4
+    t = ((a & 0x0F) << 4) + np.where(seg == 0, 8, 0x108)
+    t = np.where(seg > 1, t << np.maximum(seg - 1, 0), t)
+    dec = np.where(a & 0x80, t, -t).astype(np.int16)
+    return enc, dec
+
+
+def tables(law):
+    """(encode table indexed by int16 + 32768 -> uint8, decode table uint8 -> int16); built on first use."""
+    if law not in _tables:
+        _tables[law] = _ulaw_tables() if law == "ulaw" else _alaw_tables()
+    return _tables[law]
+
+
+def encode(pcm, law="ulaw") -> bytes:
+    """PCM16 (native endian) -> G.711 bytes, one table lookup per sample."""
+    enc, _ = tables(law)
+    samples = np.frombuffer(pcm, dtype=np.int16)
+    return enc[samples.view(np.uint16) ^ 0x8000].tobytes()
+
+
+def decode(data, law="ulaw") -> bytes:
+    """G.711 bytes -> PCM16 (native endian)."""
+    _, dec = tables(law)
+    return dec[np.frombuffer(data, dtype=np.uint8)].tobytes()
+
+
+def _law(fmt):
+    if fmt not in FORMATS:
+        raise ValueError(f"audio format must be one of {list(FORMATS)}")
+    return fmt[5:] if fmt.startswith("g711_") else None
+
+
+class AudioEncoder:
+    """
+    Streaming 24 kHz PCM16 -> wire format (`fmt` as in FORMATS). `rate`
+    overrides the format's sample rate (e.g. G.711 at 24 kHz on the robot
+    link); rate conversion keeps its filter state across chunks.
+    """
+
+    def __init__(self, fmt="pcm16", rate=None, quality="medium"):
+        self.format = fmt
+        self.law = _law(fmt)
+        self.rate = rate or FORMATS[fmt]
+        self.bytes_per_ms = self.rate // 1000 * (1 if self.law else 2)
+        self._resampler = StreamingResampler(PCM_RATE, self.rate, quality=quality) if self.rate != PCM_RATE else None
+
+    def encode(self, pcm) -> bytes:
+        if self._resampler:
+            pcm = self._resampler.process(pcm)
+        return encode(pcm, self.law) if self.law else bytes(pcm)
+
+    def reset(self) -> None:
+        """New stream (connection, interrupt): drop the resampler's history."""
+        if self._resampler:
+            self._resampler.reset()
+
+
+class AudioDecoder:
+    """Streaming wire format -> 24 kHz PCM16, the counterpart of AudioEncoder."""
+
+    def __init__(self, fmt="pcm16", rate=None, quality="medium"):
+        self.format = fmt
+        self.law = _law(fmt)
+        self.rate = rate or FORMATS[fmt]
+        self.bytes_per_ms = self.rate // 1000 * (1 if self.law else 2)
+        self._resampler = StreamingResampler(self.rate, PCM_RATE, quality=quality) if self.rate != PCM_RATE else None
+
+    def decode(self, data) -> bytes:
+        pcm = decode(data, self.law) if self.law else data
+        return self._resampler.process(pcm) if self._resampler else pcm
+
+    def reset(self) -> None:
+        """New stream (response, connection): drop the resampler's history."""
+        if self._resampler:
+            self._resampler.reset()
@@ -0,0 +1,126 @@
+import hashlib
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+# bump when the say() instructions change: clips made with the old wording no longer match
+CACHE_VERSION = "1"
+
+
+def cache_key(text, voice, model):
+    """Stable key of one synthesized phrase (whitespace-normalized text, voice, model)."""
+    raw = "\0".join((CACHE_VERSION, model or "", voice or "", " ".join(text.split())))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class PcmCache:
+    """
+    Synthesized agent audio (PCM16 mono 24 kHz) keyed by `cache_key()`.
+
+      memory: LRU of recently used clips within `max_bytes`
+      disk:   one <key>.pcm file per clip in `cache_dir` (optional), written
+              atomically and memory-mapped when loaded, so clips survive
+              restarts and a large prefilled set lives in the page cache
+              rather than on the heap
+
+    Clips are returned as bytes or mmap objects; slicing either copies, so a
+    clip evicted while it is being played stays valid. Thread-safe: clips are
+    captured on the websocket thread and looked up from the main loop.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=32 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._mem = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.puts = 0
+        self.evictions = 0
+        self.write_errors = 0
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key):
+        return self.cache_dir / f"{key}.pcm"
+
+    def _insert(self, key, clip):
+        # caller holds the lock
+        old = self._mem.pop(key, None)
+        if old is not None:
+            self.bytes -= len(old)
+        if len(clip) > self.max_bytes:
+            return
+        while self._mem and self.bytes + len(clip) > self.max_bytes:
+            _, evicted = self._mem.popitem(last=False)
+            self.bytes -= len(evicted)
+            self.evictions += 1
+        self._mem[key] = clip
+        self.bytes += len(clip)
+
+    def _load(self, key):
+        if self.cache_dir is None:
+            return None
+        try:
+            with open(self._path(key), "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return None
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError:
+            return None
+
+    def get(self, key):
+        with self._lock:
+            clip = self._mem.get(key)
+            if clip is not None:
+                self._mem.move_to_end(key)
+                self.hits += 1
+                return clip
+        clip = self._load(key)
+        with self._lock:
+            if clip is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._insert(key, clip)
+        return clip
+
+    def __contains__(self, key):
+        with self._lock:
+            if key in self._mem:
+                return True
+        return self.cache_dir is not None and self._path(key).is_file()
+
+    def put(self, key, pcm: bytes):
+        with self._lock:
+            self._insert(key, pcm)
+            self.puts += 1
+        if self.cache_dir is None:
+            return
+        path = self._path(key)
+        tmp = path.with_suffix(".tmp")
+        try:
+            with open(tmp, "wb") as f:
+                f.write(pcm)
+            os.replace(tmp, path)
+        except OSError as e:
+            self.write_errors += 1
+            print(f"[SayCache] write failed: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._mem),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "puts": self.puts,
+                "evictions": self.evictions,
+                "write_errors": self.write_errors,
+            }
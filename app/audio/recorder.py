@@ -0,0 +1,192 @@
+import queue
+import threading
+import time
+import wave
+from pathlib import Path
+
+SAMPLE_RATE = 24000
+SAMPLE_WIDTH = 2
+
+
+def _open_wav(path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    wav = wave.open(str(path), "wb")
+    wav.setnchannels(1)
+    wav.setsampwidth(SAMPLE_WIDTH)
+    wav.setframerate(SAMPLE_RATE)
+    return wav
+
+
+class SessionRecorder:
+    """
+    Records a session off the capture/playback hot paths.
+
+    Callers only enqueue and never block on disk. Audio beyond `max_queue`
+    entries is dropped and counted; control messages (segment marks, flush,
+    close) always fit, as losing one would corrupt segment boundaries. One
+    writer thread owns all files:
+
+      * user uplink: `user_audio(chunk)` -> mic_<ts>.wav, written in batches
+        of `batch_bytes` (or at least every `flush_s` seconds)
+      * agent audio: implements the client's ai_audio_logger interface
+        (mark_start / append / flush_segment / mark_end) and writes one
+        agent_<ts>_<response id>.wav per response in a single write.
+        A segment stays open after mark_end until the next response starts,
+        so a later barge-in can still cut it: flush_segment(unplayed_bytes)
+        drops the audio that was received but never played.
+    """
+
+    def __init__(self, out_dir, user_file=None, record_user=True, record_agent=True,
+                 max_queue=4000, batch_bytes=256 * 1024, flush_s=5.0, segment_timeout_s=60.0):
+        self.out_dir = Path(out_dir)
+        self.user_file = Path(user_file) if user_file else None
+        self.record_user = record_user
+        self.record_agent = record_agent
+        self.batch_bytes = batch_bytes
+        self.flush_s = flush_s
+        self.segment_timeout_s = segment_timeout_s
+
+        # bounded for audio in _put_audio; unbounded so control messages always fit
+        self._max_queue = max_queue
+        self._q = queue.Queue()
+        self.queued_bytes = 0
+        self.dropped_bytes = 0
+        self.written_bytes = 0
+        self.segments_written = 0
+        self.write_errors = 0
+
+        self._thread = threading.Thread(target=self._run, name="recorder", daemon=True)
+        self._thread.start()
+
+    # -- producers (any thread) -----------------------------------------------
+
+    def _put_audio(self, kind, data):
+        if self._q.qsize() >= self._max_queue:
+            self.dropped_bytes += len(data)
+            return
+        self._q.put_nowait((kind, data))
+        self.queued_bytes += len(data)
+
+    def _put_control(self, kind, arg=None):
+        self._q.put_nowait((kind, arg))
+
+    def user_audio(self, chunk: bytes) -> None:
+        if self.record_user:
+            self._put_audio("user", chunk)
+
+    def mark_start(self, rid):
+        if self.record_agent:
+            self._put_control("start", rid)
+
+    def append(self, data: bytes):
+        if self.record_agent:
+            self._put_audio("agent", data)
+
+    def flush_segment(self, unplayed_bytes=0):
+        if self.record_agent:
+            self._put_control("flush", unplayed_bytes)
+
+    def mark_end(self, rid):
+        if self.record_agent:
+            self._put_control("end", rid)
+
+    def close(self, timeout=5.0):
+        self._put_control("close")
+        self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self._q.qsize(),
+            "queued_bytes": self.queued_bytes,
+            "dropped_bytes": self.dropped_bytes,
+            "written_bytes": self.written_bytes,
+            "segments_written": self.segments_written,
+            "write_errors": self.write_errors,
+        }
+
+    # -- writer thread -------------------------------------------------------
+
+    def _run(self):
+        ts = time.strftime("%Y%m%d_%H%M%S")
+        user_wav = None
+        user_buf = bytearray()
+        last_user_flush = time.monotonic()
+        seg = None          # {"rid", "buf", "ended"}
+
+        def write_user():
+            nonlocal user_wav, last_user_flush
+            last_user_flush = time.monotonic()
+            if not user_buf:
+                return
+            if user_wav is None:
+                path = self.user_file or self.out_dir / f"mic_{ts}.wav"
+                user_wav = _open_wav(path)
+                print(f"[Rec] writing input to {path}")
+            self._write(user_wav, user_buf)
+            user_buf.clear()
+
+        def write_segment(unplayed=0):
+            nonlocal seg
+            if seg is None:
+                return
+            data, rid, seg = seg["buf"], seg["rid"], None
+            if unplayed:
+                del data[max(0, len(data) - unplayed):]
+            if not data:
+                return
+            wav = None
+            try:
+                wav = _open_wav(self.out_dir / f"agent_{ts}_{rid}.wav")
+                self._write(wav, data)
+                self.segments_written += 1
+            except Exception as e:
+                self.write_errors += 1
+                print(f"[Rec] segment write error: {e}")
+            finally:
+                if wav:
+                    wav.close()
+
+        while True:
+            try:
+                kind, arg = self._q.get(timeout=0.5)
+            except queue.Empty:
+                kind, arg = None, None
+
+            if kind == "user":
+                self.queued_bytes -= len(arg)
+                user_buf += arg
+                if len(user_buf) >= self.batch_bytes:
+                    write_user()
+            elif kind == "agent":
+                self.queued_bytes -= len(arg)
+                if seg is not None:
+                    seg["buf"] += arg
+            elif kind == "start":
+                write_segment()
+                seg = {"rid": arg, "buf": bytearray(), "ended": None}
+            elif kind == "flush":
+                write_segment(arg)
+            elif kind == "end":
+                if seg is not None and seg["rid"] == arg:
+                    seg["ended"] = time.monotonic()
+            elif kind == "close":
+                write_segment()
+                write_user()
+                if user_wav:
+                    user_wav.close()
+                    print("[Rec] file closed")
+                return
+
+            now = time.monotonic()
+            if user_buf and now - last_user_flush >= self.flush_s:
+                write_user()
+            if seg is not None and seg["ended"] and now - seg["ended"] > self.segment_timeout_s:
+                write_segment()
+
+    def _write(self, wav, data):
+        try:
+            wav.writeframes(data)
+            self.written_bytes += len(data)
+        except Exception as e:
+            self.write_errors += 1
+            print(f"[Rec] write error: {e}")
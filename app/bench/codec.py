@@ -0,0 +1,130 @@
+"""
+G.711 codec path: throughput and bytes on the wire.
+
+Encodes / decodes synthetic speech with audio.g711 in the chunk sizes the
+client uses and reports x real time per direction (with and without the
+24 <-> 8 kHz resampling the Realtime API formats need), the round-trip SNR,
+and the bytes per second of audio on each link:
+
+    uplink    input_audio_buffer.append JSON (base64), one per 40 ms
+    downlink  response.audio.delta JSON (base64), one per 20 ms
+    robot     binary websocket frames of 40 ms (G.711 stays at 24 kHz)
+
+Checks the tables against audioop when it is available (Python < 3.13).
+
+    cd app && python -m bench.codec --seconds 60
+"""
+import argparse
+import base64
+import json
+import time
+import warnings
+import numpy as np
+from audio import g711
+from audio.g711 import AudioDecoder, AudioEncoder
+from interfaces.audio_source import SyntheticSource
+from realtime.uplink import encode_append
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore", DeprecationWarning)
+    try:
+        import audioop            # removed in Python 3.13
+    except ImportError:
+        audioop = None
+
+PCM_BYTES_PER_MS = 48
+
+
+def _speech(seconds):
+    source = SyntheticSource(count=max(1, seconds // 3), speech_ms=(1500, 2500), pause_ms=(300, 600), pace=0)
+    pcm = b"".join(source._chunks())
+    return pcm[:seconds * 1000 * PCM_BYTES_PER_MS]
+
+
+def _split(data, step):
+    return [data[i:i + step] for i in range(0, len(data), step)]
+
+
+def _timed(fn, chunks):
+    t0 = time.perf_counter()
+    out = b"".join(fn(c) for c in chunks)
+    return out, time.perf_counter() - t0
+
+
+def _snr_db(ref, out, delay=0):
+    a = np.frombuffer(ref, dtype=np.int16).astype(np.float64)
+    b = np.frombuffer(out, dtype=np.int16).astype(np.float64)
+    n = min(len(a), len(b) - delay)
+    a, b = a[:n], b[delay:delay + n]
+    noise = np.sum((a - b) ** 2)
+    return 10 * np.log10(np.sum(a ** 2) / noise) if noise else float("inf")
+
+
+def _best_delay(ref, out, max_lag=200):
+    a = np.frombuffer(ref, dtype=np.int16)[:48000].astype(np.float64)
+    b = np.frombuffer(out, dtype=np.int16)[:48000 + max_lag].astype(np.float64)
+    return max(range(max_lag), key=lambda d: np.dot(a[:len(b) - d], b[d:d + len(a)][:len(b) - d]))
+
+
+def _check_audioop():
+    if audioop is None:
+        return "audioop not available, skipped"
+    pcm = np.arange(-32768, 32768, dtype=np.int16).tobytes()
+    codes = bytes(range(256))
+    ok = (g711.encode(pcm, "ulaw") == audioop.lin2ulaw(pcm, 2)
+          and g711.encode(pcm, "alaw") == audioop.lin2alaw(pcm, 2)
+          and g711.decode(codes, "ulaw") == audioop.ulaw2lin(codes, 2)
+          and g711.decode(codes, "alaw") == audioop.alaw2lin(codes, 2))
+    return "bit-exact for all 65536 inputs" if ok else "MISMATCH"
+
+
+def _wire(fmt, pcm, robot_rate=None):
+    """Bytes on the uplink / downlink / robot link for `pcm` in `fmt`."""
+    api = AudioEncoder(fmt)
+    up = sum(len(encode_append(api.encode(c))) for c in _split(pcm, 40 * PCM_BYTES_PER_MS))
+    down_audio = AudioEncoder(fmt).encode(pcm)
+    down = sum(len(json.dumps({"type": "response.audio.delta", "response_id": "resp_00001",
+                               "item_id": "item_resp_00001", "delta": base64.b64encode(c).decode()}))
+               for c in _split(down_audio, api.bytes_per_ms * 20))
+    robot = AudioEncoder(fmt, rate=robot_rate)
+    frames = _split(pcm, 40 * PCM_BYTES_PER_MS)
+    return up, down, sum(len(robot.encode(f)) for f in frames)
+
+
+def main():
+    p = argparse.ArgumentParser(description="G.711 codec throughput and wire bytes")
+    p.add_argument("--seconds", type=int, default=60)
+    args = p.parse_args()
+
+    pcm = _speech(args.seconds)
+    audio_s = len(pcm) / PCM_BYTES_PER_MS / 1000
+    chunks = _split(pcm, 40 * PCM_BYTES_PER_MS)
+
+    print(f"audioop check: {_check_audioop()}")
+    print()
+    print(f"{'path':<30}{'x real time':>14}{'MB/s in':>10}{'SNR dB':>9}")
+    for fmt in ("g711_ulaw", "g711_alaw"):
+        for rate in (24000, None):
+            enc = AudioEncoder(fmt, rate=rate)
+            wire, t_enc = _timed(enc.encode, chunks)
+            dec = AudioDecoder(fmt, rate=rate)
+            out, t_dec = _timed(dec.decode, _split(wire, enc.bytes_per_ms * 20))
+            label = f"{fmt} @ {enc.rate // 1000} kHz"
+            delay = 0 if rate else _best_delay(pcm, out)
+            snr = _snr_db(pcm, out, delay)
+            print(f"{label + ' encode':<30}{audio_s / t_enc:>14.0f}{len(pcm) / t_enc / 1e6:>10.1f}{'':>9}")
+            print(f"{label + ' decode':<30}{audio_s / t_dec:>14.0f}{len(wire) / t_dec / 1e6:>10.1f}{snr:>9.1f}")
+
+    print()
+    print(f"{'bytes per s of audio':<24}{'uplink':>10}{'downlink':>10}{'robot':>10}")
+    base = None
+    for fmt in ("pcm16", "g711_ulaw", "g711_alaw"):
+        up, down, robot = (n / audio_s for n in _wire(fmt, pcm, robot_rate=24000))
+        base = base or (up, down, robot)
+        print(f"{fmt:<24}{up:>10.0f}{down:>10.0f}{robot:>10.0f}")
+        if fmt != "pcm16":
+            print(f"{'  vs pcm16':<24}{up / base[0]:>10.2f}{down / base[1]:>10.2f}{robot / base[2]:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
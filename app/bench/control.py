@@ -0,0 +1,136 @@
+"""
+Control command dispatch latency: command sent -> handler running on the
+main loop.
+
+    polling   the previous main loop: an asyncio.Event checked every 500 ms
+    bus       CommandBus.submit from another thread
+    http      POST /say on the control API (keep-alive connection)
+    ws        {"cmd": "say"} on the control API WebSocket
+
+The handler only records the time, so the numbers are the dispatch cost
+itself; the main loop runs a 20 ms tick task to stand in for other work.
+
+    cd app && python -m bench.control --commands 200
+"""
+import argparse
+import asyncio
+import http.client
+import json
+import random
+import socket
+import time
+
+from websockets.sync.client import connect
+
+from interfaces.control_api import start_control_server
+from util.command_bus import CommandBus
+from util.logger import configure_logging
+from util.stats import summarize
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_listening(port, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+def _drive(send, n, handled, spread=0.0):
+    """Send n commands one after another from this thread; latency = handler start - send."""
+    out = []
+    for _ in range(n):
+        # a random phase against the poller, as for a real button press
+        time.sleep(random.uniform(0, spread))
+        before = len(handled)
+        t0 = time.perf_counter()
+        send()
+        while len(handled) == before:
+            time.sleep(0.0001)
+        out.append(handled[-1] - t0)
+        time.sleep(0.002)
+    return out
+
+
+async def run(n, poll_n):
+    loop = asyncio.get_running_loop()
+    bus = CommandBus(loop)
+    handled = []
+    bus.register("say", lambda text=None: handled.append(time.perf_counter()))
+
+    async def tick():
+        while True:
+            await asyncio.sleep(0.02)
+    ticker = asyncio.create_task(tick())
+
+    results = {}
+
+    # previous design: thread sets a flag, main loop checks it every 500 ms
+    say_event = asyncio.Event()
+
+    async def poll():
+        while True:
+            if say_event.is_set():
+                say_event.clear()
+                handled.append(time.perf_counter())
+            await asyncio.sleep(0.5)
+    poller = asyncio.create_task(poll())
+    results["polling"] = await asyncio.to_thread(
+        _drive, lambda: loop.call_soon_threadsafe(say_event.set), poll_n, handled, spread=0.5)
+    poller.cancel()
+
+    results["bus"] = await asyncio.to_thread(_drive, lambda: bus.submit("say"), n, handled)
+
+    port = _free_port()
+    server = start_control_server(bus, "127.0.0.1", port)
+    await asyncio.to_thread(_wait_listening, port)
+
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+
+    def post():
+        conn.request("POST", "/say", body=json.dumps({"text": "hi"}), headers={"Content-Type": "application/json"})
+        conn.getresponse().read()
+    results["http"] = await asyncio.to_thread(_drive, post, n, handled)
+    conn.close()
+
+    def over_ws():
+        with connect(f"ws://127.0.0.1:{port}/ws") as ws:
+            def ws_say():
+                ws.send(json.dumps({"id": 1, "cmd": "say", "text": "hi"}))
+                ws.recv()
+            return _drive(ws_say, n, handled)
+    results["ws"] = await asyncio.to_thread(over_ws)
+
+    server.should_exit = True
+    ticker.cancel()
+    return results
+
+
+def main():
+    p = argparse.ArgumentParser(description="Control command dispatch latency")
+    p.add_argument("--commands", type=int, default=200)
+    p.add_argument("--poll-commands", type=int, default=20, help="commands for the 500 ms polling baseline")
+    args = p.parse_args()
+    configure_logging(console=False, log_dir="")
+
+    results = asyncio.run(run(args.commands, args.poll_commands))
+    print()
+    print(f"{'send -> handler':<16}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, values in results.items():
+        s = summarize(values)
+        print(f"{name:<16}{s['count']:>6}{s['p50'] * 1000:>10.3f}{s['p95'] * 1000:>10.3f}"
+              f"{s['p99'] * 1000:>10.3f}{s['max'] * 1000:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Reconnect / failover downtime of RealtimeClient.
+
+The Realtime stand-in drops the connection after every `--drop-every` turns;
+the client streams (silent) input audio so that only the live connection runs
+turns. Reports the downtime (socket closed -> next session usable) per drop,
+once with plain reconnects (jittered backoff) and once failing over to the
+pre-warmed standby connection.
+
+    cd app && python -m bench.failover --drops 10
+    cd app && python -m bench.failover --drops 10 --transport asyncio
+"""
+import argparse
+import asyncio
+import os
+import threading
+import time
+
+# the client reads the prompt file name at import time
+os.environ.setdefault("PROMPT_LOCAL_TXT", "speech_local.txt")
+
+from realtime.client import RealtimeClient
+from realtime.uplink import encode_append
+from sim.realtime_server import RealtimeStandInServer, add_script_args, script_from_args
+from util.logger import configure_logging
+from util.stats import summarize
+
+
+class _NullSpeaker:
+    def play_audio(self, data: bytes) -> None:
+        pass
+
+    def interrupt(self, started_at=None) -> int:
+        return 0
+
+
+class _FailoverClient(RealtimeClient):
+    """RealtimeClient that keeps every (mode, downtime) instead of only the last one."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.downtimes = []
+
+    def _on_session_ready(self, mode):
+        before = self.reconnects
+        super()._on_session_ready(mode)
+        if self.reconnects > before:
+            self.downtimes.append((mode, self.last_downtime_ms / 1000))
+
+
+async def _feed_uplink(client, interval_ms=40):
+    payload = encode_append(bytes(48 * interval_ms))
+    while True:
+        await asyncio.sleep(interval_ms / 1000)
+        try:
+            client.ws.send(payload)
+        except Exception:
+            pass
+
+
+async def run(script, transport, standby, drops, timeout):
+    loop = asyncio.get_running_loop()
+    server = await RealtimeStandInServer(script=script).start()
+    client = _FailoverClient(loop=loop, speaker=_NullSpeaker(), url=server.url, start_mic=False, transport=transport)
+    client.use_standby = standby
+    if transport == "asyncio":
+        asyncio.create_task(client.run_async())
+    else:
+        threading.Thread(target=client.run, daemon=True).start()
+    feeder = asyncio.create_task(_feed_uplink(client))
+
+    deadline = time.monotonic() + timeout
+    while len(client.downtimes) < drops and time.monotonic() < deadline:
+        await asyncio.sleep(0.1)
+    feeder.cancel()
+    client.close()
+    await server.stop()
+    return client.downtimes, server.connections
+
+
+def main():
+    p = argparse.ArgumentParser(description="RealtimeClient reconnect / failover downtime")
+    add_script_args(p)
+    p.add_argument("--drops", type=int, default=10)
+    p.add_argument("--transport", choices=["thread", "asyncio"], default="thread")
+    p.add_argument("--timeout", type=float, default=120, help="per run")
+    p.set_defaults(turns=100000, drop_every=1, wait_for_audio=True)
+    args = p.parse_args()
+    configure_logging(console=False, log_dir="")
+
+    results = {}
+    for name, standby in (("reconnect", False), ("standby", True)):
+        downtimes, connections = asyncio.run(run(script_from_args(args), args.transport, standby,
+                                                 args.drops, args.timeout))
+        results[name] = (downtimes, connections)
+
+    print()
+    print(f"{'run':<12}{'drops':>7}{'via standby':>13}{'conns':>7}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for name, (downtimes, connections) in results.items():
+        s = summarize([d for _, d in downtimes])
+        via = sum(1 for mode, _ in downtimes if mode == "standby")
+        if not s["count"]:
+            print(f"{name:<12}{0:>7}")
+            continue
+        print(f"{name:<12}{s['count']:>7}{via:>13}{connections:>7}"
+              f"{s['p50'] * 1000:>10.1f}{s['p95'] * 1000:>10.1f}{s['max'] * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
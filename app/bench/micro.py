@@ -0,0 +1,355 @@
+"""
+Microbenchmarks for the client hot paths, compared against stored baselines.
+
+Runs headless: the speakers and the mic get a fake PortAudio instance whose
+streams never touch a device (and a stand-in `pyaudio` module when PyAudio
+isn't installed), the robot link goes to the local robot stand-in, and the
+Realtime client is fed raw events without a connection.
+
+    dispatch.<event>      RealtimeClient._on_message, events/s per event type
+    mic.encode            mic callback: 48 kHz stereo -> 24 kHz resample,
+                          40 ms batches -> base64 append JSON, 10 ms chunks/s
+    mic.encode.g711       same with the G.711 uplink encoder
+    speaker.play_audio    Speaker.play_audio + the output callbacks that play
+                          it out, 20 ms chunks/s
+    remote.play_audio     RemoteSpeaker.play_audio until the robot stand-in has
+                          received everything, 20 ms chunks/s
+    log.event             log_event calls/s (caller side)
+    log.event+write       log_event until the rows are in the JSONL file
+
+Rates are per CPU second, not wall time: the calling thread's CPU time for
+the caller-side cases, the process's for the two end-to-end ones (robot link,
+log write). Load elsewhere on the machine moves them much less. Each case
+runs `--repeat` times with the garbage collector off and keeps the best rate;
+the whole suite runs `--rounds` times and a case's result is the median of
+its rounds, so one noisy round does not decide. The spread of a case is the
+range of its rounds relative to their median, with the best and the worst
+round left out (from 5 rounds on). Results are compared with
+bench/baselines/micro.json; a case slower than the baseline by more than
+`--threshold` fails the run (exit code 1), unless its own spread exceeds the
+threshold: then the machine is too noisy to tell, and the case is reported
+as "noisy" instead of gated. Baselines are machine specific: record them
+with --save-baseline on the machine that runs the comparison.
+
+    cd app && python -m bench.micro
+    cd app && python -m bench.micro --save-baseline
+    cd app && python -m bench.micro --only dispatch --threshold 0.2
+"""
+import argparse
+import asyncio
+import base64
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import types
+from pathlib import Path
+
+try:
+    import pyaudio
+except ImportError:
+    # headless machine without PortAudio: only the constants the app uses
+    pyaudio = types.ModuleType("pyaudio")
+    pyaudio.paInt16, pyaudio.paContinue = 8, 0
+    pyaudio.paInputOverflow, pyaudio.paOutputUnderflow = 2, 4
+    sys.modules["pyaudio"] = pyaudio
+
+# the client reads the prompt file name at import time
+os.environ.setdefault("PROMPT_LOCAL_TXT", "speech_local.txt")
+
+from interfaces import portaudio
+from interfaces.mic_terminal import MicSource
+from interfaces.speaker import Speaker
+from interfaces.speaker_remote import RemoteSpeaker
+from audio.g711 import AudioEncoder
+from realtime.client import RealtimeClient
+from realtime.uplink import encode_append
+from sim.robot_server import RobotStandInServer
+from util.logger import configure_logging, flush_log, log_event, log_stats
+
+BASELINE = Path(__file__).parent / "baselines" / "micro.json"
+
+
+class _FakeStream:
+    """Output / input stream that only keeps the callback; the bench drives it."""
+
+    def __init__(self, channels=1, stream_callback=None, **_):
+        self._channels = channels
+        self.callback = stream_callback
+        self._active = False
+
+    def start_stream(self):
+        self._active = True
+
+    def stop_stream(self):
+        self._active = False
+
+    def is_active(self):
+        return self._active
+
+    def close(self):
+        self._active = False
+
+
+class _FakePortAudio:
+    """One 48 kHz stereo device; open() never touches hardware."""
+
+    _DEVICE = {"index": 0, "name": "bench", "defaultSampleRate": 48000.0, "maxInputChannels": 2,
+               "maxOutputChannels": 2}
+
+    def get_device_count(self):
+        return 1
+
+    def get_device_info_by_index(self, i):
+        return dict(self._DEVICE)
+
+    def get_default_input_device_info(self):
+        return dict(self._DEVICE)
+
+    def open(self, **kw):
+        return _FakeStream(**kw)
+
+    def terminate(self):
+        pass
+
+
+def _headless():
+    # every portaudio.acquire() in this process gets the fake instance
+    portaudio._pa = _FakePortAudio()
+    portaudio._pa_users = 1
+
+
+class _NullSpeaker:
+    def play_audio(self, data, item_id=None):
+        pass
+
+    def interrupt(self, started_at=None):
+        return 0
+
+
+# -- cases: each returns (operations, seconds) --------------------------------
+
+def _events(typ, n):
+    rid, item = "resp_bench", "item_bench"
+    delta = base64.b64encode(bytes(960)).decode()
+    ev = {
+        "response.audio.delta": {"type": typ, "response_id": rid, "item_id": item, "output_index": 0,
+                                 "content_index": 0, "delta": delta},
+        "response.audio_transcript.delta": {"type": typ, "response_id": rid, "item_id": item, "delta": "word "},
+        "response.created": {"type": typ, "response": {"id": rid, "status": "in_progress"}},
+        "response.done": {"type": typ, "response": {"id": rid, "status": "completed", "output": [],
+                                                    "usage": {"input_tokens": 100, "output_tokens": 10}}},
+        "conversation.item.created": {"type": typ, "item": {"id": item, "type": "message", "role": "assistant"}},
+        "input_audio_buffer.speech_stopped": {"type": typ, "item_id": item, "audio_end_ms": 1000},
+    }[typ]
+    return [json.dumps(ev)] * n
+
+
+def dispatch_case(typ, n=5000):
+    def run():
+        # handlers hand work to the main loop as in the app (thread transport)
+        loop = asyncio.new_event_loop()
+        loop_thread = threading.Thread(target=loop.run_forever, daemon=True)
+        loop_thread.start()
+        client = RealtimeClient(loop=loop, speaker=_NullSpeaker(), start_mic=False)
+        raws = _events(typ, n)
+        if typ != "response.created":
+            client._on_message(client.ws, _events("response.created", 1)[0])
+        t0 = time.thread_time()
+        for raw in raws:
+            client._on_message(client.ws, raw)
+        dt = time.thread_time() - t0
+        errors = client.dispatcher.handler_errors
+        client.close()
+        loop.call_soon_threadsafe(loop.stop)
+        loop_thread.join()
+        loop.close()
+        if errors:
+            raise RuntimeError(f"{typ}: {errors} handler errors")
+        return n, dt
+    return run
+
+
+def mic_case(encoder=None, chunks=2000):
+    def run():
+        source = MicSource()
+        source.open()
+        batch = bytearray()
+        batch_bytes = 24000 * 40 // 1000 * 2
+
+        def send(chunk):
+            batch.extend(chunk)
+            if len(batch) >= batch_bytes:
+                pcm = bytes(batch)
+                batch.clear()
+                encode_append(encoder.encode(pcm) if encoder else pcm)
+
+        source.start(send)
+        raw = bytes(480 * 2 * source._stream._channels)
+        t0 = time.thread_time()
+        for _ in range(chunks):
+            source._on_audio(raw, 480, {}, 0)
+        dt = time.thread_time() - t0
+        source.stop()
+        return chunks, dt
+    return run
+
+
+def speaker_case(chunks=5000):
+    def run():
+        speaker = Speaker(buffer_s=10)
+        speaker.open()
+        callback = speaker._stream.callback
+        data = bytes(960)
+        t0 = time.thread_time()
+        for _ in range(chunks):
+            speaker.play_audio(data, "item_bench")
+            callback(None, 240, {}, 0)
+            callback(None, 240, {}, 0)
+        dt = time.thread_time() - t0
+        speaker._stream = None
+        return chunks, dt
+    return run
+
+
+def remote_case(chunks=2000):
+    async def run_async():
+        server = await RobotStandInServer().start()
+        speaker = RemoteSpeaker(server.speech_url, server.flush_url, queue_ms=chunks * 20 * 2).start()
+        while not speaker.stats()["audio_connected"]:
+            await asyncio.sleep(0.01)
+        data = bytes(960)
+        total = chunks * len(data)
+        t0 = time.process_time()
+        for _ in range(chunks):
+            speaker.play_audio(data)
+        while server.bytes_received < total:
+            await asyncio.sleep(0.001)
+        dt = time.process_time() - t0
+        await speaker.close()
+        await server.stop()
+        return chunks, dt
+    return lambda: asyncio.run(run_async())
+
+
+def log_case(write, calls=5000):
+    def run():
+        flush_log()
+        written = log_stats()["written"]
+        clock = time.process_time if write else time.thread_time
+        t0 = clock()
+        for i in range(calls):
+            log_event("bench", source="micro", value=i, extra="x")
+        if write:
+            flush_log(timeout=10)
+        dt = clock() - t0
+        flush_log(timeout=10)
+        if log_stats()["written"] - written < calls:
+            raise RuntimeError("log rows dropped")
+        return calls, dt
+    return run
+
+
+CASES = {
+    **{f"dispatch.{t}": dispatch_case(t) for t in (
+        "response.audio.delta", "response.audio_transcript.delta", "response.created", "response.done",
+        "conversation.item.created", "input_audio_buffer.speech_stopped")},
+    "mic.encode": mic_case(),
+    "mic.encode.g711": mic_case(AudioEncoder("g711_ulaw")),
+    "speaker.play_audio": speaker_case(),
+    "remote.play_audio": remote_case(),
+    "log.event": log_case(write=False),
+    "log.event+write": log_case(write=True),
+}
+
+
+def _best_rate(case, repeat):
+    # like timeit: no collector pauses inside the timed runs
+    rates = []
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            ops, dt = case()
+        finally:
+            gc.enable()
+        rates.append(ops / dt)
+    return max(rates)
+
+
+def _machine():
+    return f"{platform.node()} {platform.machine()} python {platform.python_version()}"
+
+
+def _spread(rates):
+    rates = sorted(rates)
+    if len(rates) >= 5:
+        rates = rates[1:-1]
+    return (rates[-1] - rates[0]) / statistics.median(rates)
+
+
+def main():
+    p = argparse.ArgumentParser(description="Client hot-path microbenchmarks with regression thresholds")
+    p.add_argument("--repeat", type=int, default=7, help="runs per case and round, the best one counts")
+    p.add_argument("--rounds", type=int, default=9, help="suite rounds, the median round counts")
+    p.add_argument("--threshold", type=float, default=0.4, help="allowed slowdown vs. the baseline (0.4 = 40%%)")
+    p.add_argument("--only", default="", help="run cases whose name contains this")
+    p.add_argument("--baseline", default=str(BASELINE))
+    p.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    args = p.parse_args()
+
+    with tempfile.TemporaryDirectory() as log_dir:
+        configure_logging(console=False, log_dir=log_dir, queue_size=100000)
+        _headless()
+        rounds = {}
+        # rounds interleave the cases: a slow phase of the machine hits all of them alike
+        for _ in range(args.rounds):
+            for name, case in CASES.items():
+                if args.only in name:
+                    rounds.setdefault(name, []).append(_best_rate(case, args.repeat))
+        results = {name: statistics.median(rates) for name, rates in rounds.items()}
+
+    path = Path(args.baseline)
+    baseline = json.loads(path.read_text()) if path.is_file() else {}
+    base = baseline.get("results", {})
+    if base and baseline.get("machine") != _machine():
+        print(f"note: baseline recorded on {baseline.get('machine')}, this is {_machine()}")
+
+    print()
+    print(f"{'case':<44}{'ops/cpu-s':>14}{'spread':>9}{'baseline':>14}{'change':>9}")
+    regressions, noisy = [], []
+    for name, rate in results.items():
+        ref = base.get(name)
+        spread = _spread(rounds[name])
+        change = f"{(rate / ref - 1) * 100:+.0f}%" if ref else ""
+        flag = ""
+        if ref and rate < ref * (1 - args.threshold):
+            if spread > args.threshold:
+                noisy.append(name)
+                flag = "  noisy, not gated"
+            else:
+                regressions.append(name)
+                flag = "  REGRESSION"
+        print(f"{name:<44}{rate:>14,.0f}{spread:>9.0%}{f'{ref:,.0f}' if ref else '-':>14}{change:>9}{flag}")
+
+    if args.save_baseline:
+        base.update({k: round(v) for k, v in results.items()})
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({"machine": _machine(), "results": base}, indent=2) + "\n")
+        print(f"\nbaseline saved to {path}")
+        return
+    if noisy:
+        print(f"\n{len(noisy)} case(s) slower than the baseline but spread over {args.threshold:.0%} between rounds:"
+              f" not gated, rerun with more --rounds on a quieter machine")
+    if regressions:
+        print(f"\n{len(regressions)} case(s) more than {args.threshold:.0%} slower than the baseline")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Push recorded or synthetic conversation audio through RealtimeClient faster
+than real time.
+
+The client gets an AudioSource instead of the microphone: `--input-wav` /
+`--input-pcm` replays a recording, otherwise synthetic speech bursts are
+generated. The Realtime stand-in (child process) runs an energy VAD over the
+received audio and answers every detected turn, so the whole uplink -> turn
+-> response -> playback path runs without a mic or network.
+
+Reports audio pushed vs. wall time, the turns the stand-in detected (for
+synthetic audio: vs. the generated bursts), responses played, uplink drops
+and client CPU.
+
+    cd app && python -m bench.replay --bursts 200 --source-pace 50
+    cd app && python -m bench.replay --input-wav session.wav --source-pace 20 --repeat 10
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import threading
+import time
+
+# the client reads the prompt file name at import time
+os.environ.setdefault("PROMPT_LOCAL_TXT", "speech_local.txt")
+
+from interfaces.audio_source import FileSource, SyntheticSource
+from realtime.client import RealtimeClient
+from sim.realtime_server import add_script_args, script_from_args, serve_forever
+from util.logger import configure_logging
+
+
+class _CountingSpeaker:
+    def __init__(self):
+        self.bytes = 0
+
+    def play_audio(self, data: bytes) -> None:
+        self.bytes += len(data)
+
+    def interrupt(self, started_at=None) -> int:
+        return 0
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _wait_listening(port, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.05)
+
+
+async def replay(url, source, settle_s):
+    speaker = _CountingSpeaker()
+    client = RealtimeClient(loop=asyncio.get_running_loop(), speaker=speaker, url=url, audio_source=source)
+    counts = {"stopped": 0, "done": 0}
+
+    def count(key):
+        def hook(ev):
+            counts[key] += 1
+        return hook
+
+    client.dispatcher.on("input_audio_buffer.speech_stopped", count("stopped"))
+    client.dispatcher.on("response.done", count("done"))
+
+    cpu0, t0 = time.process_time(), time.perf_counter()
+    threading.Thread(target=client.run, daemon=True).start()
+    while not source.finished.is_set():
+        await asyncio.sleep(0.1)
+    wall = time.perf_counter() - t0
+    # the last turn's response still has to arrive
+    await asyncio.sleep(settle_s)
+    cpu = time.process_time() - cpu0
+    stats = client.stats()
+    client.close()
+    return wall, cpu, counts, speaker.bytes, stats
+
+
+def main():
+    p = argparse.ArgumentParser(description="Replay audio through RealtimeClient faster than real time")
+    add_script_args(p)
+    p.add_argument("--input-wav", default=None, help="recording to replay (16-bit WAV, any rate)")
+    p.add_argument("--input-pcm", default=None, help="raw 24 kHz mono PCM16 recording to replay")
+    p.add_argument("--repeat", type=int, default=1, help="replay the recording n times")
+    p.add_argument("--bursts", type=int, default=100, help="synthetic speech bursts (without --input-*)")
+    p.add_argument("--source-pace", type=float, default=20, help="input audio pacing vs. real time")
+    p.add_argument("--seed", type=int, default=0)
+    p.set_defaults(audio_vad=True, pace=0, response_delay_ms=20, first_audio_ms=10, audio_ms=600)
+    args = p.parse_args()
+    configure_logging(console=False, log_dir="")
+
+    path = args.input_wav or args.input_pcm
+    if path:
+        source = FileSource(path, pace=args.source_pace, repeat=args.repeat)
+        expected = None
+    else:
+        source = SyntheticSource(count=args.bursts, pace=args.source_pace, seed=args.seed)
+        expected = len(source.bursts)
+
+    port = _free_port()
+    server = multiprocessing.Process(target=serve_forever, args=("127.0.0.1", port, script_from_args(args)),
+                                     daemon=True)
+    server.start()
+
+    async def run():
+        await _wait_listening(port)
+        return await replay(f"ws://127.0.0.1:{port}", source, settle_s=1.0)
+
+    try:
+        wall, cpu, counts, played, stats = asyncio.run(run())
+    finally:
+        server.terminate()
+
+    audio_s = stats["audio_source"]["audio_s"]
+    uplink = stats.get("uplink", {})
+    print()
+    print(f"audio pushed      {audio_s:.1f} s in {wall:.1f} s wall  ({audio_s / wall:.1f}x real time)")
+    print(f"turns detected    {counts['stopped']}" + (f" of {expected} bursts" if expected is not None else ""))
+    print(f"responses         {counts['done']}, {played / 48000:.1f} s of agent audio played")
+    print(f"uplink            {uplink.get('messages_sent', 0)} messages, "
+          f"{uplink.get('chunks_dropped', 0)} chunks dropped, max queue {uplink.get('max_depth', 0)}")
+    print(f"client cpu        {cpu:.1f} s ({cpu / wall * 100:.0f}% of one core)")
+
+
+if __name__ == "__main__":
+    main()
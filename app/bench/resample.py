@@ -0,0 +1,82 @@
+"""
+Mic resampling benchmark: StreamingResampler vs. the previous audioop path.
+
+Reports 10 ms frames processed per second for each source format and quality,
+and checks that the output frame count over a long simulated session is exact.
+`--chunk-ms` feeds larger capture blocks to show the effect of batching.
+
+    cd app && python -m bench.resample --seconds 60
+    cd app && python -m bench.resample --seconds 60 --chunk-ms 40
+"""
+import argparse
+import time
+import warnings
+import numpy as np
+from audio.resample import QUALITY_TAPS, StreamingResampler
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore", DeprecationWarning)
+    try:
+        import audioop            # removed in Python 3.13
+    except ImportError:
+        audioop = None
+
+TARGET_RATE = 24000
+FORMATS = [(48000, 2), (48000, 1), (44100, 1), (16000, 1)]
+
+
+def _chunks(src_rate, channels, seconds, chunk_ms):
+    frames = src_rate * chunk_ms // 1000
+    t = np.arange(src_rate * seconds) / src_rate
+    x = (8000 * np.sin(2 * np.pi * 440 * t)).astype(np.int16)
+    pcm = np.repeat(x, channels).tobytes()
+    step = frames * channels * 2
+    return [pcm[i:i + step] for i in range(0, len(pcm), step)]
+
+
+def _audioop_path(chunks, src_rate, channels):
+    out = 0
+    for raw in chunks:
+        if channels > 1:
+            raw = audioop.tomono(raw, 2, 0.5, 0.5)
+        if src_rate != TARGET_RATE:
+            raw, _ = audioop.ratecv(raw, 2, 1, src_rate, TARGET_RATE, None)
+        out += len(raw) // 2
+    return out
+
+
+def _numpy_path(chunks, src_rate, channels, quality):
+    r = StreamingResampler(src_rate, TARGET_RATE, channels=channels, quality=quality)
+    out = 0
+    for raw in chunks:
+        out += len(r.process(raw)) // 2
+    return out
+
+
+def _timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return time.perf_counter() - t0, out
+
+
+def main():
+    p = argparse.ArgumentParser(description="mic resampler benchmark")
+    p.add_argument("--seconds", type=int, default=60, help="simulated audio per format")
+    p.add_argument("--chunk-ms", type=int, default=10, help="capture block size")
+    args = p.parse_args()
+
+    print(f"{'format':<16}{'path':<18}{'frames/s':>12}{'x realtime':>12}{'out frames':>12}{'expected':>10}")
+    for src_rate, channels in FORMATS:
+        chunks = _chunks(src_rate, channels, args.seconds, args.chunk_ms)
+        expected = -(-src_rate * args.seconds * TARGET_RATE // src_rate)
+        fmt = f"{src_rate}Hz/{channels}ch"
+        paths = [("audioop", _audioop_path, ())] if audioop else []
+        paths += [(f"numpy-{q}", _numpy_path, (q,)) for q in QUALITY_TAPS]
+        for name, fn, extra in paths:
+            dt, out = _timed(fn, chunks, src_rate, channels, *extra)
+            fps = len(chunks) * args.chunk_ms / 10 / dt
+            print(f"{fmt:<16}{name:<18}{fps:>12.0f}{fps / 100:>12.0f}{out:>12}{expected:>10}")
+
+
+if __name__ == "__main__":
+    main()
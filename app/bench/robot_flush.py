@@ -0,0 +1,60 @@
+"""
+Barge-in flush latency of speaker_remote against the local robot stand-in:
+persistent control channel vs. a new connection per flush (previous behaviour).
+
+    cd app && python -m bench.robot_flush --flushes 200
+"""
+import argparse
+import asyncio
+import time
+
+from interfaces.speaker_remote import RemoteSpeaker
+from sim.robot_server import RobotStandInServer
+from util.stats import summarize
+
+
+async def run(flushes, ack_delay_ms):
+    server = await RobotStandInServer(ack_delay_ms=ack_delay_ms).start()
+    speaker_remote = RemoteSpeaker(server.speech_url, server.flush_url).start()
+
+    deadline = time.monotonic() + 5
+    while not speaker_remote.stats()["control_connected"] and time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+
+    results = {}
+    for name, persistent in (("persistent", True), ("oneshot", False)):
+        samples = []
+        for _ in range(flushes):
+            speaker_remote.play_audio(bytes(960))
+            fut = speaker_remote.flush(persistent=persistent)
+            latency = await asyncio.wrap_future(fut)
+            if latency is not None:
+                samples.append(latency)
+            await asyncio.sleep(0.005)
+        results[name] = summarize(samples)
+
+    info = {"server": server.stats(), "client": speaker_remote.stats()}
+    await speaker_remote.close()
+    await server.stop()
+    return results, info
+
+
+def main():
+    p = argparse.ArgumentParser(description="speaker_remote flush latency")
+    p.add_argument("--flushes", type=int, default=200)
+    p.add_argument("--ack-delay-ms", type=float, default=0)
+    args = p.parse_args()
+
+    results, info = asyncio.run(run(args.flushes, args.ack_delay_ms))
+    print()
+    print(f"{'mode':<14}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, s in results.items():
+        if s["count"]:
+            print(f"{name:<14}{s['count']:>6}{s['p50'] * 1000:>10.2f}{s['p95'] * 1000:>10.2f}"
+                  f"{s['p99'] * 1000:>10.2f}{s['max'] * 1000:>10.2f}")
+    print(f"robot: {info['server']}")
+    print(f"client: {info['client']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+say() latency with and without the PCM cache.
+
+Calls `RealtimeClient.say` for a fixed phrase against the Realtime stand-in
+(no scripted turns, only the responses to say()) and measures say() -> first
+speaker write:
+
+    miss:     response.create round-trip + generation, audio captured
+    hit:      replayed from the in-memory LRU
+    disk:     new cache instance on the same directory (memory-mapped clip),
+              as after a restart
+    prefill:  prefill_say_cache() at startup, first say() is already a hit
+
+    cd app && python -m bench.say_cache --says 20
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import threading
+import time
+
+# the client reads the prompt file name at import time
+os.environ.setdefault("PROMPT_LOCAL_TXT", "speech_local.txt")
+
+from audio.pcm_cache import PcmCache
+from realtime.client import RealtimeClient
+from sim.realtime_server import RealtimeStandInServer, add_script_args, script_from_args
+from util.logger import configure_logging
+from util.stats import summarize
+
+PHRASE = "Attention. There is only a limited amount of cake! Please take only one piece. Thank you!"
+
+
+class _BenchSpeaker:
+    """Records the time of every write."""
+
+    def __init__(self):
+        self.writes = []
+        self.bytes = 0
+
+    def play_audio(self, data: bytes) -> None:
+        self.writes.append(time.perf_counter())
+        self.bytes += len(data)
+
+    def interrupt(self, started_at=None) -> int:
+        return 0
+
+    def first_write_after(self, t):
+        for w in self.writes:
+            if w >= t:
+                return w
+        return None
+
+
+async def _wait(pred, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not pred():
+        if time.monotonic() > deadline:
+            raise TimeoutError
+        await asyncio.sleep(0.005)
+
+
+async def _start_client(url, cache, speaker):
+    client = RealtimeClient(loop=asyncio.get_running_loop(), speaker=speaker, url=url, start_mic=False,
+                            say_cache=cache)
+    threading.Thread(target=client.run, daemon=True).start()
+    await _wait(lambda: client._session_ready)
+    return client
+
+
+async def _say_once(client, speaker, cache, settle_s):
+    before = cache.stats()["puts"]
+    t0 = time.perf_counter()
+    client.say(PHRASE)
+    await _wait(lambda: speaker.first_write_after(t0) is not None)
+    latency = speaker.first_write_after(t0) - t0
+    # let the clip finish (and a miss be stored) before the next say()
+    await asyncio.sleep(settle_s)
+    return latency, cache.stats()["puts"] > before
+
+
+async def run(script, says, settle_s):
+    server = await RealtimeStandInServer(script=script).start()
+    results = {}
+    with tempfile.TemporaryDirectory() as cache_dir:
+        # miss (no cache at all) vs. hit from memory
+        speaker = _BenchSpeaker()
+        cache = PcmCache(cache_dir)
+        client = await _start_client(server.url, cache, speaker)
+        results["miss"] = []
+        for _ in range(says):
+            client.say_cache = PcmCache(None)      # always empty: every say() is a round-trip
+            latency, _ = await _say_once(client, speaker, client.say_cache, settle_s)
+            results["miss"].append(latency)
+        client.say_cache = cache
+        await _say_once(client, speaker, cache, settle_s)     # stores the clip (memory + disk)
+        results["hit"] = [(await _say_once(client, speaker, cache, 0.05))[0] for _ in range(says)]
+        client.close()
+
+        # restart: fresh cache instance, clip comes from the memory-mapped file
+        speaker = _BenchSpeaker()
+        cache = PcmCache(cache_dir)
+        client = await _start_client(server.url, cache, speaker)
+        results["disk"] = [(await _say_once(client, speaker, cache, 0.05))[0]]
+        client.close()
+
+        # prefill on another directory, then say()
+        with tempfile.TemporaryDirectory() as prefill_dir:
+            speaker = _BenchSpeaker()
+            cache = PcmCache(prefill_dir)
+            client = await _start_client(server.url, cache, speaker)
+            t0 = time.perf_counter()
+            client.prefill_say_cache([PHRASE])
+            await _wait(lambda: cache.stats()["puts"] == 1)
+            prefill_s = time.perf_counter() - t0
+            played_during_prefill = speaker.bytes
+            results["prefill"] = [(await _say_once(client, speaker, cache, 0.05))[0]]
+            stats = client.stats()["say_cache"]
+            client.close()
+    await server.stop()
+    return results, prefill_s, played_during_prefill, stats
+
+
+def main():
+    p = argparse.ArgumentParser(description="say() latency with and without the PCM cache")
+    add_script_args(p)
+    p.add_argument("--says", type=int, default=20)
+    p.set_defaults(turns=0, pace=0)
+    args = p.parse_args()
+    configure_logging(console=False, log_dir="")
+
+    settle_s = (args.audio_ms / 1000 / args.pace if args.pace else 0) + 0.1
+    results, prefill_s, played, stats = asyncio.run(run(script_from_args(args), args.says, settle_s))
+
+    print()
+    print(f"{'say() -> first write':<22}{'n':>5}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for name, values in results.items():
+        s = summarize(values)
+        print(f"{name:<22}{s['count']:>5}{s['p50'] * 1000:>10.2f}{s['p95'] * 1000:>10.2f}{s['max'] * 1000:>10.2f}")
+    print(f"\nprefill took {prefill_s * 1000:.0f} ms, {played} bytes played during prefill (expected 0)")
+    print(f"cache: {stats}")
+
+
+if __name__ == "__main__":
+    main()
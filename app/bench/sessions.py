@@ -0,0 +1,182 @@
+"""
+Multi-session load test: how many concurrent sessions one core can carry.
+
+Runs N RealtimeClient sessions under one SessionManager (one event loop)
+against the Realtime stand-in, which runs in a child process so that only the
+client side is measured. Each session gets real-time paced agent audio and,
+with --uplink-ms > 0, a synthetic mic uplink (one input_audio_buffer.append of
+silence per interval). For every N it reports process CPU, event loop lag and
+how much of the scripted agent audio reached the speakers.
+
+A step is healthy while loop lag p99 stays under --max-lag-ms and the
+delivered audio keeps up with real time; sessions per core is
+N / (CPU seconds per wall second) of the largest healthy step.
+
+    cd app && python -m bench.sessions --sessions 1,10,25,50 --seconds 15
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import multiprocessing
+import os
+import socket
+import time
+
+# the client reads the prompt file name at import time
+os.environ.setdefault("PROMPT_LOCAL_TXT", "speech_local.txt")
+
+from realtime.sessions import SessionManager
+from realtime.uplink import encode_append
+from sim.realtime_server import add_script_args, script_from_args, serve_forever
+from util.logger import configure_logging
+from util.stats import summarize
+
+BYTES_PER_S = 24000 * 2
+
+
+class _CountingSpeaker:
+    """Speaker backend that only counts the audio it is given."""
+
+    def __init__(self):
+        self.bytes = 0
+
+    def play_audio(self, data: bytes) -> None:
+        self.bytes += len(data)
+
+    def interrupt(self, started_at=None) -> int:
+        return 0
+
+    def stats(self) -> dict:
+        return {"bytes": self.bytes}
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _wait_listening(port, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.05)
+
+
+async def _measure_lag(samples, interval=0.01):
+    while True:
+        t0 = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(time.perf_counter() - t0 - interval)
+
+
+async def _feed_uplink(clients, interval_ms):
+    # what each session's AudioUplink would send from a live mic
+    silence = bytes(BYTES_PER_S * interval_ms // 1000)
+    while True:
+        await asyncio.sleep(interval_ms / 1000)
+        payload = encode_append(silence)
+        for client in clients:
+            try:
+                client.ws.send(payload)
+            except Exception:
+                pass
+
+
+async def run_step(n, url, seconds, warmup_s, uplink_ms):
+    manager = SessionManager()
+    speakers = []
+    for i in range(n):
+        speaker = _CountingSpeaker()
+        speakers.append(speaker)
+        manager.add(f"load-{n}-{i}", speaker=speaker, url=url, start_mic=False)
+    manager.start_all()
+    clients = [s.client for s in manager.sessions.values()]
+    uplink = asyncio.create_task(_feed_uplink(clients, uplink_ms)) if uplink_ms else None
+
+    await asyncio.sleep(warmup_s)
+    lag = []
+    lag_task = asyncio.create_task(_measure_lag(lag))
+    bytes0 = sum(s.bytes for s in speakers)
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    await asyncio.sleep(seconds)
+    cpu, wall = time.process_time() - cpu0, time.perf_counter() - wall0
+    audio_s = (sum(s.bytes for s in speakers) - bytes0) / BYTES_PER_S
+
+    lag_task.cancel()
+    if uplink:
+        uplink.cancel()
+    states = manager.stats()
+    await manager.shutdown()
+    return {
+        "sessions": n,
+        "cpu": cpu / wall,
+        "lag": summarize(lag),
+        # agent audio received per session per wall second; flat across steps while keeping up
+        "audio_rate": audio_s / wall / n,
+        "running": states["running"],
+    }
+
+
+def main():
+    p = argparse.ArgumentParser(description="multi-session load test")
+    add_script_args(p)
+    p.add_argument("--sessions", default="1,10,25,50", help="comma separated session counts")
+    p.add_argument("--seconds", type=float, default=15, help="measurement window per step")
+    p.add_argument("--warmup", type=float, default=3)
+    p.add_argument("--uplink-ms", type=int, default=40, help="synthetic mic uplink interval, 0 = off")
+    p.add_argument("--max-lag-ms", type=float, default=20)
+    p.set_defaults(turns=100000)
+    args = p.parse_args()
+    configure_logging(console=False, log_dir="")
+
+    port = _free_port()
+    server = multiprocessing.Process(target=serve_forever, args=("127.0.0.1", port, script_from_args(args)),
+                                     daemon=True)
+    server.start()
+    url = f"ws://127.0.0.1:{port}"
+
+    async def sweep():
+        await _wait_listening(port)
+        out = []
+        for n in (int(x) for x in args.sessions.split(",")):
+            # keep the per-session client banners and connection logs out of the report
+            with contextlib.redirect_stdout(io.StringIO()):
+                out.append(await run_step(n, url, args.seconds, args.warmup, args.uplink_ms))
+            r = out[-1]
+            print(f"  {n} sessions: cpu {r['cpu'] * 100:.0f}%  lag p99 {r['lag']['p99'] * 1000:.1f} ms")
+        return out
+
+    try:
+        results = asyncio.run(sweep())
+    finally:
+        server.terminate()
+
+    print()
+    print(f"{'sessions':>8}{'running':>9}{'cpu %':>8}{'cpu %/sess':>12}{'lag p50 ms':>12}"
+          f"{'lag p99 ms':>12}{'lag max ms':>12}{'audio s/s':>11}")
+    best = None
+    for r in results:
+        lag = r["lag"]
+        print(f"{r['sessions']:>8}{r['running']:>9}{r['cpu'] * 100:>8.1f}{r['cpu'] * 100 / r['sessions']:>12.2f}"
+              f"{lag['p50'] * 1000:>12.2f}{lag['p99'] * 1000:>12.2f}{lag['max'] * 1000:>12.2f}{r['audio_rate']:>11.2f}")
+        healthy = r["running"] == r["sessions"] and lag["p99"] * 1000 <= args.max_lag_ms
+        if healthy and r["cpu"] > 0:
+            best = r
+    if best:
+        print(f"\n~{best['sessions'] / best['cpu']:.0f} sessions per core "
+              f"(from {best['sessions']} sessions at {best['cpu'] * 100:.0f}% CPU, "
+              f"lag p99 <= {args.max_lag_ms:g} ms)")
+    else:
+        print("\nno healthy step")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Long-session soak test: memory and per-turn latency must stay flat.
+
+Replays `--hours` of conversation (one turn every `--turn-every-s`) through an
+unmodified RealtimeClient against the Realtime stand-in, compressed in time
+(unpaced audio, short scripted delays). The stand-in runs in a child process
+and models a model whose latency grows with the conversation context
+(`--ms-per-1k-ctx`), so an untrimmed conversation shows up as rising latency.
+
+Every `--report-every` turns it prints client RSS, live Python objects, the
+size of the client's per-response state, the server-reported context
+(usage.input_tokens) and the stop -> first audio latency of that window.
+
+    cd app && python -m bench.soak --hours 24
+    cd app && python -m bench.soak --hours 2 --no-trim     # for comparison
+"""
+import argparse
+import asyncio
+import gc
+import multiprocessing
+import os
+import socket
+import threading
+import time
+
+# the client reads the prompt file name at import time
+os.environ.setdefault("PROMPT_LOCAL_TXT", "speech_local.txt")
+
+from realtime.client import RealtimeClient
+from sim.realtime_server import add_script_args, script_from_args, serve_forever
+from util.logger import configure_logging
+from util.stats import summarize
+
+
+class _NullSpeaker:
+    def play_audio(self, data: bytes) -> None:
+        pass
+
+    def interrupt(self, started_at=None) -> int:
+        return 0
+
+
+def _rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _wait_listening(port, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.05)
+
+
+async def soak(url, turns, report_every, trim, transport):
+    loop = asyncio.get_running_loop()
+    client = RealtimeClient(loop=loop, speaker=_NullSpeaker(), url=url, start_mic=False, transport=transport)
+    client.trim_conversation = trim
+
+    done = asyncio.Event()
+    window = []
+    state = {"stop": None, "first": False, "turns": 0, "context": None}
+
+    # dispatcher hooks run on the websocket thread in thread mode
+    def on_stop(ev):
+        state["stop"], state["first"] = time.perf_counter(), False
+
+    def on_audio(data, rid, item_id):
+        if state["stop"] is not None and not state["first"]:
+            state["first"] = True
+            window.append(time.perf_counter() - state["stop"])
+
+    def on_done(ev):
+        state["turns"] += 1
+        state["context"] = (ev["response"].get("usage") or {}).get("input_tokens")
+        if state["turns"] >= turns:
+            loop.call_soon_threadsafe(done.set)
+
+    client.dispatcher.on("input_audio_buffer.speech_stopped", on_stop)
+    client.dispatcher.on_audio(on_audio)
+    client.dispatcher.on("response.done", on_done)
+
+    if transport == "asyncio":
+        asyncio.create_task(client.run_async())
+    else:
+        threading.Thread(target=client.run, daemon=True).start()
+
+    print(f"{'turns':>7}{'rss MB':>9}{'objects':>10}{'items':>7}{'dialog':>8}{'ai_buf':>8}{'rids':>6}"
+          f"{'ctx tok':>9}{'p50 ms':>9}{'p95 ms':>9}")
+    reported = 0
+    rows = []
+    while not done.is_set():
+        await asyncio.sleep(0.2)
+        if state["turns"] - reported < report_every and not done.is_set():
+            continue
+        reported = state["turns"]
+        lat = summarize(window)
+        window.clear()
+        conv = client.conversation.stats()
+        row = {
+            "turns": reported,
+            "rss": _rss_mb(),
+            "objects": len(gc.get_objects()),
+            "context": state["context"] or 0,
+            "p50": lat["p50"] * 1000,
+            "p95": lat["p95"] * 1000,
+        }
+        rows.append(row)
+        print(f"{reported:>7}{row['rss']:>9.1f}{row['objects']:>10}{conv['items']:>7}{conv['dialog_lines']:>8}"
+              f"{len(client._ai_buf):>8}{len(client._first_audio_seen_for_rid):>6}"
+              f"{row['context']:>9}{row['p50']:>9.1f}{row['p95']:>9.1f}")
+    client.close()
+    return rows
+
+
+def main():
+    p = argparse.ArgumentParser(description="RealtimeClient soak test")
+    add_script_args(p)
+    p.add_argument("--hours", type=float, default=24, help="simulated conversation time")
+    p.add_argument("--turn-every-s", type=float, default=20, help="simulated time between turns")
+    p.add_argument("--report-every", type=int, default=0, help="turns per report line (default: ~12 lines)")
+    p.add_argument("--no-trim", action="store_true", help="keep the whole conversation on the server")
+    p.add_argument("--transport", choices=["thread", "asyncio"], default="thread")
+    p.set_defaults(pace=0, speech_ms=50, response_delay_ms=20, first_audio_ms=10, gap_ms=0, ms_per_1k_ctx=5)
+    args = p.parse_args()
+    configure_logging(console=False, log_dir="")
+
+    turns = max(1, int(args.hours * 3600 / args.turn_every_s))
+    args.turns = turns + 10
+    report_every = args.report_every or max(1, turns // 12)
+    print(f"{args.hours:g} h at one turn per {args.turn_every_s:g} s = {turns} turns, "
+          f"trim {'off' if args.no_trim else 'on'}")
+
+    port = _free_port()
+    server = multiprocessing.Process(target=serve_forever, args=("127.0.0.1", port, script_from_args(args)),
+                                     daemon=True)
+    server.start()
+
+    async def run():
+        await _wait_listening(port)
+        return await soak(f"ws://127.0.0.1:{port}", turns, report_every, not args.no_trim, args.transport)
+
+    try:
+        rows = asyncio.run(run())
+    finally:
+        server.terminate()
+
+    if len(rows) >= 3:
+        # compare the second reporting window (warmed up) with the last one
+        first, last = rows[1], rows[-1]
+        print(f"\nrss {first['rss']:.1f} -> {last['rss']:.1f} MB, objects {first['objects']} -> {last['objects']}, "
+              f"latency p50 {first['p50']:.1f} -> {last['p50']:.1f} ms, context {first['context']} -> {last['context']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Client-side end-of-turn detection (TURN_DETECTION=client) vs the server VAD
+baseline, on synthetic turns with known phrase boundaries.
+
+Every turn is 1-3 phrases with hesitation pauses between them; each speaker
+profile has its own pause range. The same webrtcvad decisions feed:
+
+    server-vad  fixed 800 ms silence (turn_detection.silence_duration_ms)
+    fixed-500   fixed 500 ms, no adaptation
+    adaptive    TurnDetector: threshold = p90 of the speaker's pauses + margin
+
+and per turn, against the ground truth:
+
+    delay        real speech end -> turn end decided
+    saved        server-vad delay - delay
+    cut-offs     turns ended inside a hesitation pause (% of turns)
+    first audio  speech end -> first response audio, for a server that needs
+                 --response-ms from response.create to first audio; with
+                 speculation the response was requested --lead-ms earlier
+
+`--e2e` also runs RealtimeClient against the Realtime stand-in at real time,
+once with server VAD and once with client turn detection, and reports the
+measured speech end -> first agent audio played.
+
+    cd app && python -m bench.turn_detection --turns 300
+    cd app && python -m bench.turn_detection --turns 300 --e2e --e2e-turns 10
+"""
+import argparse
+import asyncio
+import os
+import threading
+import time
+
+# the client reads the prompt file name at import time
+os.environ.setdefault("PROMPT_LOCAL_TXT", "speech_local.txt")
+
+from interfaces.audio_source import SyntheticSource
+from interfaces.turn_detector import TurnDetector
+from interfaces.vad_framer import VadFramer
+from util.logger import configure_logging
+from util.stats import summarize
+
+BASELINE_MS = 800
+
+# speaker profile -> pause between phrases of one turn (min, max ms)
+PROFILES = {
+    "brisk": (120, 300),
+    "average": (200, 450),
+    "hesitant": (300, 650),
+}
+
+
+def _source(turns, phrase_pause_ms, seed, pace=0):
+    # turns are separated by more than the baseline: server VAD never merges two
+    return SyntheticSource(count=turns, speech_ms=(600, 2400), pause_ms=(1500, 3000), seed=seed, pace=pace,
+                           phrases=(1, 3), phrase_pause_ms=phrase_pause_ms)
+
+
+def _vad_decisions(source):
+    framer = VadFramer()
+    return [framer.is_speech(chunk) for chunk in source._chunks()]
+
+
+def _run_detector(decisions, **kwargs):
+    events = []
+    detector = TurnDetector(lambda chunk: None, lambda kind, info: events.append((kind, info["audio_ms"])),
+                            baseline_ms=BASELINE_MS, **kwargs)
+    for speech in decisions:
+        detector.observe(speech)
+    return detector, events
+
+
+def _score(bursts, events, response_ms):
+    """Per ground-truth turn: decision delay, cut-off, first audio (model), speculative waste."""
+    ends = [ms for kind, ms in events if kind == "end_of_turn"]
+    specs = [ms for kind, ms in events if kind == "speculate"]
+    cancels = sum(1 for kind, _ in events if kind == "resumed")
+    delays, first_audio, cutoffs = {}, {}, 0
+    for i, (start, end) in enumerate(bursts):
+        if any(start < ms < end for ms in ends):
+            cutoffs += 1
+            continue
+        decided = next((ms for ms in ends if ms >= end), None)
+        if decided is None:
+            continue
+        delays[i] = decided - end
+        # speculative response requested in the same silence, before the decision
+        requested = next((ms for ms in specs if end <= ms <= decided), decided)
+        first_audio[i] = max(decided, requested + response_ms) - end
+    return {"delays": delays, "first_audio": first_audio, "cutoffs": cutoffs, "cancelled": cancels}
+
+
+def offline(args):
+    configs = {
+        "server-vad": dict(silence_ms=BASELINE_MS, min_samples=10 ** 9, speculative=False),
+        "fixed-500": dict(silence_ms=500, min_samples=10 ** 9, speculative=False),
+        "adaptive": dict(silence_ms=500, speculative=False),
+        "adaptive+spec": dict(silence_ms=500, speculative=True, lead_ms=args.lead_ms),
+    }
+    print(f"{'profile':<10}{'detector':<15}{'delay p50':>10}{'saved p50':>10}{'saved mean':>11}"
+          f"{'cut-offs':>10}{'audio p50':>10}{'audio p95':>10}{'wasted':>8}{'thresh':>8}")
+    for profile, pause_ms in PROFILES.items():
+        source = _source(args.turns, pause_ms, args.seed)
+        decisions = _vad_decisions(source)
+        baseline = None
+        for name, kwargs in configs.items():
+            detector, events = _run_detector(decisions, **kwargs)
+            r = _score(source.bursts, events, args.response_ms)
+            if baseline is None:
+                baseline = r
+            saved = [baseline["delays"][i] - d for i, d in r["delays"].items() if i in baseline["delays"]]
+            d, s, a = summarize(list(r["delays"].values())), summarize(saved), summarize(list(r["first_audio"].values()))
+            print(f"{profile:<10}{name:<15}{d['p50']:>10.0f}{s['p50']:>10.0f}{s['mean']:>11.0f}"
+                  f"{100 * r['cutoffs'] / len(source.bursts):>9.1f}%{a['p50']:>10.0f}{a['p95']:>10.0f}"
+                  f"{r['cancelled']:>8}{detector.threshold_ms:>8.0f}")
+    print(f"\nms; {args.turns} turns per profile, response.create -> first audio modelled as {args.response_ms} ms;"
+          f" wasted = speculative responses cancelled")
+
+
+# -- end to end against the stand-in ----------------------------------------
+
+class _TimedSource(SyntheticSource):
+    """Notes when its first chunk goes out: speech ends are then t0 + end_ms / pace."""
+
+    def start(self, callback):
+        self.t0 = None
+
+        def timed(chunk):
+            if self.t0 is None:
+                self.t0 = time.monotonic()
+            callback(chunk)
+        super().start(timed)
+
+
+class _PlayTimes:
+    def __init__(self):
+        self.times = []
+
+    def play_audio(self, data: bytes) -> None:
+        self.times.append(time.monotonic())
+
+    def interrupt(self, started_at=None) -> int:
+        return 0
+
+
+async def e2e(args, mode):
+    from realtime.client import RealtimeClient
+    from sim.realtime_server import RealtimeStandInServer, TurnScript
+
+    script = TurnScript(audio_vad=True, vad_silence_ms=BASELINE_MS, response_delay_ms=args.response_ms // 2,
+                        first_audio_ms=args.response_ms - args.response_ms // 2, audio_ms=600)
+    server = await RealtimeStandInServer(script=script).start()
+    source = _TimedSource(count=args.e2e_turns, speech_ms=(600, 2400), pause_ms=(1500, 3000), seed=args.seed,
+                          pace=1.0, phrases=(1, 3), phrase_pause_ms=PROFILES["average"])
+    speaker = _PlayTimes()
+    client = RealtimeClient(loop=asyncio.get_running_loop(), speaker=speaker, url=server.url, audio_source=source)
+    client.turn_detection = mode
+    threading.Thread(target=client.run, daemon=True).start()
+    while not source.finished.is_set():
+        await asyncio.sleep(0.1)
+    await asyncio.sleep(1.5)
+    stats = client.stats()
+    client.close()
+    await server.stop()
+
+    latencies = []
+    for (start, end), nxt in zip(source.bursts, source.bursts[1:] + [(float("inf"), 0)]):
+        t_end = source.t0 + end / 1000
+        t_next = source.t0 + nxt[0] / 1000
+        first = next((t for t in speaker.times if t_end <= t < t_next), None)
+        if first is not None:
+            latencies.append((first - t_end) * 1000)
+    return latencies, server, stats
+
+
+def main():
+    p = argparse.ArgumentParser(description="Client-side adaptive end-of-turn detection vs server VAD")
+    p.add_argument("--turns", type=int, default=300, help="synthetic turns per speaker profile")
+    p.add_argument("--response-ms", type=int, default=500, help="response.create -> first audio")
+    p.add_argument("--lead-ms", type=int, default=300, help="speculative response ahead of the threshold")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--e2e", action="store_true", help="also run the client against the stand-in at real time")
+    p.add_argument("--e2e-turns", type=int, default=10)
+    args = p.parse_args()
+    configure_logging(console=False, log_dir="")
+
+    offline(args)
+    if not args.e2e:
+        return
+    print(f"\n{'e2e':<10}{'turns':>7}{'answered':>10}{'audio p50':>10}{'audio p95':>10}{'cancelled':>11}")
+    for mode in ("server", "client"):
+        latencies, server, stats = asyncio.run(e2e(args, mode))
+        s = summarize(latencies)
+        print(f"{mode:<10}{args.e2e_turns:>7}{s['count']:>10}{s['p50'] or 0:>10.0f}{s['p95'] or 0:>10.0f}"
+              f"{server.responses_cancelled:>11}")
+        if "turn_detector" in stats:
+            print(f"          turn detector: {stats['turn_detector']}")
+
+
+if __name__ == "__main__":
+    main()
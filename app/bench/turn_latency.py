@@ -0,0 +1,150 @@
+"""
+End-to-end turn latency benchmark for RealtimeClient.
+
+Drives full conversation turns from the local Realtime stand-in server
+(sim/realtime_server.py) through an unmodified RealtimeClient and a recording
+fake speaker, and reports p50/p95/p99 per stage:
+
+    speech_stopped -> response.created -> first audio delta -> first speaker write
+
+Client-side times are taken when the client receives an event; the speaker
+time when `speaker.play_audio` is entered (on the websocket thread for
+synchronous backends such as interfaces/speaker.py).
+
+    cd app && python -m bench.turn_latency --turns 200 --pace 0
+    cd app && python -m bench.turn_latency --turns 200 --pace 0 --transport asyncio
+"""
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+
+# the client reads the prompt file name at import time
+os.environ.setdefault("PROMPT_LOCAL_TXT", "speech_local.txt")
+
+from realtime.client import RealtimeClient
+from sim.realtime_server import RealtimeStandInServer, add_script_args, script_from_args
+from util.logger import configure_logging
+from util.stats import summarize
+
+STAGES = [
+    ("stop->created", "speech_stopped", "created"),
+    ("created->first_delta", "created", "first_delta"),
+    ("first_delta->first_write", "first_delta", "first_write"),
+    ("stop->first_write", "speech_stopped", "first_write"),
+]
+
+
+class _BenchSpeaker:
+    """Speaker backend that records when the first chunk of each response is written."""
+
+    def __init__(self):
+        self.client = None
+        self.first_write = {}
+        self.chunks = 0
+
+    def play_audio(self, data: bytes) -> None:
+        now = time.perf_counter()
+        self.chunks += 1
+        rid = self.client._current_response_id
+        if rid is not None and rid not in self.first_write:
+            self.first_write[rid] = now
+
+    async def stop_audio(self) -> None:
+        pass
+
+
+class _TimedClient(RealtimeClient):
+    """RealtimeClient that timestamps every received event before handling it."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.recv = {"speech_stopped": [], "created": {}, "first_delta": {}}
+
+    def _on_message(self, ws, raw, *rest):
+        now = time.perf_counter()
+        ev = json.loads(raw)
+        typ = ev.get("type")
+        if typ == "input_audio_buffer.speech_stopped":
+            self.recv["speech_stopped"].append(now)
+        elif typ == "response.created":
+            self.recv["created"].setdefault(ev["response"]["id"], now)
+        elif typ == "response.audio.delta":
+            self.recv["first_delta"].setdefault(ev["response_id"], now)
+        super()._on_message(ws, raw, *rest)
+
+
+async def run_benchmark(script, transport="thread"):
+    """Run `script.turns` turns and return {stage: summary (seconds)} plus raw counts."""
+    loop = asyncio.get_running_loop()
+    server = await RealtimeStandInServer(script=script).start()
+    speaker = _BenchSpeaker()
+    client = _TimedClient(loop=loop, speaker=speaker, url=server.url, start_mic=False, transport=transport)
+    speaker.client = client
+    if transport == "asyncio":
+        asyncio.create_task(client.run_async())
+    else:
+        threading.Thread(target=client.run, daemon=True).start()
+
+    try:
+        await server.finished.wait()
+        # let the last scheduled speaker writes land
+        await asyncio.sleep(0.1)
+    finally:
+        client.close()
+        await server.stop()
+
+    samples = {name: [] for name, _, _ in STAGES}
+    delivery = []
+    for i, log in enumerate(server.turn_log):
+        rid = log.get("rid")
+        if i >= len(client.recv["speech_stopped"]):
+            break
+        t = {
+            "speech_stopped": client.recv["speech_stopped"][i],
+            "created": client.recv["created"].get(rid),
+            "first_delta": client.recv["first_delta"].get(rid),
+            "first_write": speaker.first_write.get(rid),
+        }
+        for name, a, b in STAGES:
+            if t[a] is not None and t[b] is not None:
+                samples[name].append(t[b] - t[a])
+        if t["first_delta"] is not None and "response.audio.delta" in log:
+            delivery.append(t["first_delta"] - log["response.audio.delta"])
+
+    results = {name: summarize(v) for name, v in samples.items()}
+    results["server->client (first delta)"] = summarize(delivery)
+    return results, {"turns": len(server.turn_log), "chunks_played": speaker.chunks}
+
+
+def print_report(results, info):
+    print()
+    print(f"turns={info['turns']}  chunks_played={info['chunks_played']}")
+    print(f"{'stage':<30}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, s in results.items():
+        if not s["count"]:
+            print(f"{name:<30}{0:>6}")
+            continue
+        print(f"{name:<30}{s['count']:>6}"
+              f"{s['p50'] * 1000:>10.2f}{s['p95'] * 1000:>10.2f}{s['p99'] * 1000:>10.2f}{s['max'] * 1000:>10.2f}")
+
+
+def main():
+    p = argparse.ArgumentParser(description="RealtimeClient turn latency benchmark")
+    add_script_args(p)
+    p.add_argument("--transport", choices=["thread", "asyncio"], default="thread")
+    p.add_argument("--json", dest="json_out", default=None, help="also write results to this file")
+    args = p.parse_args()
+    configure_logging(console=False, log_dir="")
+
+    results, info = asyncio.run(run_benchmark(script_from_args(args), args.transport))
+    print_report(results, info)
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump({"info": info, "stages": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+import math
+import threading
+import time
+import wave
+from pathlib import Path
+from typing import Callable, Optional
+import numpy as np
+from audio.resample import StreamingResampler
+
+TARGET_RATE = 24_000
+CHUNK_MS = 10
+SAMPLE_WIDTH = 2
+CHUNK_BYTES = TARGET_RATE * CHUNK_MS // 1000 * SAMPLE_WIDTH
+
+
+class AudioSource:
+    """
+    Input audio for RealtimeClient: 24 kHz mono PCM16 in 10 ms chunks.
+
+      open()           prepare (open a device, read a header); may block, the
+                       client calls it during warm-up
+      start(callback)  deliver chunks to `callback(chunk)` from the source's
+                       own thread; returns immediately
+      stop()
+
+    Finite sources set `finished` when they run out. This base class paces
+    the chunks of `_chunks()` at `pace` x real time (0 = as fast as
+    possible) on a schedule of absolute deadlines, so a late chunk is caught
+    up instead of shifting everything after it.
+    """
+
+    name = "source"
+
+    def __init__(self, pace=1.0):
+        self.pace = pace
+        self.finished = threading.Event()
+        self.chunks = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def open(self) -> None:
+        pass
+
+    def _chunks(self):
+        raise NotImplementedError
+
+    def start(self, callback: Callable[[bytes], None]) -> None:
+        self._thread = threading.Thread(target=self._pump, args=(callback,), name=f"audio-{self.name}", daemon=True)
+        self._thread.start()
+
+    def _pump(self, callback):
+        t0 = time.monotonic()
+        step = CHUNK_MS / 1000 / self.pace if self.pace > 0 else 0
+        n = 0
+        try:
+            for chunk in self._chunks():
+                if self._stop.is_set():
+                    break
+                callback(chunk)
+                n += 1
+                self.chunks += 1
+                if step:
+                    delay = t0 + n * step - time.monotonic()
+                    if delay > 0 and self._stop.wait(delay):
+                        break
+        finally:
+            self.finished.set()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def stats(self) -> dict:
+        return {"source": self.name, "pace": self.pace, "chunks": self.chunks,
+                "audio_s": round(self.chunks * CHUNK_MS / 1000, 2), "finished": self.finished.is_set()}
+
+
+class FileSource(AudioSource):
+    """
+    Replays a recording: a WAV file (16-bit, any rate / channel count; downmixed
+    and resampled like the mic) or raw 24 kHz mono PCM16 (.pcm / .raw).
+    Streams from disk, so hours of audio don't have to fit in memory.
+    `repeat` plays the file that many times back to back.
+    """
+
+    name = "file"
+
+    def __init__(self, path, pace=1.0, repeat=1, resample_quality="medium"):
+        super().__init__(pace)
+        self.path = Path(path)
+        self.repeat = repeat
+        self.resample_quality = resample_quality
+        self._wav = self.path.suffix.lower() == ".wav"
+
+    def open(self) -> None:
+        if not self.path.is_file():
+            raise FileNotFoundError(self.path)
+        if self._wav:
+            with wave.open(str(self.path), "rb") as wav:
+                if wav.getsampwidth() != SAMPLE_WIDTH:
+                    raise ValueError(f"{self.path}: expected 16-bit samples")
+
+    def _read_chunks(self):
+        if not self._wav:
+            with open(self.path, "rb") as f:
+                while True:
+                    chunk = f.read(CHUNK_BYTES)
+                    if len(chunk) < CHUNK_BYTES:
+                        if chunk:
+                            yield chunk + bytes(CHUNK_BYTES - len(chunk))
+                        return
+                    yield chunk
+        with wave.open(str(self.path), "rb") as wav:
+            rate, channels = wav.getframerate(), wav.getnchannels()
+            resampler = None
+            if rate != TARGET_RATE or channels != 1:
+                resampler = StreamingResampler(rate, TARGET_RATE, channels=channels, quality=self.resample_quality)
+            frames = rate * CHUNK_MS // 1000
+            pending = bytearray()
+            while True:
+                raw = wav.readframes(frames)
+                if not raw:
+                    break
+                pending += resampler.process(raw) if resampler else raw
+                while len(pending) >= CHUNK_BYTES:
+                    yield bytes(pending[:CHUNK_BYTES])
+                    del pending[:CHUNK_BYTES]
+            if pending:
+                yield bytes(pending) + bytes(CHUNK_BYTES - len(pending))
+
+    def _chunks(self):
+        for _ in range(self.repeat):
+            yield from self._read_chunks()
+
+
+class SyntheticSource(AudioSource):
+    """
+    Speech-like bursts separated by silence, for load and regression tests
+    without recordings: a voiced harmonic signal (random pitch per burst)
+    with a ~4 Hz syllable envelope, over a low noise floor.
+
+    Burst and pause lengths are drawn uniformly from `speech_ms` / `pause_ms`
+    (min, max); the sequence is reproducible for a given `seed`. `bursts`
+    lists the scheduled (start_ms, end_ms) of every burst in audio time, as
+    ground truth for VAD / turn counts.
+
+    With `phrases` = (min, max) > 1 a burst is a turn of several phrases with
+    `phrase_pause_ms` pauses between them (hesitations a turn detector must
+    not end the turn on); `segments` lists the voiced parts.
+    """
+
+    name = "synthetic"
+
+    def __init__(self, count=10, speech_ms=(800, 2500), pause_ms=(1000, 3000), pace=1.0, seed=0,
+                 level=0.3, noise=0.002, lead_ms=500, phrases=(1, 1), phrase_pause_ms=(150, 450)):
+        super().__init__(pace)
+        self.count = count
+        self.level = level
+        self.noise = noise
+        self._rng = np.random.default_rng(seed)
+        self.bursts = []
+        self.segments = []
+        t = lead_ms
+        for _ in range(count):
+            speech = self._rng.uniform(*speech_ms)
+            n = int(self._rng.integers(phrases[0], phrases[1] + 1)) if phrases[1] > 1 else 1
+            start = t
+            for k in range(n):
+                if k:
+                    t += self._rng.uniform(*phrase_pause_ms)
+                self.segments.append((t, t + speech / n))
+                t += speech / n
+            self.bursts.append((start, t))
+            t += self._rng.uniform(*pause_ms)
+        self.duration_ms = t
+
+    def _chunks(self):
+        n = TARGET_RATE * CHUNK_MS // 1000
+        harmonics = np.arange(1, 9)[:, None]
+        amps = 1.0 / harmonics
+        phase = 0.0
+        f0 = 150.0
+        total = math.ceil(self.duration_ms / CHUNK_MS)
+        bursts = iter(self.segments)
+        burst = next(bursts, None)
+        for k in range(total):
+            t_ms = k * CHUNK_MS
+            while burst is not None and t_ms >= burst[1]:
+                burst = next(bursts, None)
+                f0 = self._rng.uniform(100, 240)
+            out = self._rng.normal(0.0, self.noise, n)
+            if burst is not None and t_ms >= burst[0]:
+                t = (np.arange(n) + k * n) / TARGET_RATE
+                inst = phase + 2 * np.pi * f0 * np.arange(1, n + 1) / TARGET_RATE
+                voiced = (amps * np.sin(harmonics * inst)).sum(axis=0) / amps.sum()
+                envelope = 0.35 + 0.65 * np.sin(np.pi * 4 * (t - burst[0] / 1000)) ** 2
+                out += self.level * envelope * voiced
+                phase = inst[-1] % (2 * np.pi)
+            yield (np.clip(out, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+
+
+def tee(callback: Callable[[bytes], None], record: Optional[Callable[[bytes], None]]):
+    """`callback` followed by `record` (e.g. SessionRecorder.user_audio) for every chunk."""
+    if record is None:
+        return callback
+
+    def both(chunk):
+        callback(chunk)
+        record(chunk)
+    return both
@@ -0,0 +1,136 @@
+import asyncio
+import hmac
+import ipaddress
+import threading
+import time
+from typing import Optional
+import uvicorn
+from fastapi import Depends, FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from util.command_bus import CommandError
+
+
+class SayRequest(BaseModel):
+    text: Optional[str] = None
+
+
+class MicRequest(BaseModel):
+    muted: bool = True
+
+
+def create_control_app(bus, token=None) -> FastAPI:
+    """
+    Local control API for external systems (robot controllers, dashboards).
+    Every request becomes a CommandBus command that runs on the main loop
+    right away; the HTTP server itself runs on its own thread.
+
+      POST /say {"text": ...}   POST /interrupt   POST /mic {"muted": true}
+      GET  /status              POST /shutdown    POST /profile
+      WS   /ws                  {"id": 1, "cmd": "say", "text": "..."} ->
+                                {"id": 1, "ok": true, "result": ..., "ms": ...}
+
+    The WebSocket keeps one connection open, for the lowest latency per
+    command. With `token`, requests need "Authorization: Bearer <token>"
+    (WebSocket: also `?token=<token>`).
+    """
+    app = FastAPI(title="voice agent control")
+
+    def authorized(header, query=None):
+        if not token:
+            return True
+        supplied = query or (header[7:] if header and header.startswith("Bearer ") else "")
+        return hmac.compare_digest(supplied.encode(), token.encode())
+
+    def check_token(request: Request):
+        if not authorized(request.headers.get("authorization")):
+            raise HTTPException(status_code=401, detail="missing or wrong token")
+
+    async def run(name, **args):
+        # same reply shape as the WebSocket: {"ok": false, "error": ...} on failure
+        t0 = time.perf_counter()
+        try:
+            result = await asyncio.wrap_future(bus.submit(name, **args))
+        except CommandError as e:
+            return JSONResponse({"ok": False, "error": str(e), "ms": round((time.perf_counter() - t0) * 1000, 3)},
+                                status_code=400)
+        except Exception as e:
+            return JSONResponse({"ok": False, "error": f"{type(e).__name__}: {e}",
+                                 "ms": round((time.perf_counter() - t0) * 1000, 3)}, status_code=500)
+        return {"ok": True, "result": result, "ms": round((time.perf_counter() - t0) * 1000, 3)}
+
+    @app.post("/say", dependencies=[Depends(check_token)])
+    async def say(req: SayRequest):
+        return await run("say", text=req.text)
+
+    @app.post("/interrupt", dependencies=[Depends(check_token)])
+    async def interrupt():
+        return await run("interrupt")
+
+    @app.post("/mic", dependencies=[Depends(check_token)])
+    async def mic(req: MicRequest):
+        return await run("mute", muted=req.muted)
+
+    @app.get("/status", dependencies=[Depends(check_token)])
+    async def status():
+        return await run("status")
+
+    @app.post("/shutdown", dependencies=[Depends(check_token)])
+    async def shutdown():
+        return await run("shutdown")
+
+    @app.post("/profile", dependencies=[Depends(check_token)])
+    async def profile():
+        return await run("profile")
+
+    @app.websocket("/ws")
+    async def commands(ws: WebSocket):
+        if not authorized(ws.headers.get("authorization"), ws.query_params.get("token")):
+            await ws.close(code=4401)
+            return
+        await ws.accept()
+        try:
+            while True:
+                msg = await ws.receive_json()
+                reply = {"id": msg.pop("id", None)} if isinstance(msg, dict) else {"id": None}
+                t0 = time.perf_counter()
+                try:
+                    if not isinstance(msg, dict) or "cmd" not in msg:
+                        raise CommandError('expected {"cmd": ..., ...}')
+                    name = msg.pop("cmd")
+                    reply["result"] = await asyncio.wrap_future(bus.submit(name, **msg))
+                    reply["ok"] = True
+                except CommandError as e:
+                    reply.update(ok=False, error=str(e))
+                except Exception as e:
+                    reply.update(ok=False, error=f"{type(e).__name__}: {e}")
+                reply["ms"] = round((time.perf_counter() - t0) * 1000, 3)
+                await ws.send_json(reply)
+        except WebSocketDisconnect:
+            pass
+
+    return app
+
+
+def _is_loopback(host) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def start_control_server(bus, host="127.0.0.1", port=9200, token=None):
+    """
+    Serve the control API on a daemon thread, off the audio event loop.
+    Anyone who reaches it can shut the agent down: binding anything but
+    loopback without a `token` is refused (ValueError).
+    """
+    if not token and not _is_loopback(host):
+        raise ValueError(f"control API on {host} needs a token (CONTROL_TOKEN), or bind it to 127.0.0.1")
+    config = uvicorn.Config(create_control_app(bus, token), host=host, port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, name="control-http", daemon=True).start()
+    print(f"[Control] serving on http://{host}:{port} (ws://{host}:{port}/ws)")
+    return server
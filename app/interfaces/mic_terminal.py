@@ -1,82 +1,131 @@
-import time, wave, audioop, pyaudio
+import time, pyaudio
 from pathlib import Path
 from typing import Callable, Optional
+from audio.resample import StreamingResampler
+from audio.recorder import SessionRecorder
+from interfaces import portaudio
+from interfaces.audio_source import AudioSource, TARGET_RATE, CHUNK_MS
+from util.runtime_monitor import BlockTimer
 
-TARGET_RATE   = 24_000
-CHUNK_MS      = 10
-SAMPLE_WIDTH  = 2
 FORMAT        = pyaudio.paInt16
 CHANNELS_REQ  = 1
 
-def stream_audio(
-        callback: Callable[[bytes], None],
-        device_index: Optional[int] = None,
-        save_to: Optional[str or Path] = None
-) -> None:
-    pa = pyaudio.PyAudio()
-
-    print("[Mic] available devices:")
-    for i in range(pa.get_device_count()):
-        info = pa.get_device_info_by_index(i)
-        if info["maxInputChannels"] > 0:
-            print(f"  {i}: {info['name']} ({int(info['defaultSampleRate'])} Hz, {info['maxInputChannels']} ch)")
-
-    if device_index is None:
-        device_index = pa.get_default_input_device_info()["index"]
-
-    info       = pa.get_device_info_by_index(device_index)
-    src_rate   = int(info["defaultSampleRate"])
-    src_ch     = max(1, info["maxInputChannels"])
-    frames     = int(src_rate * CHUNK_MS / 1000)
-
-    try:
-        stream = pa.open(format=FORMAT, channels=CHANNELS_REQ,
-                         rate=src_rate, input=True,
-                         input_device_index=device_index,
-                         frames_per_buffer=frames)
-    except IOError:
-        stream = pa.open(format=FORMAT, channels=src_ch,
-                         rate=src_rate, input=True,
-                         input_device_index=device_index,
-                         frames_per_buffer=frames)
-
-    print(f"[Mic] selected {device_index}: {info['name']}  rate={src_rate} Hz, channels={stream._channels}")
-
-    wav: Optional[wave.Wave_write] = None
-    if save_to is not None:
-        path = Path(save_to)
-        if path.is_dir() or save_to in ("", "."):
-            ts   = time.strftime("%Y%m%d_%H%M%S")
-            path = Path(path, f"mic_{ts}.wav")
-        path.parent.mkdir(parents=True, exist_ok=True)
-        wav = wave.open(str(path), "wb")
-        wav.setnchannels(1)
-        wav.setsampwidth(SAMPLE_WIDTH)
-        wav.setframerate(TARGET_RATE)
-        print(f"[Rec] writing input to {path}")
-
-    try:
-        while True:
-            raw = stream.read(frames, exception_on_overflow=False)
-            if stream._channels > 1:
-                raw = audioop.tomono(raw, SAMPLE_WIDTH, 0.5, 0.5)
-            if src_rate != TARGET_RATE:
-                raw, _ = audioop.ratecv(raw, SAMPLE_WIDTH, 1,
-                                        src_rate, TARGET_RATE, None)
-            callback(raw)
-            if wav:
-                wav.writeframes(raw)
-    finally:
-        stream.stop_stream()
-        stream.close()
-        pa.terminate()
-        if wav:
-            wav.close()
-            print("[Rec] file closed")
+
+class MicSource(AudioSource):
+    """
+    Microphone input: PyAudio stream in callback mode. PortAudio calls back
+    every CHUNK_MS with the device's native rate / channel count; the chunk
+    is downmixed and resampled to TARGET_RATE right there and handed on, so
+    `callback` must not block (AudioUplink.push, VadGate don't). `stats()`
+    has the time spent per callback and the largest gap between callbacks
+    (a stalled capture).
+    """
+
+    name = "mic"
+
+    def __init__(self, device_index: Optional[int] = None, resample_quality: str = "medium"):
+        super().__init__(pace=1.0)
+        self.device_index = device_index
+        self.resample_quality = resample_quality
+        self._pa = None
+        self._stream = None
+        self._resampler = None
+        self._callback = None
+        self.overflows = 0
+        self._callback_timer = BlockTimer()
+
+    def open(self) -> None:
+        self._pa = portaudio.acquire()
+        try:
+            self._open_stream()
+        except Exception:
+            # no stream, no reference: stop() only releases for an open stream
+            self._pa = None
+            portaudio.release()
+            raise
+
+    def _open_stream(self):
+        devices = portaudio.devices()
+
+        print("[Mic] available devices:")
+        for info in devices:
+            if info["maxInputChannels"] > 0:
+                print(f"  {info['index']}: {info['name']} ({int(info['defaultSampleRate'])} Hz, {info['maxInputChannels']} ch)")
+
+        device_index = self.device_index
+        if device_index is None:
+            device_index = portaudio.default_input_index()
+
+        info       = devices[device_index]
+        src_rate   = int(info["defaultSampleRate"])
+        src_ch     = max(1, info["maxInputChannels"])
+        frames     = int(src_rate * CHUNK_MS / 1000)
+
+        # opened stopped: capture starts with start()
+        with portaudio.open_lock:
+            try:
+                stream = self._pa.open(format=FORMAT, channels=CHANNELS_REQ,
+                                       rate=src_rate, input=True,
+                                       input_device_index=device_index,
+                                       frames_per_buffer=frames, start=False,
+                                       stream_callback=self._on_audio)
+            except IOError:
+                stream = self._pa.open(format=FORMAT, channels=src_ch,
+                                       rate=src_rate, input=True,
+                                       input_device_index=device_index,
+                                       frames_per_buffer=frames, start=False,
+                                       stream_callback=self._on_audio)
+        self._stream = stream
+
+        print(f"[Mic] selected {device_index}: {info['name']}  rate={src_rate} Hz, channels={stream._channels}")
+
+        # downmix + resample to TARGET_RATE, filter state carried across chunks
+        self._resampler = StreamingResampler(src_rate, TARGET_RATE, channels=stream._channels,
+                                             quality=self.resample_quality)
+
+    def _on_audio(self, in_data, frame_count, time_info, status):
+        t0 = time.perf_counter()
+        self._callback_timer.tick(t0)
+        if status & pyaudio.paInputOverflow:
+            self.overflows += 1
+        if self._callback is not None and in_data:
+            self._callback(self._resampler.process(in_data))
+            self.chunks += 1
+        self._callback_timer.observe(time.perf_counter() - t0)
+        return (None, pyaudio.paContinue)
+
+    def start(self, callback: Callable[[bytes], None]) -> None:
+        if self._stream is None:
+            self.open()
+        self._callback = callback
+        self._stream.start_stream()
+
+    def stop(self) -> None:
+        self._callback = None
+        if self._stream is not None:
+            try:
+                if self._stream.is_active():
+                    self._stream.stop_stream()
+                self._stream.close()
+            except Exception:
+                pass
+            self._stream = None
+            portaudio.release()
+        self.finished.set()
+
+    def stats(self) -> dict:
+        return {**super().stats(), "overflows": self.overflows, "callback": self._callback_timer.stats()}
+
+
+def user_recorder(save_to) -> SessionRecorder:
+    """Recorder for the user uplink only: `save_to` is a .wav path or a directory."""
+    path = Path(save_to)
+    if path.is_dir() or str(save_to) in ("", "."):
+        ts   = time.strftime("%Y%m%d_%H%M%S")
+        path = Path(path, f"mic_{ts}.wav")
+    return SessionRecorder(path.parent, user_file=path, record_agent=False)
+
 
 def list_devices() -> None:
-    pa = pyaudio.PyAudio()
-    for i in range(pa.get_device_count()):
-        info = pa.get_device_info_by_index(i)
-        print(f"{i}: {info['name']}  (inputs={info['maxInputChannels']}, rate={info['defaultSampleRate']})")
-    pa.terminate()
+    for info in portaudio.devices():
+        print(f"{info['index']}: {info['name']}  (inputs={info['maxInputChannels']}, rate={info['defaultSampleRate']})")
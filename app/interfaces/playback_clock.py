@@ -0,0 +1,114 @@
+import threading
+from collections import deque
+from util.lru import LruDict
+
+
+class PlaybackClock:
+    """
+    Byte-exact playback position of agent audio per conversation item.
+
+    The speaker reports what it accepted (`wrote(item_id, n)`, in order) and
+    what actually went out to the device / robot (`played(n)`). Written audio
+    is kept as a FIFO of (item, bytes) segments, so every played byte is
+    attributed to the item it came from.
+
+    `flush()` (barge-in) drops the unplayed rest. An item is finished when a
+    different item starts playing or on flush; `on_item_done(item_id,
+    played_ms, written_ms)` is then called once for it (from the thread that
+    called played/flush).
+    """
+
+    def __init__(self, bytes_per_ms, on_item_done=None):
+        self._bytes_per_ms = bytes_per_ms
+        self.on_item_done = on_item_done
+        self._lock = threading.Lock()
+        self._segments = deque()            # [item_id, bytes not played yet]
+        self._items = LruDict(maxsize=16)   # item_id -> [written, played, done]
+        self._current = None
+
+    def wrote(self, item_id, n):
+        if not n:
+            return
+        with self._lock:
+            seg = self._segments[-1] if self._segments else None
+            if seg is not None and seg[0] == item_id:
+                seg[1] += n
+            else:
+                self._segments.append([item_id, n])
+            entry = self._items.get(item_id)
+            if entry is None:
+                self._items[item_id] = [n, 0, False]
+            else:
+                entry[0] += n
+
+    def unwrite(self, n):
+        """Take back the last `n` written bytes (the speaker could not queue them)."""
+        with self._lock:
+            while n and self._segments:
+                seg = self._segments[-1]
+                k = min(n, seg[1])
+                seg[1] -= k
+                n -= k
+                entry = self._items.get(seg[0])
+                if entry is not None:
+                    entry[0] -= k
+                if not seg[1]:
+                    self._segments.pop()
+
+    def played(self, n):
+        done = []
+        with self._lock:
+            while n and self._segments:
+                seg = self._segments[0]
+                if seg[0] != self._current:
+                    self._finish(self._current, done)
+                    self._current = seg[0]
+                k = min(n, seg[1])
+                seg[1] -= k
+                n -= k
+                entry = self._items.get(seg[0])
+                if entry is not None:
+                    entry[1] += k
+                if not seg[1]:
+                    self._segments.popleft()
+        self._emit(done)
+
+    def flush(self):
+        """Drop everything not played yet; returns the position of the interrupted item."""
+        done = []
+        with self._lock:
+            if self._current is None and self._segments:
+                self._current = self._segments[0][0]
+            for item_id, _ in self._segments:
+                self._finish(item_id, done)
+            self._segments.clear()
+            self._finish(self._current, done)
+            pos = self._position()
+        self._emit(done)
+        return pos
+
+    def position(self):
+        """(item_id, played_ms, written_ms) of the item playing now (or last played)."""
+        with self._lock:
+            return self._position()
+
+    def _position(self):
+        item_id = self._current
+        if item_id is None and self._segments:
+            item_id = self._segments[0][0]
+        entry = self._items.get(item_id)
+        if entry is None:
+            return None, 0.0, 0.0
+        return item_id, entry[1] / self._bytes_per_ms, entry[0] / self._bytes_per_ms
+
+    def _finish(self, item_id, done):
+        entry = self._items.get(item_id)
+        if entry is not None and not entry[2]:
+            entry[2] = True
+            done.append((item_id, entry[1] / self._bytes_per_ms, entry[0] / self._bytes_per_ms))
+
+    def _emit(self, done):
+        if self.on_item_done:
+            for item_id, played_ms, written_ms in done:
+                if item_id is not None:
+                    self.on_item_done(item_id, played_ms, written_ms)
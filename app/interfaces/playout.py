@@ -0,0 +1,179 @@
+import threading
+import time
+
+
+class PlayoutBuffer:
+    """
+    Ring buffer between the realtime client (producer) and the PyAudio output
+    callback (consumer).
+
+    `write` never blocks on the device: it copies into the ring and returns.
+    The ring starts at `initial_bytes` and doubles when a write does not fit
+    (responses arrive faster than real time), up to `capacity_bytes`; only
+    beyond that is audio dropped. Growing happens on the producer side.
+    `read` is called from the PortAudio callback thread and always returns
+    exactly `nbytes`, padding with silence when nothing is queued.
+
+    Playback of a burst only starts once `target_ms` of audio is queued (or the
+    first chunk has waited `target_ms`), which absorbs arrival jitter. The
+    target adapts between `min_ms` and `max_ms`: it follows the measured
+    inter-arrival jitter, is raised on every underrun and slowly decays back
+    after underrun-free playback.
+    """
+
+    def __init__(self, capacity_bytes, bytes_per_ms, target_ms=60, min_ms=20, max_ms=300, initial_bytes=None):
+        self._max_cap = capacity_bytes
+        self._cap = min(capacity_bytes, initial_bytes or capacity_bytes)
+        self._buf = bytearray(self._cap)
+        self._bytes_per_ms = bytes_per_ms
+        self._r = 0
+        self._size = 0
+        self._lock = threading.Lock()
+
+        self.base_target_ms = target_ms
+        self.target_ms = float(target_ms)
+        self.min_ms = min_ms
+        self.max_ms = max_ms
+        self.jitter_ms = 0.0
+
+        self.playing = False
+        self._prime_since = None
+        self._dry_at = None
+        self._last_arrival = None
+        self._last_dur_ms = 0.0
+        self._stable_since = None
+
+        self.underruns = 0
+        self.overruns = 0
+        self.dropped_bytes = 0
+        self.played_bytes = 0
+
+    # -- producer ------------------------------------------------------------
+
+    def write(self, data) -> int:
+        """Queue PCM bytes. Returns the number of bytes accepted (rest counts as overrun)."""
+        now = time.monotonic()
+        n = len(data)
+        with self._lock:
+            self._track_arrival(now, n)
+
+            free = self._cap - self._size
+            if n > free and self._cap < self._max_cap:
+                self._grow(self._size + n)
+                free = self._cap - self._size
+            if n > free:
+                self.overruns += 1
+                self.dropped_bytes += n - free
+                n = free
+            if n:
+                src = memoryview(data)
+                w = (self._r + self._size) % self._cap
+                first = min(n, self._cap - w)
+                self._buf[w:w + first] = src[:first]
+                if n > first:
+                    self._buf[:n - first] = src[first:n]
+                self._size += n
+                if not self.playing and self._prime_since is None:
+                    self._prime_since = now
+            return n
+
+    def _grow(self, need):
+        # caller holds _lock; the queued bytes move to the start of the new ring
+        cap = self._cap
+        while cap < need:
+            cap *= 2
+        cap = min(cap, self._max_cap)
+        buf = bytearray(cap)
+        end = self._r + self._size
+        if end <= self._cap:
+            buf[:self._size] = self._buf[self._r:end]
+        else:
+            first = self._cap - self._r
+            buf[:first] = self._buf[self._r:]
+            buf[first:self._size] = self._buf[:end - self._cap]
+        self._buf = buf
+        self._cap = cap
+        self._r = 0
+
+    def _track_arrival(self, now, n):
+        # running dry and receiving more audio shortly after = underrun,
+        # a longer pause is just the end of an utterance
+        if self._dry_at is not None:
+            if (now - self._dry_at) * 1000 < self.max_ms:
+                self.underruns += 1
+                self.target_ms = min(self.max_ms, self.target_ms + 20)
+                self._stable_since = None
+            self._dry_at = None
+
+        # RFC 3550 style inter-arrival jitter, reset on pauses
+        if self._last_arrival is not None and (now - self._last_arrival) < 1.0:
+            d = (now - self._last_arrival) * 1000 - self._last_dur_ms
+            self.jitter_ms += (abs(d) - self.jitter_ms) / 16
+        self._last_arrival = now
+        self._last_dur_ms = n / self._bytes_per_ms
+
+        if self._stable_since is None:
+            self._stable_since = now
+        elif now - self._stable_since > 5.0:
+            # decay towards the configured target after 5 s without underruns
+            self.target_ms = max(self.base_target_ms, self.target_ms - 10)
+            self._stable_since = now
+        self.target_ms = min(self.max_ms, max(self.min_ms, self.target_ms, 2 * self.jitter_ms))
+
+    # -- consumer (PortAudio callback thread) -------------------------------
+
+    def read(self, nbytes) -> bytes:
+        with self._lock:
+            if not self.playing:
+                if self._size == 0:
+                    return bytes(nbytes)
+                waited_ms = (time.monotonic() - self._prime_since) * 1000
+                if self._size < self.target_ms * self._bytes_per_ms and waited_ms < self.target_ms:
+                    return bytes(nbytes)
+                self.playing = True
+
+            n = min(nbytes, self._size)
+            end = self._r + n
+            if end <= self._cap:
+                out = bytes(self._buf[self._r:end])
+            else:
+                out = bytes(self._buf[self._r:]) + bytes(self._buf[:end - self._cap])
+            self._r = end % self._cap
+            self._size -= n
+            self.played_bytes += n
+
+            if n < nbytes:
+                self.playing = False
+                self._prime_since = None
+                self._dry_at = time.monotonic()
+                out += bytes(nbytes - n)
+            return out
+
+    # -- control -------------------------------------------------------------
+
+    def clear(self) -> int:
+        """Discard everything queued. Returns the number of bytes discarded."""
+        with self._lock:
+            n = self._size
+            self._r = 0
+            self._size = 0
+            self.playing = False
+            self._prime_since = None
+            self._dry_at = None
+            self._last_arrival = None
+            return n
+
+    def depth_ms(self) -> float:
+        return self._size / self._bytes_per_ms
+
+    def stats(self) -> dict:
+        return {
+            "depth_ms": round(self.depth_ms(), 1),
+            "target_ms": round(self.target_ms, 1),
+            "jitter_ms": round(self.jitter_ms, 1),
+            "underruns": self.underruns,
+            "overruns": self.overruns,
+            "dropped_bytes": self.dropped_bytes,
+            "played_bytes": self.played_bytes,
+            "capacity_ms": round(self._cap / self._bytes_per_ms),
+        }
@@ -0,0 +1,62 @@
+import threading
+import pyaudio
+
+# One PortAudio instance per process, shared by the mic and all speakers.
+# Initializing PortAudio scans every host API and device (hundreds of ms with
+# ALSA/JACK), so it happens once, on first use. The device list is cached for
+# the life of the process, across PortAudio restarts (e.g. a mic reopen).
+# PortAudio is not thread-safe for opening streams: callers hold `open_lock`
+# around pa.open().
+
+_pa = None
+_pa_users = 0
+_lock = threading.Lock()
+_devices = None
+
+open_lock = threading.Lock()
+
+
+def acquire():
+    global _pa, _pa_users
+    with _lock:
+        if _pa is None:
+            _pa = pyaudio.PyAudio()
+        _pa_users += 1
+        return _pa
+
+
+def release():
+    global _pa, _pa_users
+    with _lock:
+        _pa_users -= 1
+        if _pa_users <= 0 and _pa is not None:
+            try:
+                _pa.terminate()
+            except Exception:
+                pass
+            _pa = None
+            _pa_users = 0
+
+
+def devices():
+    """Device infos (dicts as returned by PyAudio), enumerated once per process."""
+    global _devices
+    with _lock:
+        if _devices is not None:
+            return _devices
+    pa = acquire()
+    try:
+        with _lock:
+            if _devices is None:
+                _devices = [pa.get_device_info_by_index(i) for i in range(pa.get_device_count())]
+            return _devices
+    finally:
+        release()
+
+
+def default_input_index():
+    pa = acquire()
+    try:
+        return pa.get_default_input_device_info()["index"]
+    finally:
+        release()
@@ -1,127 +1,214 @@
 import asyncio
+import os
+from collections import deque
 import pyaudio
 import time
 import threading
+from interfaces import portaudio
+from interfaces.playout import PlayoutBuffer
+from interfaces.playback_clock import PlaybackClock
 from util.logger import log_event
+from util.runtime_monitor import BlockTimer
+from util.stats import summarize
 
 _SAMPLE_RATE = 24000
 _CHUNK = 240
-
-_pa = pyaudio.PyAudio()
-_stream = None
-
-_lock = None
-_write_lock = None
-_loop = None
-_gen = 0
-
-_visualizer = None
-
-_last_audio_time = 0.0
-_speaking_active = False
-
-async def _ensure_loop_locks():
-    global _lock, _write_lock, _loop
-    loop = asyncio.get_running_loop()
-    if _loop is not loop:
-        _lock = asyncio.Lock()
-        _write_lock = asyncio.Lock()
-        _loop = loop
-
-def _open_stream():
-    return _pa.open(
-        format=pyaudio.paInt16,
-        channels=1,
-        rate=_SAMPLE_RATE,
-        output=True,
-        frames_per_buffer=_CHUNK
-    )
-
-async def _ensure_stream():
-    global _stream
-    if _stream is None:
-        _stream = _open_stream()
-
-async def play_audio(data: bytes) -> None:
-    global _stream, _gen, _last_audio_time, _speaking_active
-    await _ensure_loop_locks()
-    local_gen = _gen
-
-    async with _lock:
-        await _ensure_stream()
-
-    if local_gen != _gen:
-        return
-
-    async with _write_lock:
-        if local_gen != _gen:
-            return
-        loop = asyncio.get_running_loop()
-        try:
-            await loop.run_in_executor(None, _stream.write, data)
-            _last_audio_time = time.time()
-            if not _speaking_active:
-                _speaking_active = True
-                if _visualizer:
-                    _visualizer.start_speaking()
-        except Exception:
-            return
-
-# monitor SYSTEM output silence
-async def _monitor_silence():
-    global _last_audio_time, _speaking_active
-    while True:
-        await asyncio.sleep(0.2)
-        if _speaking_active and (time.time() - _last_audio_time > 0.6):
-            _speaking_active = False
-            if _visualizer:
-                _visualizer.stop_speaking()
-
-async def stop_audio() -> None:
-    global _stream, _gen
-    await _ensure_loop_locks()
-
-    async with _lock:
-        _gen += 1
-        async with _write_lock:
-            if _stream is not None:
-                try:
-                    if _stream.is_active():
-                        _stream.stop_stream()
-                except Exception:
-                    pass
-                try:
-                    _stream.close()
-                except Exception:
-                    pass
-                _stream = None
-            _stream = _open_stream()
-    log_event("audio", "", "flushed")
-
-async def close() -> None:
-    global _stream
-    await _ensure_loop_locks()
-    async with _lock:
-        async with _write_lock:
-            if _stream is not None:
-                try:
-                    if _stream.is_active():
-                        _stream.stop_stream()
-                except Exception:
-                    pass
-                try:
-                    _stream.close()
-                except Exception:
-                    pass
-                _stream = None
+_BYTES_PER_MS = _SAMPLE_RATE * 2 // 1000
+
+# jitter buffer config (.env)
+_TARGET_MS = int(os.getenv("SPEAKER_TARGET_MS", "60"))
+_MIN_MS = int(os.getenv("SPEAKER_MIN_MS", "20"))
+_MAX_MS = int(os.getenv("SPEAKER_MAX_MS", "300"))
+_BUFFER_S = int(os.getenv("SPEAKER_BUFFER_S", "120"))
+
+
+class Speaker:
+    """
+    Local playback for one session: PyAudio output stream in callback mode fed
+    from a PlayoutBuffer (jitter buffer). Several speakers can live in one
+    process (one per session, e.g. on different output devices); they share
+    the PortAudio instance.
+
+    Listeners `fn(kind, value)` are called from the audio callback thread, so
+    they must be cheap:
+      "playback_start":      time.monotonic() the first block of a burst reaches the DAC
+      "interrupt_silenced":  speech start -> silence in ms
+      "item_played":         (item_id, played_ms, written_ms) once an item is finished
+
+    `stats()` includes the time spent in the audio callback and in
+    play_audio (neither may block) and the largest gap between callbacks.
+
+    The playback clock counts the bytes handed to the device per item, so the
+    position of an interrupted item is exact to within one callback block.
+    """
+
+    def __init__(self, device_index=None, target_ms=_TARGET_MS, min_ms=_MIN_MS, max_ms=_MAX_MS,
+                 buffer_s=_BUFFER_S):
+        self.device_index = device_index
+        self._pa = None
+        self._stream = None
+        # the ring starts at a few jitter-buffer depths and grows up to buffer_s
+        # for long responses: idle sessions don't hold megabytes each
+        self._buffer = PlayoutBuffer(buffer_s * 1000 * _BYTES_PER_MS, _BYTES_PER_MS,
+                                     target_ms=target_ms, min_ms=min_ms, max_ms=max_ms,
+                                     initial_bytes=4 * max(max_ms, target_ms) * _BYTES_PER_MS)
+        self._lock = threading.Lock()
+        self._device_underflows = 0
+
+        # barge-in: monotonic time of the speech start that is waiting for silence
+        self._pending_interrupt = None
+        self._interrupts = 0
+        self._interrupt_ms = deque(maxlen=256)
+
+        self._visualizer = None
+        self._listeners = []
+        self._clock = PlaybackClock(_BYTES_PER_MS, on_item_done=self._on_item_done)
+        self._callback_timer = BlockTimer()
+        self._write_timer = BlockTimer()
+
+        self._last_audio_time = 0.0
+        self._speaking_active = False
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        t0 = time.perf_counter()
+        self._callback_timer.tick(t0)
+        buf = self._buffer
+        # read the pending interrupt before the buffer: it is only set after the
+        # buffer was cleared, so this block is guaranteed to be silent
+        pending = self._pending_interrupt
+        was_playing = buf.playing
+        played_before = buf.played_bytes
+        data = buf.read(frame_count * 2)
+        if buf.played_bytes != played_before:
+            self._clock.played(buf.played_bytes - played_before)
+        if pending is not None or (buf.playing and not was_playing):
+            dac_delay = max(0.0, time_info.get("output_buffer_dac_time", 0.0) - time_info.get("current_time", 0.0))
+            now = time.monotonic()
+            if pending is not None:
+                self._pending_interrupt = None
+                ms = (now - pending + dac_delay) * 1000
+                self._interrupt_ms.append(ms)
+                for fn in self._listeners:
+                    fn("interrupt_silenced", ms)
+            else:
+                for fn in self._listeners:
+                    fn("playback_start", now + dac_delay)
+        if buf.playing:
+            self._last_audio_time = time.time()
+        if status & pyaudio.paOutputUnderflow:
+            self._device_underflows += 1
+        self._callback_timer.observe(time.perf_counter() - t0)
+        return (data, pyaudio.paContinue)
+
+    def _ensure_stream(self):
+        with self._lock:
+            if self._stream is None:
+                self._pa = self._pa or portaudio.acquire()
+                with portaudio.open_lock:
+                    self._stream = self._pa.open(
+                        format=pyaudio.paInt16,
+                        channels=1,
+                        rate=_SAMPLE_RATE,
+                        output=True,
+                        output_device_index=self.device_index,
+                        frames_per_buffer=_CHUNK,
+                        stream_callback=self._callback
+                    )
+
+    # warm-up: open the output stream before the first audio arrives (blocking,
+    # run it in an executor); otherwise the first play_audio opens it
+    def open(self) -> None:
+        self._ensure_stream()
+
+    def _close_stream(self):
+        if self._stream is not None:
             try:
-                _pa.terminate()
+                if self._stream.is_active():
+                    self._stream.stop_stream()
             except Exception:
                 pass
-
-def attach_speech_visualizer(server):
-    global _visualizer
-    _visualizer = server
-    loop = asyncio.get_event_loop()
-    loop.create_task(_monitor_silence())
-    print(f"[Audio] Speech visualizer attached ({type(server).__name__}) and silence monitor running.")
+            try:
+                self._stream.close()
+            except Exception:
+                pass
+            self._stream = None
+
+    # non-blocking, thread-safe: may be called directly from the websocket thread.
+    # `item_id` attributes the audio to a conversation item for the playback clock.
+    def play_audio(self, data: bytes, item_id=None) -> None:
+        if self._stream is None:
+            self._ensure_stream()
+        t0 = time.perf_counter()
+        # clock first: the callback may play the bytes as soon as they are queued
+        self._clock.wrote(item_id, len(data))
+        accepted = self._buffer.write(data)
+        if accepted < len(data):
+            self._clock.unwrite(len(data) - accepted)
+        self._write_timer.observe(time.perf_counter() - t0)
+
+    def _on_item_done(self, item_id, played_ms, written_ms):
+        for fn in self._listeners:
+            fn("item_played", (item_id, played_ms, written_ms))
+
+    # (item_id, played_ms, written_ms) of the item playing now, or the one an
+    # interrupt cut (its played_ms is what the user actually heard)
+    def playback_position(self):
+        return self._clock.position()
+
+    # monitor SYSTEM output silence
+    async def _monitor_silence(self):
+        while True:
+            await asyncio.sleep(0.05)
+            since_audio = time.time() - self._last_audio_time
+            if not self._speaking_active and since_audio < 0.1:
+                self._speaking_active = True
+                if self._visualizer:
+                    self._visualizer.start_speaking()
+            elif self._speaking_active and since_audio > 0.6:
+                self._speaking_active = False
+                if self._visualizer:
+                    self._visualizer.stop_speaking()
+
+    # barge-in: drop queued audio, the device stays open and the next callback
+    # block (<= one device buffer) is silent. `started_at` is the time.monotonic()
+    # of the speech start, used to measure speech start -> silence.
+    # Returns the number of queued (never played) bytes that were discarded.
+    def interrupt(self, started_at=None) -> int:
+        was_playing = self._buffer.playing
+        discarded = self._buffer.clear()
+        self._clock.flush()
+        if self._stream is not None and (was_playing or discarded):
+            self._interrupts += 1
+            self._pending_interrupt = started_at if started_at is not None else time.monotonic()
+        log_event("audio", "", "flushed")
+        return discarded
+
+    async def stop_audio(self) -> None:
+        self.interrupt()
+
+    async def close(self) -> None:
+        with self._lock:
+            self._close_stream()
+            self._buffer.clear()
+            if self._pa is not None:
+                self._pa = None
+                portaudio.release()
+
+    def add_listener(self, fn) -> None:
+        self._listeners.append(fn)
+
+    def stats(self) -> dict:
+        return {
+            **self._buffer.stats(),
+            "device_underflows": self._device_underflows,
+            "interrupts": self._interrupts,
+            "interrupt_to_silence_ms": summarize(list(self._interrupt_ms)),
+            "callback": self._callback_timer.stats(),
+            "write": self._write_timer.stats(),
+        }
+
+    def attach_speech_visualizer(self, server):
+        self._visualizer = server
+        loop = asyncio.get_event_loop()
+        loop.create_task(self._monitor_silence())
+        print(f"[Audio] Speech visualizer attached ({type(server).__name__}) and silence monitor running.")
@@ -1,66 +1,386 @@
 import asyncio
+import random
 import threading
 import websockets
 import time
 import os
-from dotenv import load_dotenv
-
-load_dotenv()
+from collections import deque
+from audio.g711 import AudioEncoder
+from interfaces.playback_clock import PlaybackClock
+from util.metrics import registry as metrics
+from util.runtime_monitor import BlockTimer
 
+# .env variables (loaded by the entry point, main.py)
 ROBOT_SPEECH_URL = os.getenv("ROBOT_SPEECH_URL")
 ROBOT_FLUSH_URL = os.getenv("ROBOT_FLUSH_URL")
+ROBOT_FLUSH_ACK_TIMEOUT_MS = int(os.getenv("ROBOT_FLUSH_ACK_TIMEOUT_MS", "300"))
+ROBOT_FRAME_MS = int(os.getenv("ROBOT_FRAME_MS", "40"))
+ROBOT_QUEUE_MS = int(os.getenv("ROBOT_QUEUE_MS", "10000"))
+ROBOT_AUDIO_FORMAT = os.getenv("ROBOT_AUDIO_FORMAT", "pcm16")     # pcm16 | g711_ulaw | g711_alaw, always 24 kHz
 
-_loop = None
-_audio_ws = None
-_connected = asyncio.Event()
-_gen = 0
+_BYTES_PER_MS = 24000 * 2 // 1000
 
-async def _connect_audio():
-    global _audio_ws
-    while True:
-        try:
-            print(f"[SpeakerRemote] Connecting to {ROBOT_SPEECH_URL} ...")
-            _audio_ws = await websockets.connect(ROBOT_SPEECH_URL, ping_interval=None, max_size=None)
-            print("[SpeakerRemote] Connected to robot audio.")
-            _connected.set()
-            await _audio_ws.wait_closed()
-            print("[SpeakerRemote] Audio connection closed.")
-        except Exception as e:
-            print(f"[SpeakerRemote] Audio connection error ({type(e).__name__}): {e}")
-            _connected.clear()
-            await asyncio.sleep(1)
-
-def _start_loop():
-    global _loop
-    _loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(_loop)
-    _loop.run_until_complete(_connect_audio())
-
-threading.Thread(target=_start_loop, daemon=True).start()
-
-def play_audio(data: bytes):
-    global _loop, _audio_ws
-    if not _loop or not _connected.is_set() or not _audio_ws:
-        return
-    async def _send():
+# robot connections of all speakers share one background loop (unless a
+# speaker is given a loop of its own, e.g. the session manager's)
+_io_loop = None
+_io_lock = threading.Lock()
+
+
+def _shared_loop():
+    global _io_loop
+    with _io_lock:
+        if _io_loop is None:
+            _io_loop = asyncio.new_event_loop()
+            threading.Thread(target=_io_loop.run_forever, name="robot-io", daemon=True).start()
+        return _io_loop
+
+
+class RemoteSpeaker:
+    """
+    Streams agent audio to one robot over websockets.
+
+      audio:    (generation, chunk) queue drained by one sender task per
+                connection. play_audio only appends; the sender is woken when
+                it went idle and coalesces queued chunks into frames of up to
+                `frame_ms`. Audio beyond `queue_ms` is dropped and counted.
+      control:  long-lived connection for FLUSH, acks are matched in order.
+                A flush that timed out may still be acked later; that late
+                ACK is skipped, not taken for the next flush's.
+
+    The robot does not report its playback position, so the playback clock
+    models it: audio sent to the robot plays out in real time from the moment
+    it is sent (the way the robot stand-in plays it). Listeners `fn(kind,
+    value)` get "item_played" events as for the local speaker.
+
+    `audio_format` g711_ulaw / g711_alaw sends 8-bit companded samples at
+    24 kHz (half the bytes of PCM16); the robot has to decode them. Queue,
+    frame and clock accounting stay in PCM16 bytes; `wire_bytes` counts the
+    encoded audio sent, as AudioUplink does.
+
+    `labels` are added to the speaker's metrics (e.g. session="robot-3").
+    """
+
+    def __init__(self, speech_url=None, flush_url=None, loop=None, ack_timeout_ms=ROBOT_FLUSH_ACK_TIMEOUT_MS,
+                 frame_ms=ROBOT_FRAME_MS, queue_ms=ROBOT_QUEUE_MS, audio_format=ROBOT_AUDIO_FORMAT, **labels):
+        self.speech_url = speech_url or ROBOT_SPEECH_URL
+        self.flush_url = flush_url or ROBOT_FLUSH_URL
+        self.ack_timeout_ms = ack_timeout_ms
+        self.labels = labels
+        self.audio_format = audio_format
+        self._encoder = AudioEncoder(audio_format, rate=24000) if audio_format != "pcm16" else None
+        self._encoder_reset = False     # set on connect / interrupt, applied by the sender
+        self._frame_bytes = frame_ms * _BYTES_PER_MS
+        self._max_queue_bytes = queue_ms * _BYTES_PER_MS
+
+        self._loop = loop
+        self._task = None
+        self._audio_ws = None
+        self._connected = threading.Event()     # read from other threads, so not an asyncio.Event
+        self._gen = 0
+
+        self._q_lock = threading.Lock()
+        self._send_q = deque()
+        self._queued_bytes = 0
+        self._sender_idle = True
+        self._wakeup = None
+        self._send_timer = BlockTimer()
+        self._send_stats = {"frames_sent": 0, "bytes_sent": 0, "wire_bytes": 0, "dropped_bytes": 0, "stale_bytes": 0,
+                            "max_queue_ms": 0.0}
+
+        self._listeners = []
+        self._clock = PlaybackClock(_BYTES_PER_MS, on_item_done=self._on_item_done)
+        self._robot_queued = 0          # modelled bytes the robot has not played yet
+        self._drained_at = time.monotonic()
+
+        self._control_ws = None
+        self._pending_acks = deque()
+        self._late_acks = 0             # timed-out flushes whose ACK may still arrive
+        self._control_reconnects = 0
+        self._flush_stats = {"flushes": 0, "acked": 0, "unacked": 0, "late_acks": 0, "oneshot": 0, "errors": 0,
+                             "last_ms": None}
+
+    # -- lifecycle -------------------------------------------------------------
+
+    # `loop` is used unless the speaker was created with one; default: the shared robot loop
+    def start(self, loop=None):
+        if self._task is not None:
+            return self
+        self._loop = self._loop or loop or _shared_loop()
         try:
-            await _audio_ws.send(data)
-        except Exception as e:
-            print(f"[SpeakerRemote] Send error: {e}")
-    asyncio.run_coroutine_threadsafe(_send(), _loop)
+            on_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            self._task = self._loop.create_task(self._run())
+        else:
+            self._task = asyncio.run_coroutine_threadsafe(self._run(), self._loop)
+        return self
+
+    async def _run(self):
+        await asyncio.gather(self._connect_audio(), self._connect_control())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._loop.call_soon_threadsafe(self._task.cancel)
+            self._task = None
+        self._connected.clear()
+        self._clear_queue()
+
+    # -- audio -----------------------------------------------------------------
+
+    def _take_frame(self):
+        # coalesce already-queued chunks of the current generation and item into
+        # one frame (never waits for more audio); stale chunks are dropped
+        with self._q_lock:
+            if not self._send_q:
+                self._sender_idle = True
+                return None, None
+            frame = bytearray()
+            item_id = None
+            while self._send_q and len(frame) < self._frame_bytes:
+                gen, chunk, item = self._send_q[0]
+                if frame and item != item_id:
+                    break
+                self._send_q.popleft()
+                self._queued_bytes -= len(chunk)
+                if gen != self._gen:
+                    self._send_stats["stale_bytes"] += len(chunk)
+                    continue
+                frame += chunk
+                item_id = item
+            return frame, item_id
+
+    def _drain_model(self):
+        # caller holds _q_lock
+        now = time.monotonic()
+        n = min(self._robot_queued, int((now - self._drained_at) * 1000 * _BYTES_PER_MS) & ~1)
+        if n < self._robot_queued:
+            self._drained_at += n / _BYTES_PER_MS / 1000
+        else:
+            self._drained_at = now
+        if n:
+            self._robot_queued -= n
+            self._clock.played(n)
+
+    def _on_item_done(self, item_id, played_ms, written_ms):
+        for fn in self._listeners:
+            fn("item_played", (item_id, played_ms, written_ms))
+
+    def add_listener(self, fn) -> None:
+        self._listeners.append(fn)
+
+    # (item_id, played_ms, written_ms) of the item playing now, or the one an interrupt cut
+    def playback_position(self):
+        with self._q_lock:
+            self._drain_model()
+            return self._clock.position()
 
-def stop_audio():
-    global _loop
+    async def _sender(self, ws):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while True:
+                frame, item_id = self._take_frame()
+                if frame is None:
+                    break
+                if frame:
+                    # awaits the socket's write buffer: a slow link backs up into the queue
+                    if self._encoder_reset:
+                        # new connection or interrupt: the frame starts a new stream
+                        self._encoder_reset = False
+                        if self._encoder:
+                            self._encoder.reset()
+                    wire = self._encoder.encode(frame) if self._encoder else bytes(frame)
+                    t0 = time.perf_counter()
+                    try:
+                        await ws.send(wire)
+                    except (websockets.ConnectionClosed, OSError) as e:
+                        # the frame is lost with the connection; _connect_audio reconnects
+                        # once it sees the close and starts a new sender
+                        self._send_stats["dropped_bytes"] += len(frame)
+                        print(f"[SpeakerRemote] Audio send failed ({type(e).__name__}), waiting for reconnect.")
+                        return
+                    self._send_timer.observe(time.perf_counter() - t0)
+                    self._send_stats["frames_sent"] += 1
+                    self._send_stats["bytes_sent"] += len(frame)
+                    self._send_stats["wire_bytes"] += len(wire)
+                    with self._q_lock:
+                        self._drain_model()
+                        self._clock.wrote(item_id, len(frame))
+                        self._robot_queued += len(frame)
 
-    async def _flush():
+    def _clear_queue(self):
+        with self._q_lock:
+            discarded = self._queued_bytes
+            self._send_q.clear()
+            self._queued_bytes = 0
+        return discarded
+
+    async def _connect_audio(self):
+        self._wakeup = asyncio.Event()
+        while True:
+            sender = None
+            try:
+                print(f"[SpeakerRemote] Connecting to {self.speech_url} ...")
+                self._audio_ws = await websockets.connect(self.speech_url, ping_interval=None, max_size=None)
+                print("[SpeakerRemote] Connected to robot audio.")
+                with self._q_lock:
+                    self._sender_idle = True
+                self._encoder_reset = True
+                sender = asyncio.create_task(self._sender(self._audio_ws))
+                self._connected.set()
+                await self._audio_ws.wait_closed()
+                print("[SpeakerRemote] Audio connection closed.")
+            except asyncio.CancelledError:
+                if self._audio_ws is not None:
+                    await self._audio_ws.close()
+                raise
+            except Exception as e:
+                print(f"[SpeakerRemote] Audio connection error ({type(e).__name__}): {e}")
+                await asyncio.sleep(1)
+            finally:
+                self._connected.clear()
+                if sender:
+                    sender.cancel()
+                # audio queued for a dead connection is stale by the time we reconnect
+                self._clear_queue()
+
+    # non-blocking, thread-safe: may be called directly from the websocket thread
+    def play_audio(self, data: bytes, item_id=None):
+        if not self._connected.is_set():
+            with self._q_lock:
+                self._send_stats["dropped_bytes"] += len(data)
+            return
+        with self._q_lock:
+            if self._queued_bytes + len(data) > self._max_queue_bytes:
+                # robot link too slow: report instead of growing without bound
+                self._send_stats["dropped_bytes"] += len(data)
+                return
+            self._send_q.append((self._gen, data, item_id))
+            self._queued_bytes += len(data)
+            queued_ms = self._queued_bytes / _BYTES_PER_MS
+            if queued_ms > self._send_stats["max_queue_ms"]:
+                self._send_stats["max_queue_ms"] = queued_ms
+            wake = self._sender_idle
+            self._sender_idle = False
+        if wake:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    # -- control -----------------------------------------------------------------
+
+    async def _connect_control(self):
+        # long-lived control connection; keepalive pings double as health check
+        # (a missing pong closes the socket and we reconnect with jittered backoff)
+        delay = 0.5
+        while True:
+            try:
+                async with websockets.connect(self.flush_url, ping_interval=5, ping_timeout=5) as ws:
+                    self._control_ws = ws
+                    # acks of flushes sent on an earlier connection never come
+                    self._late_acks = 0
+                    delay = 0.5
+                    print("[SpeakerRemote] Control channel connected.")
+                    async for msg in ws:
+                        if not (isinstance(msg, str) and msg.startswith("ACK")):
+                            continue
+                        if self._late_acks:
+                            self._late_acks -= 1
+                            self._flush_stats["late_acks"] += 1
+                        elif self._pending_acks:
+                            fut = self._pending_acks.popleft()
+                            if not fut.done():
+                                fut.set_result(time.monotonic())
+                print("[SpeakerRemote] Control channel closed.")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[SpeakerRemote] Control channel error ({type(e).__name__}): {e}")
+            finally:
+                self._control_ws = None
+                while self._pending_acks:
+                    fut = self._pending_acks.popleft()
+                    if not fut.done():
+                        fut.cancel()
+            self._control_reconnects += 1
+            metrics.inc("robot_control_reconnects_total", **self.labels)
+            await asyncio.sleep(delay * random.uniform(0.8, 1.2))
+            delay = min(delay * 2, 5.0)
+
+    async def _flush_oneshot(self):
+        async with websockets.connect(self.flush_url) as ws:
+            await ws.send("FLUSH")
+
+    async def _flush(self, started_at, persistent=True):
+        ws = self._control_ws
+        acked = "oneshot"
+        stats = self._flush_stats
         try:
-            async with websockets.connect(ROBOT_FLUSH_URL) as ws:
+            if ws is None or not persistent:
+                # control channel down: fall back to a one-shot connection
+                stats["oneshot"] += 1
+                await self._flush_oneshot()
+                done_at = time.monotonic()
+            else:
+                fut = self._loop.create_future()
+                self._pending_acks.append(fut)
                 await ws.send("FLUSH")
-                print("[SpeakerRemote] Flush sent to control port.")
+                try:
+                    done_at = await asyncio.wait_for(asyncio.shield(fut), self.ack_timeout_ms / 1000)
+                    acked = "yes"
+                    stats["acked"] += 1
+                except (asyncio.TimeoutError, asyncio.CancelledError):
+                    # robot does not (or not in time) acknowledge: latency up to the send
+                    done_at = time.monotonic()
+                    acked = "no"
+                    stats["unacked"] += 1
+                    if fut in self._pending_acks:
+                        self._pending_acks.remove(fut)
+                        self._late_acks += 1
         except Exception as e:
+            stats["errors"] += 1
             print(f"[SpeakerRemote] Flush error: {e}")
+            return None
+        latency = done_at - started_at
+        stats["flushes"] += 1
+        stats["last_ms"] = round(latency * 1000, 2)
+        metrics.observe("robot_flush_seconds", latency, acked=acked, **self.labels)
+        return latency
+
+    # barge-in flush; `started_at` (time.monotonic() of the speech start) is the
+    # reference for the flush latency metric. Returns a concurrent Future with the
+    # latency in seconds (None on error), or None if the speaker is not started.
+    def flush(self, started_at=None, persistent=True):
+        if self._task is None:
+            return None
+        started_at = started_at if started_at is not None else time.monotonic()
+        return asyncio.run_coroutine_threadsafe(self._flush(started_at, persistent), self._loop)
+
+    # Returns the bytes dropped from the local send queue; what the robot had
+    # already buffered but not played is unknown here.
+    def interrupt(self, started_at=None) -> int:
+        with self._q_lock:
+            self._gen += 1
+            # FLUSH drops whatever the robot still had queued
+            self._drain_model()
+            self._clock.flush()
+            self._robot_queued = 0
+            self._encoder_reset = True
+        discarded = self._clear_queue()
+        self.flush(started_at)
+        return discarded
 
-    if not _loop:
-        return
+    async def stop_audio(self) -> None:
+        self.interrupt()
 
-    asyncio.run_coroutine_threadsafe(_flush(), _loop)
+    def stats(self) -> dict:
+        ws = self._control_ws
+        return {
+            **self._flush_stats,
+            **self._send_stats,
+            "send": self._send_timer.stats(),
+            "queue_ms": round(self._queued_bytes / _BYTES_PER_MS, 1),
+            "audio_connected": self._connected.is_set(),
+            "control_connected": ws is not None,
+            "control_rtt_ms": round(ws.latency * 1000, 2) if ws is not None and ws.latency else None,
+            "control_reconnects": self._control_reconnects,
+        }
@@ -0,0 +1,171 @@
+import json
+from collections import deque
+from interfaces.vad_framer import VadFramer
+from util.logger import log_event
+from util.stats import percentile, summarize
+
+
+class TurnDetector:
+    """
+    Client-side end-of-turn detection on the mic stream, for
+    turn_detection = null sessions (the client commits the input buffer and
+    requests the response itself).
+
+    webrtcvad classifies every 10 ms frame. After `onset_ms` of speech a turn
+    starts; the turn ends after `threshold_ms` of silence. The threshold
+    adapts to the speaker: pauses inside turns (>= `min_pause_ms`) are kept
+    over the last `window` pauses, and once there are enough of them
+
+        threshold_ms = clamp(p90(pauses) + margin_ms, min_ms, max_ms)
+
+    so a speaker with short pauses gets a short threshold; until then
+    `silence_ms` is used. With `speculative`, `lead_ms` before the threshold a
+    "speculate" event lets the client start the response early; if speech
+    comes back before the threshold, "resumed" cancels it.
+
+    Events, `on_event(kind, info)` on the capture thread:
+
+      speech_started   turn start (barge-in); info["false_cutoff"] when the
+                       previous turn was ended early (see below)
+      speculate        silence reached the speculation point
+      resumed          speech again after "speculate", before the threshold
+      end_of_turn      silence reached the threshold
+
+    Speech resuming after "end_of_turn" within `baseline_ms` (the server VAD's
+    silence_duration_ms) is a false cutoff: server VAD would have kept it in
+    the same turn. `latency_saved_ms` is baseline_ms - threshold_ms per turn
+    that was not cut off.
+
+    Like VadGate a drop-in callable: the chunk is forwarded first, so an event
+    sent from `on_event` goes out behind the audio it refers to.
+    """
+
+    def __init__(self, callback, on_event, rate=24000, chunk_ms=10, aggressiveness=2, silence_ms=500,
+                 min_ms=250, max_ms=1200, baseline_ms=800, onset_ms=60, min_pause_ms=100, margin_ms=150,
+                 window=50, min_samples=5, speculative=True, lead_ms=300):
+        self.callback = callback
+        self.on_event = on_event
+        self.chunk_ms = chunk_ms
+        self._framer = VadFramer(rate, aggressiveness)
+        self.silence_ms = silence_ms
+        self.min_ms = min_ms
+        self.max_ms = max_ms
+        self.baseline_ms = baseline_ms
+        self.onset_ms = onset_ms
+        self.min_pause_ms = min_pause_ms
+        self.margin_ms = margin_ms
+        self.min_samples = min_samples
+        self.speculative = speculative
+        self.lead_ms = lead_ms
+        self._pauses = deque(maxlen=window)
+        self.threshold_ms = silence_ms
+
+        self._pos_ms = 0
+        self._speaking = False
+        self._speech_run = 0
+        self._silence_run = 0
+        self._speculated = False
+        self._last_end_ms = None        # audio position where the last committed turn's speech ended
+        self._saved = deque(maxlen=256)   # latency saved per turn, ms
+
+        self.turns = 0
+        self.false_cutoffs = 0
+        self.speculative_started = 0
+        self.speculative_cancelled = 0
+        self.speculative_confirmed = 0
+
+    def __call__(self, chunk: bytes) -> None:
+        self.callback(chunk)
+        self.observe(self._framer.is_speech(chunk))
+
+    def observe(self, speech: bool) -> None:
+        """One chunk's VAD decision; split from __call__ so recorded decisions can be replayed."""
+        self._pos_ms += self.chunk_ms
+        if speech:
+            self._speech_run += self.chunk_ms
+            if self._speaking:
+                self._on_resume()
+            elif self._speech_run >= self.onset_ms:
+                self._on_onset()
+            return
+
+        self._speech_run = 0
+        if not self._speaking:
+            return
+        self._silence_run += self.chunk_ms
+        if self.speculative and not self._speculated and self._silence_run >= self._speculate_at():
+            self._speculated = True
+            self.speculative_started += 1
+            self._emit("speculate")
+        if self._silence_run >= self.threshold_ms:
+            self._end_turn()
+
+    def _speculate_at(self):
+        return max(self.min_pause_ms + 50, self.threshold_ms - self.lead_ms)
+
+    def _on_resume(self):
+        # speech inside a turn: a pause (or a short dip) is over
+        if self._silence_run >= self.min_pause_ms:
+            self._add_pause(self._silence_run)
+        if self._speculated:
+            self._speculated = False
+            self.speculative_cancelled += 1
+            self._emit("resumed", pause_ms=self._silence_run)
+        self._silence_run = 0
+
+    def _on_onset(self):
+        self._speaking = True
+        self._silence_run = 0
+        start_ms = self._pos_ms - self._speech_run
+        false_cutoff = False
+        if self._last_end_ms is not None:
+            pause = start_ms - self._last_end_ms
+            if pause < self.baseline_ms:
+                # the turn was ended inside a pause server VAD would have waited out
+                false_cutoff = True
+                self.false_cutoffs += 1
+                if self._saved:
+                    self._saved.pop()
+                if pause >= self.min_pause_ms:
+                    self._add_pause(pause)
+        self._last_end_ms = None
+        self._emit("speech_started", false_cutoff=false_cutoff)
+
+    def _end_turn(self):
+        self._speaking = False
+        if self._speculated:
+            self.speculative_confirmed += 1
+        speculated, self._speculated = self._speculated, False
+        self.turns += 1
+        self._last_end_ms = self._pos_ms - self._silence_run
+        self._saved.append(self.baseline_ms - self.threshold_ms)
+        self._emit("end_of_turn", speculated=speculated)
+        self._silence_run = 0
+
+    def _add_pause(self, pause_ms):
+        self._pauses.append(pause_ms)
+        if len(self._pauses) >= self.min_samples:
+            threshold = percentile(self._pauses, 90) + self.margin_ms
+            self.threshold_ms = min(self.max_ms, max(self.min_ms, threshold))
+
+    def _emit(self, kind, **info):
+        info.update(audio_ms=self._pos_ms, threshold_ms=self.threshold_ms)
+        if kind != "speech_started" or info["false_cutoff"]:
+            log_event("mic", "turn_detector", kind, extra=json.dumps(info))
+        self.on_event(kind, info)
+
+    def false_cutoff_pct(self) -> float:
+        return 100.0 * self.false_cutoffs / self.turns if self.turns else 0.0
+
+    def stats(self) -> dict:
+        saved = summarize(list(self._saved))
+        return {
+            "turns": self.turns,
+            "threshold_ms": self.threshold_ms,
+            "pauses": len(self._pauses),
+            "false_cutoffs": self.false_cutoffs,
+            "false_cutoff_pct": round(self.false_cutoff_pct(), 1),
+            "latency_saved_ms": {"mean": saved["mean"] and round(saved["mean"], 1), "p50": saved["p50"]},
+            "speculative": {"started": self.speculative_started, "cancelled": self.speculative_cancelled,
+                            "confirmed": self.speculative_confirmed},
+        }
@@ -0,0 +1,36 @@
+import webrtcvad
+from audio.resample import StreamingResampler
+
+SAMPLE_WIDTH = 2
+VAD_RATE = 16000                  # webrtcvad supports 8/16/32/48 kHz, not 24 kHz
+VAD_FRAME_BYTES = VAD_RATE // 100 * SAMPLE_WIDTH
+
+
+class VadFramer:
+    """
+    webrtcvad on mic chunks of any size, shared by VadGate and TurnDetector.
+
+    Chunks are resampled to 16 kHz for the VAD only (filter state carried
+    across chunks) and buffered into 10 ms frames. A chunk is speech if any
+    frame completed by it is; a chunk that completes no frame repeats the
+    previous decision.
+    """
+
+    def __init__(self, rate=24000, aggressiveness=2):
+        self._vad = webrtcvad.Vad(aggressiveness)
+        self._resampler = StreamingResampler(rate, VAD_RATE, quality="fast") if rate != VAD_RATE else None
+        self._buf = bytearray()
+        self._speech = False
+
+    def is_speech(self, chunk) -> bool:
+        if self._resampler:
+            chunk = self._resampler.process(chunk)
+        self._buf += chunk
+        if len(self._buf) < VAD_FRAME_BYTES:
+            return self._speech
+        speech = False
+        while len(self._buf) >= VAD_FRAME_BYTES:
+            speech |= self._vad.is_speech(bytes(self._buf[:VAD_FRAME_BYTES]), VAD_RATE)
+            del self._buf[:VAD_FRAME_BYTES]
+        self._speech = speech
+        return speech
@@ -0,0 +1,66 @@
+import json
+from collections import deque
+from interfaces.vad_framer import VadFramer
+from util.logger import log_event
+
+
+class VadGate:
+    """
+    Client-side silence gate in front of a mic chunk callback.
+
+    Speech chunks are forwarded, silence is suppressed. When speech starts,
+    the last `preroll_ms` of suppressed audio is sent first, so server VAD sees
+    the onset (keep it >= turn_detection.prefix_padding_ms). After speech,
+    `hangover_ms` of audio keeps flowing; keep it above
+    turn_detection.silence_duration_ms, otherwise the server never sees the
+    silence that ends the user's turn.
+
+    The gate is a drop-in callable: `source.start(VadGate(send))`.
+    """
+
+    def __init__(self, callback, rate=24000, chunk_ms=10, aggressiveness=2, preroll_ms=300, hangover_ms=1000):
+        self.callback = callback
+        self.rate = rate
+        self._framer = VadFramer(rate, aggressiveness)
+        self._preroll = deque(maxlen=max(1, preroll_ms // chunk_ms))
+        self._hangover_chunks = max(0, hangover_ms // chunk_ms)
+        self._hangover_left = 0
+        self._open = False
+
+        self.frames_total = 0
+        self.frames_suppressed = 0
+
+    def __call__(self, chunk: bytes) -> None:
+        self.frames_total += 1
+
+        if self._framer.is_speech(chunk):
+            self._hangover_left = self._hangover_chunks
+            if not self._open:
+                self._open = True
+                self.frames_suppressed -= len(self._preroll)
+                while self._preroll:
+                    self.callback(self._preroll.popleft())
+            self.callback(chunk)
+            return
+
+        if self._open and self._hangover_left > 0:
+            self._hangover_left -= 1
+            self.callback(chunk)
+            return
+
+        if self._open:
+            self._open = False
+            log_event("mic", "vad_gate", "closed", extra=json.dumps({"suppressed_pct": round(self.suppressed_pct(), 1)}))
+        self.frames_suppressed += 1
+        self._preroll.append(chunk)
+
+    def suppressed_pct(self) -> float:
+        return 100.0 * self.frames_suppressed / self.frames_total if self.frames_total else 0.0
+
+    def stats(self) -> dict:
+        return {
+            "frames_total": self.frames_total,
+            "frames_suppressed": self.frames_suppressed,
+            "suppressed_pct": round(self.suppressed_pct(), 1),
+            "open": self._open,
+        }
@@ -1,65 +1,177 @@
 
+from util.startup import timer as startup
+from dotenv import load_dotenv
+
+# .env first: the modules below read their configuration at import
+load_dotenv()
+
 import asyncio
 import signal
 import threading
 from datetime import datetime
 from realtime.client import RealtimeClient
-from interfaces import speaker
+from interfaces.speaker import Speaker
+from interfaces.control_api import start_control_server
 import os
-from util.logger import log_event
+from util.command_bus import CommandBus, CommandError
+from util.logger import log_event, flush_log, log_stats
+from util.metrics import registry as metrics
+from util.metrics_server import start_metrics_server
+from util.profiler import profiler
+from util.runtime_monitor import RuntimeMonitor
+from audio.recorder import SessionRecorder
+
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = os.getenv("METRICS_PORT", "9100")
+RECORD_DIR = os.getenv("RECORD_DIR", "")
+RUNTIME_MONITOR = os.getenv("RUNTIME_MONITOR", "1") == "1"
+CONTROL_HOST = os.getenv("CONTROL_HOST", "127.0.0.1")
+CONTROL_PORT = os.getenv("CONTROL_PORT", "9200")
+CONTROL_TOKEN = os.getenv("CONTROL_TOKEN", "")
+SAY_CACHE_PREFILL_TXT = os.getenv("SAY_CACHE_PREFILL_TXT", "")
 
-STOP_EVENT = threading.Event()
-SAY_EVENT = asyncio.Event()
+CAKE_NOTICE = "Attention. There is only a limited amount of cake! Please take only one piece. Thank you!"
 
-async def keyboard_listener():
+KEYS = {"q": "shutdown", "s": "say", "i": "interrupt", "p": "profile"}
+
+async def keyboard_listener(bus, client):
     loop = asyncio.get_running_loop()
 
-    while not STOP_EVENT.is_set():
-        cmd = await loop.run_in_executor(None, input, "")
+    while not bus.stopped.is_set():
+        try:
+            cmd = await loop.run_in_executor(None, input, "")
+        except EOFError:
+            # no terminal (service): control API only
+            return
         cmd = cmd.strip().lower()
 
-        if cmd == "q":
-            STOP_EVENT.set()
+        # a failing command must not end the listener
+        try:
+            if cmd == "m":
+                await bus.call("mute", muted=not client.mic_muted)
+            elif cmd in KEYS:
+                await bus.call(KEYS[cmd])
+        except CommandError as e:
+            print(f"[Control] {e}")
+        except Exception as e:
+            print(f"[Control] {cmd!r} failed: {type(e).__name__}: {e}")
+            log_event("command", source="keyboard", value="error", extra=f"{cmd}: {type(e).__name__}: {e}")
+
+def register_commands(bus, client):
+    loop = bus.loop
+
+    def say(text=None):
+        text = text or CAKE_NOTICE
+        client.say(text)
+        return {"text": text}
+
+    def interrupt():
+        client.interrupt()
+        return {}
+
+    def mute(muted=True):
+        client.set_mic_muted(muted)
+        return {"mic_muted": client.mic_muted}
+
+    def status():
+        return {**client.status(), "profiler": profiler.running}
+
+    def shutdown():
+        bus.shutdown()
+        return {}
 
-        elif cmd == "s":
-            SAY_EVENT.set()
+    async def profile():
+        # sampling profiler on / off, writes collapsed stacks on stop
+        path = await loop.run_in_executor(None, profiler.toggle)
+        return {"running": profiler.running, "path": str(path) if path else None}
+
+    for fn in (say, interrupt, mute, status, shutdown, profile):
+        bus.register(fn.__name__, fn)
+
+def open_speaker(speaker):
+    try:
+        speaker.open()
+    except Exception as e:
+        # the first play_audio tries again
+        print(f"[Audio] Output stream not opened: {e}")
+        return
+    startup.mark("speaker_open")
+
+def load_say_phrases(name):
+    # one announcement per line, synthesized into the say() cache at startup
+    path = os.path.join(os.path.dirname(__file__), "config", name)
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
 
 async def main():
 
+    # realtime client setup
+    loop = asyncio.get_running_loop()
+    # commands from the keyboard and the control API run on this loop
+    bus = CommandBus(loop)
+
     def handle_sigint(sig, frame):
-        STOP_EVENT.set()
-    
+        loop.call_soon_threadsafe(bus.shutdown)
+
     signal.signal(signal.SIGINT, handle_sigint)
 
-    # realtime client setup
-    loop = asyncio.get_running_loop()
+    # loop lag, executor queue / latency, per-thread CPU (before the first run_in_executor)
+    monitor = RuntimeMonitor(loop).start() if RUNTIME_MONITOR else None
+    # session recording: user uplink + agent audio per response, written off the hot path
+    recorder = SessionRecorder(RECORD_DIR) if RECORD_DIR else None
+    speaker = Speaker()
     client = RealtimeClient(
         loop=loop,
         speaker=speaker,
         audio_user_path=None,
-        ai_audio_logger=None
+        ai_audio_logger=recorder
     )
-    client_thread = threading.Thread(target=client.run, daemon=True)
-    client_thread.start()
+    # metrics endpoint: /metrics (Prometheus) and /metrics.json
+    metrics.add_collector("speaker", speaker.stats)
+    metrics.add_collector("client", client.stats)
+    metrics.add_collector("log", log_stats)
+    metrics.add_collector("startup", startup.stats)
+    metrics.add_collector("profiler", profiler.stats)
+    if recorder:
+        metrics.add_collector("recorder", recorder.stats)
+    metrics.add_collector("control", bus.stats)
+    if METRICS_PORT:
+        start_metrics_server(METRICS_HOST, int(METRICS_PORT))
+    register_commands(bus, client)
+    if CONTROL_PORT:
+        start_control_server(bus, CONTROL_HOST, int(CONTROL_PORT), token=CONTROL_TOKEN or None)
+
+    if SAY_CACHE_PREFILL_TXT:
+        client.prefill_say_cache(load_say_phrases(SAY_CACHE_PREFILL_TXT))
+
+    # warm-up in parallel: the client connects (and loads the prompt / opens
+    # the mic meanwhile) while the output stream is opened in the executor
+    if client.transport == "asyncio":
+        asyncio.create_task(client.run_async())
+    else:
+        client_thread = threading.Thread(target=client.run, name="realtime-ws", daemon=True)
+        client_thread.start()
+    loop.run_in_executor(None, open_speaker, speaker)
 
     try:
-        asyncio.create_task(keyboard_listener())
-        
-        while not STOP_EVENT.is_set():
-
-            if SAY_EVENT.is_set():
-                SAY_EVENT.clear()
-                # client.say("Please get the supervisor. He's waiting outside the room.")
-                client.say("Attention. There is only a limited amount of cake! Please take only one piece. Thank you!")
-                
-            await asyncio.sleep(0.5)
+        asyncio.create_task(keyboard_listener(bus, client))
+        # say / interrupt / mute ... run as they arrive; wait for shutdown
+        await bus.stopped.wait()
     finally:
         log_event("main", "", "Cleaning up and shutting down...")
+        if profiler.running:
+            profiler.stop()
+        if monitor:
+            monitor.stop()
         try:
             client.close()
         except Exception:
             pass
+        if recorder:
+            recorder.close()
+        await speaker.close()
         log_event("main", "", "Done")
+        flush_log()
         os._exit(0)
 
 
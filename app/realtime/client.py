@@ -1,30 +1,82 @@
 import os
 import json
-import base64
 import threading
 import asyncio
+import random
 import time
+from collections import deque
+from functools import lru_cache
 import websocket
-from dotenv import load_dotenv
-from interfaces.mic_terminal import stream_audio, list_devices
+from interfaces.mic_terminal import MicSource, user_recorder
+from interfaces.audio_source import tee
+from interfaces.vad_gate import VadGate
+from interfaces.turn_detector import TurnDetector
+from realtime.uplink import AudioUplink
+from realtime.transport import AsyncRealtimeTransport
+from realtime.dispatch import EventDispatcher
+from realtime.turn_metrics import TurnMetrics
+from realtime.conversation import ConversationStore, estimate_tokens, estimate_spoken_tokens
+from audio.pcm_cache import PcmCache, cache_key
+from audio.g711 import AudioDecoder, AudioEncoder
+from util.lru import LruDict, LruSet
+from util.command_bus import CommandError
+from util.metrics import registry as metrics
 from util.logger import log_event
+from util.startup import timer as startup
 
-load_dotenv()
-
-# .env variables
+# .env variables (loaded by the entry point, main.py)
 API_KEY = os.getenv("OPENAI_API_KEY", "")
 OPENAI_SPEECH_MODEL = os.getenv("OPENAI_SPEECH_MODEL")
+OPENAI_VOICE = os.getenv("OPENAI_VOICE", "")
 OPENAI_LANGUAGE = os.getenv("OPENAI_LANGUAGE")
 OPENAI_TRANSCRIPTION_MODEL = os.getenv("OPENAI_TRANSCRIPTION_MODEL")
 MIC_INDEX = os.getenv("MIC_INDEX", "").lower()
 MIC_INDEX = None if MIC_INDEX == "" else int(MIC_INDEX)
 PROMPT_SPEECH_TXT = os.getenv("PROMPT_LOCAL_TXT")
+MIC_RESAMPLE_QUALITY = os.getenv("MIC_RESAMPLE_QUALITY", "medium")     # fast | medium | high
+MIC_VAD_GATE = os.getenv("MIC_VAD_GATE", "0") == "1"
+MIC_VAD_AGGRESSIVENESS = int(os.getenv("MIC_VAD_AGGRESSIVENESS", "2"))
+MIC_VAD_PREROLL_MS = int(os.getenv("MIC_VAD_PREROLL_MS", "300"))
+MIC_VAD_HANGOVER_MS = int(os.getenv("MIC_VAD_HANGOVER_MS", "1000"))
+SERVER_VAD_SILENCE_MS = int(os.getenv("SERVER_VAD_SILENCE_MS", "800"))
+TURN_DETECTION = os.getenv("TURN_DETECTION", "server").lower()     # server | client
+TURN_VAD_AGGRESSIVENESS = int(os.getenv("TURN_VAD_AGGRESSIVENESS", "2"))
+TURN_SILENCE_MS = int(os.getenv("TURN_SILENCE_MS", "500"))
+TURN_MIN_SILENCE_MS = int(os.getenv("TURN_MIN_SILENCE_MS", "250"))
+TURN_MAX_SILENCE_MS = int(os.getenv("TURN_MAX_SILENCE_MS", "1200"))
+TURN_SPECULATIVE = os.getenv("TURN_SPECULATIVE", "1") == "1"
+TURN_SPECULATIVE_LEAD_MS = int(os.getenv("TURN_SPECULATIVE_LEAD_MS", "300"))
+UPLINK_INTERVAL_MS = int(os.getenv("UPLINK_INTERVAL_MS", "40"))
+UPLINK_QUEUE_MS = int(os.getenv("UPLINK_QUEUE_MS", "1000"))
+REALTIME_TRANSPORT = os.getenv("REALTIME_TRANSPORT", "thread").lower()     # thread | asyncio
+REALTIME_AUDIO_FORMAT = os.getenv("REALTIME_AUDIO_FORMAT", "pcm16")         # pcm16 | g711_ulaw | g711_alaw
+REALTIME_RECONNECT = os.getenv("REALTIME_RECONNECT", "1") == "1"
+REALTIME_RECONNECT_MIN_MS = int(os.getenv("REALTIME_RECONNECT_MIN_MS", "500"))
+REALTIME_RECONNECT_MAX_MS = int(os.getenv("REALTIME_RECONNECT_MAX_MS", "10000"))
+REALTIME_RESTORE_ITEMS = int(os.getenv("REALTIME_RESTORE_ITEMS", "12"))
+REALTIME_RESTORE_CHARS = int(os.getenv("REALTIME_RESTORE_CHARS", "2000"))
+REALTIME_STANDBY = os.getenv("REALTIME_STANDBY", "0") == "1"
+REALTIME_STANDBY_MAX_AGE_S = int(os.getenv("REALTIME_STANDBY_MAX_AGE_S", "900"))
+CONVERSATION_TRIM = os.getenv("CONVERSATION_TRIM", "1") == "1"
+CONVERSATION_MAX_ITEMS = int(os.getenv("CONVERSATION_MAX_ITEMS", "40"))
+CONVERSATION_MAX_TOKENS = int(os.getenv("CONVERSATION_MAX_TOKENS", "6000"))
+DIALOG_MAX_LINES = int(os.getenv("DIALOG_MAX_LINES", "200"))
+SAY_CACHE = os.getenv("SAY_CACHE", "1") == "1"
+SAY_CACHE_DIR = os.getenv("SAY_CACHE_DIR", "")
+SAY_CACHE_MB = int(os.getenv("SAY_CACHE_MB", "32"))
+SAY_INSTRUCTIONS = "Say exactly the following: "     # part of the cached audio: bump CACHE_VERSION on change
+SAY_CHUNK_BYTES = 1920      # cached clips go to the speaker in 40 ms chunks, like streamed audio
+
 
 
-# load prompt from .txt
-PROMPT_SPEECH_FILE = os.path.join(os.path.dirname(__file__), "../config", "prompts", PROMPT_SPEECH_TXT)
-with open(PROMPT_SPEECH_FILE, "r", encoding="utf-8") as f:
-    PROMPT_SPEECH = f.read()
+# load prompt from .txt: on first use (warm-up thread or session.created), not at import
+@lru_cache(maxsize=None)
+def load_prompt(name=None):
+    path = os.path.join(os.path.dirname(__file__), "../config", "prompts", name or PROMPT_SPEECH_TXT)
+    with open(path, "r", encoding="utf-8") as f:
+        prompt = f.read()
+    startup.mark("prompt_loaded")
+    return prompt
 
 # API variables
 URL = f"wss://api.openai.com/v1/realtime?model={OPENAI_SPEECH_MODEL}"
@@ -38,14 +90,42 @@ def dbg(tag, extra=""):
 
 
 class RealtimeClient:
-    def __init__(self, loop=None, speaker=None, audio_user_path=None, ai_audio_logger=None):
+    def __init__(self, loop=None, speaker=None, audio_user_path=None, ai_audio_logger=None, url=None, start_mic=True,
+                 transport=None, session_id=None, say_cache=None, audio_source=None):
         self.loop = loop
         self.speaker = speaker
         self.speech_visualizer = None
         self.ws = None
+        self.url = url or URL
+        # input audio: any interfaces.audio_source.AudioSource (file replay,
+        # synthetic bursts, ...); by default the microphone
+        if audio_source is None and start_mic:
+            audio_source = MicSource(MIC_INDEX, resample_quality=MIC_RESAMPLE_QUALITY)
+        self.audio_source = audio_source
+        self.start_mic = audio_source is not None
+        self._user_recorder = None
+        # "thread": websocket-client on its own thread (run), "asyncio": on self.loop (run_async)
+        self.transport = transport or REALTIME_TRANSPORT
+        # several clients can share a process (SessionManager): their metrics
+        # are told apart by a "session" label
+        self.session_id = session_id
+        self.labels = {"session": session_id} if session_id else {}
 
-        self._ai_buf = {}
-        self._dialog_buffer = []
+        # synchronous (non-blocking) speaker backends are fed straight from the
+        # websocket thread, coroutine backends are scheduled on the loop
+        self._play_direct = speaker is not None and not asyncio.iscoroutinefunction(speaker.play_audio)
+        # speakers with a playback clock get the item id of every chunk, so a
+        # barge-in can truncate the item to what the user actually heard
+        self._speaker_clock = hasattr(speaker, "playback_position")
+        self._truncated = LruSet(maxsize=16)
+        self._response_active = False
+
+        # everything per response / per item is bounded: agents run for days
+        self._ai_buf = LruDict(maxsize=8)
+        self.conversation = ConversationStore(CONVERSATION_MAX_ITEMS, CONVERSATION_MAX_TOKENS, DIALOG_MAX_LINES)
+        self.trim_conversation = CONVERSATION_TRIM
+        self._pending_deletes = deque()         # conversation.item.delete not sent yet
+        self._delete_lock = threading.Lock()
         self._last_expression = {}
         self._last_arms = {}
 
@@ -56,13 +136,66 @@ class RealtimeClient:
         self.audio_user_path = audio_user_path
         self.ai_audio_logger = ai_audio_logger
 
-        self._first_audio_seen_for_rid = set()
+        self._first_audio_seen_for_rid = LruSet(maxsize=64)
+
+        # say(): synthesized phrases are cached (can be shared between sessions
+        # with the same voice); responses tagged with a cache key are captured
+        if say_cache is None and SAY_CACHE:
+            say_cache = PcmCache(SAY_CACHE_DIR or None, SAY_CACHE_MB * 1024 * 1024)
+        self.say_cache = say_cache
+        self.voice = OPENAI_VOICE or "default"
+        self._say_captures = LruDict(maxsize=8)     # rid -> [key, pcm, prefill]
+        self._say_lock = threading.Lock()
+        self._say_prefill = deque()
+        self._prefill_inflight = None
+        self.mic_gate = None
+        self.mic_muted = False
+        # "client": turn_detection is off on the server, the TurnDetector on
+        # the mic stream commits each turn and requests the response; a
+        # speculative response's audio is held until the turn end is confirmed
+        self.turn_detection = TURN_DETECTION
+        self.turn_detector = None
+        self._spec_lock = threading.RLock()   # re-entered by the held-audio flush
+        self._spec = None                       # speculative response of the current turn
+        self._spec_unassigned = deque()         # requested, response.created not seen yet
+        self._spec_by_rid = LruDict(maxsize=8)
+        self.uplink = None
+        self._warmed_up = False
+        self._mic_go = threading.Event()
+        self._audio_sent = False
+
+        # connection supervisor (run / run_async): reconnects until close(),
+        # optionally failing over to a pre-warmed standby connection
+        self.reconnect = REALTIME_RECONNECT
+        self.use_standby = REALTIME_STANDBY and loop is not None
+        self._closing = False
+        self._connections = 0
+        self._session_ready = False
+        self._down_since = None
+        self._standby = None            # (ws, thread | task, opened_at)
+        self._standby_ready = False
+        self.reconnects = 0
+        self.last_downtime_ms = None
+
+        # event type -> handlers; integrators can hook events via client.dispatcher.on(...)
+        # wire format of input and output audio; everything local stays 24 kHz PCM16
+        self.audio_format = REALTIME_AUDIO_FORMAT
+        self.dispatcher = EventDispatcher(
+            decoder=AudioDecoder(self.audio_format) if self.audio_format != "pcm16" else None)
+        self._register_handlers()
+
+        # per-turn latency metrics, linked by response id
+        self.turn_metrics = TurnMetrics(metrics, **self.labels)
+        self.turn_metrics.attach(self)
 
         print(" ------------------------------------------ ")
         print(f'[RTC] Model: {OPENAI_SPEECH_MODEL}')
         print(f'[RTC] Language: {OPENAI_LANGUAGE}')
         print(f'[RTC] Transcription Model: {OPENAI_TRANSCRIPTION_MODEL}')
         print(f'[RTC] Mic Index: {MIC_INDEX}')
+        print(f'[RTC] Transport: {self.transport}')
+        if session_id:
+            print(f'[RTC] Session: {session_id}')
         print(" ------------------------------------------ ")
 
     def _schedule_in_loop(self, coro_or_fn, *args, **kwargs):
@@ -70,164 +203,585 @@ class RealtimeClient:
             result = coro_or_fn(*args, **kwargs)
             if asyncio.iscoroutine(result):
                 asyncio.create_task(result)
-        self.loop.call_soon_threadsafe(_runner)
+        if self.transport == "asyncio":
+            # handlers already run on the loop
+            _runner()
+        else:
+            self.loop.call_soon_threadsafe(_runner)
 
     def _on_open(self, ws, *_):
         dbg("open")
+        startup.mark("ws_open")
 
         # send OpenAI setup
+        session = {
+            "input_audio_format": self.audio_format,
+            "output_audio_format": self.audio_format,
+            "modalities": ["audio", "text"],
+            "input_audio_transcription": {
+                "model": OPENAI_TRANSCRIPTION_MODEL,
+                "language": OPENAI_LANGUAGE
+            },
+            "turn_detection": {
+                "type": "server_vad",
+                "threshold": 0.5,
+                "silence_duration_ms": SERVER_VAD_SILENCE_MS,
+                "prefix_padding_ms": 300,
+                "create_response": True,
+                "interrupt_response": True
+            } if self.turn_detection != "client" else None
+        }
+        if OPENAI_VOICE:
+            session["voice"] = OPENAI_VOICE
+        ws.send(json.dumps({"type": "session.update", "session": session}))
+
+    def _register_handlers(self):
+        d = self.dispatcher
+        d.on("session.created", self._handle_session_created)
+        d.on("input_audio_buffer.speech_started", self._handle_speech_started)
+        d.on("input_audio_buffer.speech_stopped", self._handle_speech_stopped)
+        d.on("conversation.item.input_audio_transcription.completed", self._handle_transcription_completed)
+        d.on("response.created", self._handle_response_created)
+        d.on("response.started", self._handle_response_created)
+        d.on_audio(self._handle_audio_delta)
+        d.on("response.audio_transcript.delta", self._handle_transcript_delta)
+        d.on("response.done", self._handle_response_done)
+        d.on("response.cancelled", self._handle_response_cancelled)
+        d.on("error", self._handle_error)
+        d.on("conversation.item.created", self._handle_item_created)
+        d.on("conversation.item.deleted", self._handle_item_deleted)
+
+    def _on_message(self, ws, raw, *_):
+        if ws is self.ws:
+            self.dispatcher.dispatch(raw)
+        else:
+            self._on_standby_message(ws, raw)
+
+    def _send_prompt(self, ws):
         ws.send(json.dumps({
-            "type": "session.update",
-            "session": {
-                "input_audio_format": "pcm16",
-                "output_audio_format": "pcm16",
-                "modalities": ["audio", "text"],
-                "input_audio_transcription": {
-                    "model": OPENAI_TRANSCRIPTION_MODEL,
-                    "language": OPENAI_LANGUAGE
-                },
-                "turn_detection": {
-                    "type": "server_vad",
-                    "threshold": 0.5,
-                    "silence_duration_ms": 800,
-                    "prefix_padding_ms": 300,
-                    "create_response": True,
-                    "interrupt_response": True
-                }
+            "type": "conversation.item.create",
+            "item": {
+                "type": "message",
+                "role": "system",
+                "content": [
+                    {"type": "input_text", "text": load_prompt()}
+                ]
             }
         }))
 
-    def _on_message(self, ws, raw, *_):
-        ev = json.loads(raw)
-        typ = ev.get("type", "")
+    # after a reconnect the new session knows nothing: replay the recent dialog
+    # (bounded by REALTIME_RESTORE_ITEMS / _CHARS) as one system message
+    def _send_restore(self, ws):
+        lines = self.conversation.lines(REALTIME_RESTORE_ITEMS) if REALTIME_RESTORE_ITEMS > 0 else []
+        summary = "\n".join(lines)[-REALTIME_RESTORE_CHARS:]
+        if not summary:
+            return
+        ws.send(json.dumps({
+            "type": "conversation.item.create",
+            "item": {
+                "type": "message",
+                "role": "system",
+                "content": [
+                    {"type": "input_text", "text": "The connection was restored. Conversation so far:\n" + summary}
+                ]
+            }
+        }))
 
-        # OpenAI: session created
-        if typ == "session.created":
-            ws.send(json.dumps({
-                "type": "conversation.item.create",
-                "item": {
-                    "type": "message",
-                    "role": "system",
-                    "content": [
-                        {"type": "input_text", "text": PROMPT_SPEECH}
-                    ]
-                }
-            }))
-            
-            # start microphone stream, sending chunks to OpenAI Websocket
-            threading.Thread(
-                target=lambda: stream_audio(
-                    lambda chunk: ws.send(json.dumps({
-                        "type": "input_audio_buffer.append",
-                        "audio": base64.b64encode(chunk).decode()
-                    })),
-                    MIC_INDEX,
-                    save_to=self.audio_user_path
-                ),
-                daemon=True
-            ).start()
-
-        # OpenAI: USER input started
-        if typ == "input_audio_buffer.speech_started":
-            now = time.monotonic()
-
-            # filter brief speech start events: at least 250ms since last stop
-            # vad = "voice activity detection"
-            if now - self._last_vad_stop_ts > 0.25:
-                self._last_vad_stop_ts = now
-
-                # stop SYSTEM audio output (important for interruptions)
-                self._schedule_in_loop(self.speaker.stop_audio)
-                # ensure incoming system audio to be dropped
-                self._drop_audio_until_new_response = True
-
-                # logging and visualization
-                if self.ai_audio_logger:
-                    self.ai_audio_logger.flush_segment()
-                if self.speech_visualizer:
-                    self.speech_visualizer.stop_speaking()
-            log_event("api",source="realtime_api",value="speech_started")
-        
-        # OpenAI: USER input stopped
-        if typ == "input_audio_buffer.speech_stopped":
-            log_event("api",source="realtime_api",value="speech_stopped")
-
-        # OpenAI: USER transcription completed
-        if typ == "conversation.item.input_audio_transcription.completed":
-            text = ev["transcript"].strip()
-            self._dialog_buffer.append(f"User: {text}")
-            log_event("user_text", source="user", value=text)
-            log_event("api",source="realtime_api",value="input_audio_transcription.completed")
-
-        # OpenAI: SYSTEM response started
-        if typ in ("response.created", "response.started"):
-            rid = ev.get("response", {}).get("id")
-            if rid and rid != self._current_response_id:
-                self._current_response_id = rid
-                self._drop_audio_until_new_response = False
-                log_event("api",source="realtime_api",value=typ,extra=json.dumps({"rid": rid}))
-                if self.speech_visualizer:
-                    self.speech_visualizer.start_speaking()
-
-        # OpenAI: incoming audio chunks for SYSTEM response audio
-        if typ == "response.audio.delta":
-            data = base64.b64decode(ev["delta"])
-            rid = ev.get("response_id", self._current_response_id)
-            
-            if rid and rid not in self._first_audio_seen_for_rid:
-                self._first_audio_seen_for_rid.add(rid)
-                log_event("api", source="realtime_api", value="response.audio.first_delta", extra=json.dumps({"rid": rid}))
-                if self.ai_audio_logger:
-                    self.ai_audio_logger.mark_start(rid)
-
-            # play audio on speaker 
-            if not self._drop_audio_until_new_response:
-                if self.ai_audio_logger:
-                    self.ai_audio_logger.append(data)
-                self._schedule_in_loop(self.speaker.play_audio, data)
-
-        # OpenAI: incoming transcript deltas for SYSTEM response
-        if typ == "response.audio_transcript.delta":
-            rid = ev["response_id"]
-            self._ai_buf.setdefault(rid, []).append(ev["delta"])
-
-        # OpenAI: SYSTEM response done: means NOT PLAYBACK but generation done
-        if typ == "response.done":
-            rid = ev["response"]["id"]
-            log_event("api", source="realtime_api", value="response.done", extra=json.dumps({"rid": rid}))
+    # send through whatever connection is current (the uplink outlives reconnects);
+    # no live socket (before connect, during a reconnect) is a CommandError
+    def _send(self, payload):
+        if self.ws is None:
+            raise CommandError("not connected")
+        try:
+            self.ws.send(payload)
+        except (websocket.WebSocketConnectionClosedException, ConnectionError) as e:
+            raise CommandError("not connected") from e
+
+    def _on_session_ready(self, mode):
+        self._session_ready = True
+        startup.mark("session_ready")
+        self._current_response_id = None
+        self._drop_audio_until_new_response = False
+        self._response_active = False
+        self._ai_buf.clear()
+        self._say_captures.clear()
+        if self.dispatcher.decoder:
+            self.dispatcher.decoder.reset()
+        # the new session gets a fresh uplink audio stream
+        if self.uplink:
+            self.uplink.reset_encoder()
+        with self._spec_lock:
+            self._spec = None
+            self._spec_unassigned.clear()
+            self._spec_by_rid.clear()
+        self.conversation.reset_items()
+        # the new server session starts empty: nothing left to delete
+        with self._delete_lock:
+            self._pending_deletes.clear()
+        # a prefill cut off by the drop is requested again on the new session
+        with self._say_lock:
+            if self._prefill_inflight is not None:
+                self._say_prefill.appendleft(self._prefill_inflight)
+                self._prefill_inflight = None
+        self._send_next_prefill()
+        if self._down_since is not None:
+            downtime = time.monotonic() - self._down_since
+            self._down_since = None
+            self.reconnects += 1
+            self.last_downtime_ms = round(downtime * 1000, 1)
+            metrics.inc("realtime_reconnects_total", mode=mode, **self.labels)
+            metrics.observe("realtime_downtime_seconds", downtime, mode=mode, **self.labels)
+            log_event("api", source="websocket", value="reconnected",
+                      extra=json.dumps({"mode": mode, "downtime_ms": self.last_downtime_ms}))
+
+    # OpenAI: session created
+    def _handle_session_created(self, ev):
+        ws = self.ws
+        self._send_prompt(ws)
+        if self._connections > 1:
+            self._send_restore(ws)
+        self._on_session_ready("reconnect")
+
+        # start sending microphone audio (the device was opened during warm-up)
+        if self.start_mic:
+            self._warm_up()
+            self._mic_go.set()
+
+    # Heavy resources are prepared while the websocket handshake runs: the
+    # prompt file is read and the audio source opened (capture starts on
+    # session.created). Called by run / run_async; idempotent.
+    def _warm_up(self):
+        if self._warmed_up:
+            return
+        self._warmed_up = True
+        threading.Thread(target=load_prompt, name="prompt-load", daemon=True).start()
+        source = self.audio_source
+        if source is None:
+            return
+        # capture only enqueues, the uplink thread batches and sends
+        encoder = AudioEncoder(self.audio_format) if self.audio_format != "pcm16" else None
+        self.uplink = AudioUplink(self._send_audio, interval_ms=UPLINK_INTERVAL_MS, max_queue_ms=UPLINK_QUEUE_MS,
+                                  speed=max(1.0, source.pace), encoder=encoder)
+        self.uplink.muted = self.mic_muted
+        send = self.uplink.push
+        # optional client-side silence gate in front of the uplink
+        if MIC_VAD_GATE:
+            self.mic_gate = VadGate(send, aggressiveness=MIC_VAD_AGGRESSIVENESS,
+                                    preroll_ms=MIC_VAD_PREROLL_MS, hangover_ms=MIC_VAD_HANGOVER_MS)
+            send = self.mic_gate
+        # optional client-side turn detection: sees every mic chunk, gated or not
+        if self.turn_detection == "client":
+            self.turn_detector = TurnDetector(
+                send, self._on_turn_event, aggressiveness=TURN_VAD_AGGRESSIVENESS, silence_ms=TURN_SILENCE_MS,
+                min_ms=TURN_MIN_SILENCE_MS, max_ms=TURN_MAX_SILENCE_MS, baseline_ms=SERVER_VAD_SILENCE_MS,
+                speculative=TURN_SPECULATIVE, lead_ms=TURN_SPECULATIVE_LEAD_MS)
+            send = self.turn_detector
+        # recording only enqueues, a background writer does the disk I/O
+        record = getattr(self.ai_audio_logger, "user_audio", None)
+        if record is None and self.audio_user_path is not None:
+            self._user_recorder = user_recorder(self.audio_user_path)
+            record = self._user_recorder.user_audio
+        threading.Thread(target=self._start_source, args=(source, tee(send, record)),
+                         name="audio-source-open", daemon=True).start()
+
+    def _start_source(self, source, send):
+        try:
+            source.open()
+        except Exception as e:
+            print(f"[Mic] Audio source {source.name} not opened: {e}")
+            log_event("mic", source.name, "open_failed", extra=str(e))
+            return
+        startup.mark("mic_open")
+        self._mic_go.wait()
+        if not self._closing:
+            source.start(send)
+
+    def _send_audio(self, payload):
+        self._send(payload)
+        if not self._audio_sent:
+            self._audio_sent = True
+            startup.mark("first_audio_sent")
+
+    # OpenAI: USER input started
+    def _handle_speech_started(self, ev):
+        now = time.monotonic()
+
+        # filter brief speech start events: at least 250ms since last stop
+        # vad = "voice activity detection"
+        if now - self._last_vad_stop_ts > 0.25:
+            self._last_vad_stop_ts = now
+            self._stop_playback(now)
+        log_event("api",source="realtime_api",value="speech_started")
+
+    # stop SYSTEM audio output (important for interruptions)
+    def _stop_playback(self, now):
+        unplayed = 0
+        if hasattr(self.speaker, "interrupt"):
+            unplayed = self.speaker.interrupt(now) or 0
+        else:
+            self._schedule_in_loop(self.speaker.stop_audio)
+        if self._speaker_clock:
+            self._truncate_heard()
+        # ensure incoming system audio to be dropped
+        self._drop_audio_until_new_response = True
+
+        # logging and visualization
+        if self.ai_audio_logger:
+            # cut the recorded agent segment to what was actually played
+            self.ai_audio_logger.flush_segment(unplayed)
+        if self.speech_visualizer:
+            self.speech_visualizer.stop_speaking()
+
+    # barge-in without user speech (control command): cancel the response
+    # that is being generated and cut playback like a speech start does
+    def interrupt(self):
+        self._cancel_active_response()
+        self._stop_playback(time.monotonic())
+        log_event("api", source="control", value="interrupt")
+
+    def _cancel_active_response(self):
+        if self._response_active:
+            try:
+                self._send(json.dumps({"type": "response.cancel"}))
+            except Exception as e:
+                print(f"[Realtime] response.cancel failed: {e}")
+
+    # muted: mic audio is discarded before the uplink; the server's input
+    # buffer is cleared so a half-spoken turn doesn't linger
+    def set_mic_muted(self, muted: bool):
+        self.mic_muted = bool(muted)
+        if self.uplink:
+            self.uplink.muted = self.mic_muted
+        if self.mic_muted and self._session_ready:
+            try:
+                self._send(json.dumps({"type": "input_audio_buffer.clear"}))
+            except Exception as e:
+                print(f"[Realtime] input_audio_buffer.clear failed: {e}")
+        log_event("api", source="control", value="mic_muted" if self.mic_muted else "mic_unmuted")
+
+    # -- client-side turn detection (TURN_DETECTION=client) --
+
+    # TurnDetector events arrive on the capture thread and are handled on the
+    # loop, like interrupt(): TurnMetrics and the speculative-response state
+    # are not touched from the capture thread. Sends go through the uplink,
+    # behind the audio queued so far.
+    def _on_turn_event(self, kind, info):
+        if self.mic_muted or not self._session_ready:
+            return
+        handler = {
+            "speech_started": self._handle_local_speech_started,
+            "speculate": self._handle_local_speculate,
+            "resumed": self._cancel_speculative,
+            "end_of_turn": self._handle_local_end_of_turn,
+        }.get(kind)
+        if handler is None:
+            return
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(handler)
+        else:
+            handler()
+
+    def _handle_local_speculate(self):
+        self._request_turn_response(speculative=True)
+
+    def _handle_local_end_of_turn(self):
+        if not self._confirm_speculative():
+            self._request_turn_response()
+
+    # no server VAD to report the barge-in: cancel and cut playback here
+    def _handle_local_speech_started(self):
+        self.turn_metrics.speech_started()
+        self._cancel_active_response()
+        self._stop_playback(time.monotonic())
+        log_event("api", source="turn_detector", value="speech_started")
+
+    def _request_turn_response(self, speculative=False):
+        response = {}
+        if speculative:
+            response["metadata"] = {"turn": "speculative"}
+            with self._spec_lock:
+                self._spec = {"state": "pending", "rid": None, "held": [], "output": None}
+                self._spec_unassigned.append(self._spec)
+        # the turn's stop time for TurnMetrics: when its response is requested
+        self.turn_metrics.speech_stopped()
+        self.uplink.send_event(json.dumps({"type": "input_audio_buffer.commit"}).encode())
+        self.uplink.send_event(json.dumps({"type": "response.create", "response": response}).encode())
+
+    # the user went on talking: the speculative response is cancelled (once
+    # its id is known) and its output removed from the conversation; the
+    # committed audio stays as a user item, the rest of the turn follows it
+    def _cancel_speculative(self):
+        with self._spec_lock:
+            spec, self._spec = self._spec, None
+            if spec is None:
+                return
+            spec["state"] = "cancelled"
+            spec["held"] = []
+            rid, output = spec["rid"], spec["output"]
+        if rid:
+            self.uplink.send_event(json.dumps({"type": "response.cancel", "response_id": rid}).encode())
+        if output:
+            self._delete_items(output)
+        log_event("api", source="turn_detector", value="speculative_cancelled", extra=json.dumps({"rid": rid}))
+
+    def _confirm_speculative(self) -> bool:
+        with self._spec_lock:
+            spec, self._spec = self._spec, None
+            if spec is None or spec["state"] != "pending":
+                return False
+            spec["state"] = "confirmed"
+            held, spec["held"] = spec["held"], []
+            # under the lock: deltas arriving meanwhile wait and play after the held audio
+            for data, item_id in held:
+                self._handle_audio_delta(data, spec["rid"], item_id)
+        if spec["rid"] and self.speech_visualizer:
+            self.speech_visualizer.start_speaking()
+        log_event("api", source="turn_detector", value="speculative_confirmed",
+                  extra=json.dumps({"rid": spec["rid"], "held_ms": sum(len(d) for d, _ in held) // 48}))
+        return True
+
+    # the server keeps the whole generated item in context: cut it to the audio
+    # that was played before the interruption (conversation.item.truncate)
+    def _truncate_heard(self):
+        item_id, played_ms, written_ms = self.speaker.playback_position()
+        if item_id is None or item_id in self._truncated:
+            return
+        # fully played and fully generated: nothing unheard to remove
+        if played_ms >= written_ms and not self._response_active:
+            return
+        self._truncated.add(item_id)
+        audio_end_ms = int(played_ms)
+        try:
+            self._send(json.dumps({"type": "conversation.item.truncate", "item_id": item_id,
+                                   "content_index": 0, "audio_end_ms": audio_end_ms}))
+        except Exception as e:
+            print(f"[Realtime] truncate failed: {e}")
+            return
+        self.conversation.truncate_item(item_id, audio_end_ms)
+        log_event("api", source="realtime_api", value="conversation.item.truncate",
+                  extra=json.dumps({"item_id": item_id, "audio_end_ms": audio_end_ms,
+                                    "generated_ms": int(written_ms)}))
+
+    # OpenAI: USER input stopped
+    def _handle_speech_stopped(self, ev):
+        log_event("api",source="realtime_api",value="speech_stopped")
+
+    # OpenAI: USER transcription completed
+    def _handle_transcription_completed(self, ev):
+        text = ev["transcript"].strip()
+        self.conversation.add_line("User", text)
+        self.conversation.update_tokens(ev.get("item_id"), estimate_spoken_tokens(text, "user"))
+        log_event("user_text", source="user", value=text)
+        log_event("api",source="realtime_api",value="input_audio_transcription.completed")
+
+    # OpenAI: SYSTEM response started
+    def _handle_response_created(self, ev):
+        rid = ev.get("response", {}).get("id")
+        speculative = (ev.get("response", {}).get("metadata") or {}).get("turn") == "speculative"
+        spec = None
+        if speculative and rid:
+            with self._spec_lock:
+                spec = self._spec_unassigned.popleft() if self._spec_unassigned else None
+                if spec is not None:
+                    spec["rid"] = rid
+                    self._spec_by_rid[rid] = spec
+            if spec is not None and spec["state"] == "cancelled":
+                # the user went on talking before the response existed
+                try:
+                    self._send(json.dumps({"type": "response.cancel", "response_id": rid}))
+                except Exception as e:
+                    print(f"[Realtime] response.cancel failed: {e}")
+                return
+        key = (ev.get("response", {}).get("metadata") or {}).get("say_key")
+        if key and rid and self.say_cache is not None:
+            prefill = ev["response"]["metadata"].get("say_prefill") == "1"
+            self._say_captures[rid] = [key, bytearray(), prefill]
+            if prefill:
+                # out-of-band: not the current turn, nothing is played
+                return
+        # a new response is a new audio stream: no filter history from the last one
+        if rid and rid != self._current_response_id and self.dispatcher.decoder:
+            self.dispatcher.decoder.reset()
+        if rid and rid != self._current_response_id:
+            self._current_response_id = rid
+            self._drop_audio_until_new_response = False
+            self._response_active = True
+            log_event("api",source="realtime_api",value=ev["type"],extra=json.dumps({"rid": rid}))
+            # a speculative response starts speaking once the turn end is confirmed
+            if self.speech_visualizer and not (spec is not None and spec["state"] == "pending"):
+                self.speech_visualizer.start_speaking()
+
+    # OpenAI: incoming audio chunks for SYSTEM response audio (dispatcher fast path, already decoded)
+    def _handle_audio_delta(self, data, rid, item_id):
+        rid = rid or self._current_response_id
+
+        capture = self._say_captures.get(rid) if self._say_captures else None
+        if capture is not None:
+            capture[1] += data
+            if capture[2]:
+                return
+
+        # speculative response: held until the turn end is confirmed, dropped if cancelled
+        spec = self._spec_by_rid.get(rid) if self._spec_by_rid else None
+        if spec is not None:
+            with self._spec_lock:
+                if spec["state"] == "pending":
+                    spec["held"].append((data, item_id))
+                    return
+                if spec["state"] == "cancelled":
+                    return
+
+        if rid and self._first_audio_seen_for_rid.add(rid):
+            log_event("api", source="realtime_api", value="response.audio.first_delta", extra=json.dumps({"rid": rid}))
             if self.ai_audio_logger:
-                self.ai_audio_logger.mark_end(rid)
-            text = "".join(self._ai_buf.pop(rid, []))
-            if text.strip():
-                #print("AI:", text.strip())
-                self._dialog_buffer.append(f"AI: {text.strip()}")
-                log_event("ai_response", source="realtime_api", value=text.strip())
+                self.ai_audio_logger.mark_start(rid)
+
+        # play audio on speaker
+        if not self._drop_audio_until_new_response:
+            if self.ai_audio_logger:
+                self.ai_audio_logger.append(data)
+            self._play(data, item_id)
+
+    def _play(self, data, item_id=None):
+        if self._speaker_clock:
+            if self._play_direct:
+                self.speaker.play_audio(data, item_id)
+            else:
+                self._schedule_in_loop(self.speaker.play_audio, data, item_id)
+        elif self._play_direct:
+            self.speaker.play_audio(data)
+        else:
+            self._schedule_in_loop(self.speaker.play_audio, data)
+
+    # OpenAI: incoming transcript deltas for SYSTEM response
+    def _handle_transcript_delta(self, ev):
+        rid = ev["response_id"]
+        buf = self._ai_buf.get(rid)
+        if buf is None:
+            buf = self._ai_buf[rid] = []
+        buf.append(ev["delta"])
 
+    # OpenAI: SYSTEM response done: means NOT PLAYBACK but generation done
+    def _handle_response_done(self, ev):
+        rid = ev["response"]["id"]
+        capture = self._say_captures.pop(rid, None) if self._say_captures else None
+        if capture is not None:
+            key, pcm, prefill = capture
+            # only complete clips: an interrupted say() is generated again next time
+            if ev["response"].get("status") == "completed" and pcm:
+                self.say_cache.put(key, bytes(pcm))
+                log_event("api", source="say_cache", value="stored",
+                          extra=json.dumps({"key": key, "ms": len(pcm) // 48, "prefill": prefill}))
+            if prefill:
+                with self._say_lock:
+                    self._prefill_inflight = None
+                self._send_next_prefill()
+                return
+        if rid == self._current_response_id:
+            self._response_active = False
+        spec = self._spec_by_rid.get(rid) if self._spec_by_rid else None
+        if spec is not None:
+            output = [item["id"] for item in ev["response"].get("output", []) if item.get("id")]
+            with self._spec_lock:
+                cancelled = spec["state"] == "cancelled"
+                if not cancelled:
+                    # still pending: _cancel_speculative deletes the output if the turn goes on
+                    spec["output"] = output
+            if cancelled:
+                self._delete_items(output)
+                log_event("api", source="realtime_api", value="response.done",
+                          extra=json.dumps({"rid": rid, "speculative": "cancelled"}))
+                return
+        log_event("api", source="realtime_api", value="response.done", extra=json.dumps({"rid": rid}))
+        if self.ai_audio_logger:
+            self.ai_audio_logger.mark_end(rid)
+        text = "".join(self._ai_buf.pop(rid, []))
+        if text.strip():
+            #print("AI:", text.strip())
+            self.conversation.add_line("AI", text.strip())
+            log_event("ai_response", source="realtime_api", value=text.strip())
+        self._track_output(ev["response"], text)
 
-        if typ == "response.cancelled":
-            print("AI: <response cancelled>")
-            # ideally: send conversation.item.truncate (https://platform.openai.com/docs/guides/realtime-conversations?lang=python)
+    # -- server-side conversation: track items, delete the oldest over the caps --
 
+    def _handle_item_created(self, ev):
+        item = ev.get("item", {})
+        role = item.get("role")
+        text = "".join(c.get("text") or c.get("transcript") or "" for c in item.get("content", []))
+        # the system prompt (and restore summaries) must survive trimming
+        self.conversation.add_item(item.get("id"), estimate_tokens(text, role=role), pinned=role == "system")
 
-        # Error Handling
-        if typ == "error":
-            dbg("ERROR", json.dumps(ev))
-            log_event("api",source="realtime_api",value="error",extra=json.dumps(ev))
-            if self.speech_visualizer:
-                self.speech_visualizer.stop_speaking()
+    def _handle_item_deleted(self, ev):
+        self.conversation.remove_item(ev.get("item_id"))
+
+    def _track_output(self, response, text):
+        store = self.conversation
+        tokens = estimate_spoken_tokens(text, "assistant")
+        for item in response.get("output", []):
+            store.add_item(item.get("id"), tokens)
+            store.update_tokens(item.get("id"), tokens)
+        input_tokens = (response.get("usage") or {}).get("input_tokens")
+        if input_tokens:
+            store.report_context(input_tokens)
+        self._delete_items(store.trim() if self.trim_conversation else ())
+
+    # conversation.item.delete in order; an id whose send failed stays queued
+    # and goes out before the next ones (response.done retries), so the server
+    # never keeps an item the store dropped for the rest of the session
+    def _delete_items(self, item_ids):
+        with self._delete_lock:
+            self._pending_deletes.extend(item_ids)
+            while self._pending_deletes:
+                item_id = self._pending_deletes[0]
+                try:
+                    self._send(json.dumps({"type": "conversation.item.delete", "item_id": item_id}))
+                except CommandError as e:
+                    log_event("api", source="conversation", value="delete_deferred",
+                              extra=json.dumps({"pending": len(self._pending_deletes), "error": str(e)}))
+                    return
+                self._pending_deletes.popleft()
+
+    def _handle_response_cancelled(self, ev):
+        print("AI: <response cancelled>")
+        self._ai_buf.pop(ev.get("response", {}).get("id"), None)
+        # the interrupted item was already truncated on speech start (_truncate_heard)
+        self._response_active = False
+
+    # Error Handling
+    def _handle_error(self, ev):
+        dbg("ERROR", json.dumps(ev))
+        log_event("api",source="realtime_api",value="error",extra=json.dumps(ev))
+        if self.speech_visualizer:
+            self.speech_visualizer.stop_speaking()
 
     def _on_error(self, ws, error):
-        print("WebSocket error")
+        print("WebSocket error", "(standby)" if ws is not self.ws else "")
+        metrics.inc("ws_errors_total", type=type(error).__name__, **self.labels)
         log_event("api",source="websocket",value="ws_error",extra=str(error))
 
-    def _on_close(self, _ws, code, reason):
+    def _on_close(self, ws, code, reason):
+        if ws is not self.ws:
+            # standby (or a replaced standby) went away; the keeper opens a new one
+            if self._standby is not None and ws is self._standby[0]:
+                self._standby = None
+                self._standby_ready = False
+            return
         print("WebSocket closed", code, reason)
+        if self._down_since is None:
+            self._down_since = time.monotonic()
+        metrics.inc("ws_closes_total", code=code if code is not None else "none", **self.labels)
         log_event("api", source="websocket", value="ws_close", extra=json.dumps({"code": code, "reason": reason}))
         if self.speech_visualizer:
             self.speech_visualizer.stop_speaking()
 
     def say(self, text: str):
-        prompt = "Say exactly the following: " + text
+        key = cache_key(text, self.voice, OPENAI_SPEECH_MODEL) if self.say_cache is not None else None
+        pcm = self.say_cache.get(key) if key else None
+        if pcm is not None:
+            self._say_cached(text, key, pcm)
+            return
+
+        prompt = SAY_INSTRUCTIONS + text
 
         event = {
             "type": "response.create",
@@ -237,21 +791,240 @@ class RealtimeClient:
                 "instructions": prompt,
             },
         }
+        if key:
+            # response.created echoes the metadata: its audio is captured into the cache
+            event["response"]["metadata"] = {"say_key": key}
 
-        self.ws.send(json.dumps(event))
+        self._send(json.dumps(event))
 
+    def _say_cached(self, text, key, pcm):
+        # no model round-trip: the model only learns what was said
+        self._send(json.dumps({
+            "type": "conversation.item.create",
+            "item": {"type": "message", "role": "assistant", "content": [{"type": "text", "text": text}]},
+        }))
+        self.conversation.add_line("AI", text)
+        log_event("api", source="say_cache", value="hit", extra=json.dumps({"key": key, "ms": len(pcm) // 48}))
+        for off in range(0, len(pcm), SAY_CHUNK_BYTES):
+            self._play(pcm[off:off + SAY_CHUNK_BYTES])
 
-    def run(self):
-        # Initiate OpenAI WebSocket
-        self.ws = websocket.WebSocketApp(
-            URL,
+    def prefill_say_cache(self, phrases):
+        """
+        Synthesize phrases that are not cached yet, one out-of-band response at
+        a time (conversation "none": not played, not added to the conversation).
+        Starts once a session is up; returns the number of phrases queued.
+        """
+        if self.say_cache is None:
+            return 0
+        queued = 0
+        with self._say_lock:
+            for text in phrases:
+                key = cache_key(text, self.voice, OPENAI_SPEECH_MODEL)
+                if key not in self.say_cache:
+                    self._say_prefill.append((key, text))
+                    queued += 1
+        if self._session_ready:
+            self._send_next_prefill()
+        return queued
+
+    def _send_next_prefill(self):
+        with self._say_lock:
+            if self._prefill_inflight is not None or not self._say_prefill:
+                return
+            self._prefill_inflight = self._say_prefill.popleft()
+            key, text = self._prefill_inflight
+        self._send(json.dumps({
+            "type": "response.create",
+            "response": {
+                "conversation": "none",
+                "input": [],
+                "instructions": SAY_INSTRUCTIONS + text,
+                "metadata": {"say_key": key, "say_prefill": "1"},
+            },
+        }))
+
+
+    # -- connection supervisor -------------------------------------------------
+
+    def _new_ws_app(self):
+        return websocket.WebSocketApp(
+            self.url,
             header=HEADERS,
             on_open=self._on_open,
             on_message=self._on_message,
             on_error=self._on_error,
             on_close=self._on_close,
         )
-        self.ws.run_forever(ping_interval=20, ping_timeout=10)
+
+    def _new_transport(self):
+        return AsyncRealtimeTransport(
+            self.url,
+            HEADERS,
+            on_open=self._on_open,
+            on_message=self._on_message,
+            on_error=self._on_error,
+            on_close=self._on_close,
+        )
+
+    def _backoff(self, delay):
+        # returns (seconds to wait before the next attempt, next delay)
+        if self._session_ready:
+            delay = REALTIME_RECONNECT_MIN_MS / 1000
+        self._session_ready = False
+        if self._standby_ready:
+            return 0, delay
+        return delay * random.uniform(0.8, 1.2), min(delay * 2, REALTIME_RECONNECT_MAX_MS / 1000)
+
+    def _take_standby(self):
+        if self._standby is None or not self._standby_ready:
+            return None
+        standby, self._standby = self._standby, None
+        self._standby_ready = False
+        return standby
+
+    def _promote(self):
+        # the standby already has session.update and the prompt: only the dialog is missing
+        self._send_restore(self.ws)
+        self._on_session_ready("standby")
+
+    def run(self):
+        # Initiate OpenAI WebSocket; reconnect until close()
+        if self.use_standby:
+            asyncio.run_coroutine_threadsafe(self._standby_keeper(), self.loop)
+        self._warm_up()
+        delay = REALTIME_RECONNECT_MIN_MS / 1000
+        while not self._closing:
+            self._connections += 1
+            standby = self._take_standby()
+            if standby is not None:
+                self.ws, thread, _ = standby
+                self._promote()
+                thread.join()
+            else:
+                self.ws = self._new_ws_app()
+                self.ws.run_forever(ping_interval=20, ping_timeout=10)
+            if self._closing or not self.reconnect:
+                break
+            wait, delay = self._backoff(delay)
+            time.sleep(wait)
+
+    async def run_async(self):
+        # Same handlers, but the socket lives on self.loop: no receive thread
+        # and no per-event loop hops
+        keeper = asyncio.create_task(self._standby_keeper()) if self.use_standby else None
+        self._warm_up()
+        delay = REALTIME_RECONNECT_MIN_MS / 1000
+        try:
+            while not self._closing:
+                self._connections += 1
+                standby = self._take_standby()
+                if standby is not None:
+                    self.ws, task, _ = standby
+                    self._promote()
+                    await task
+                else:
+                    self.ws = self._new_transport()
+                    await self.ws.run(ping_interval=20, ping_timeout=10)
+                if self._closing or not self.reconnect:
+                    break
+                wait, delay = self._backoff(delay)
+                await asyncio.sleep(wait)
+        finally:
+            if keeper:
+                keeper.cancel()
+
+    # -- standby connection ---------------------------------------------------
+    # A second, fully configured session (session.update + prompt) kept open
+    # next to the live one. When the live socket drops, the supervisor swaps it
+    # in and only replays the dialog summary. Idle sessions expire server side,
+    # so the standby is renewed after REALTIME_STANDBY_MAX_AGE_S.
+
+    def _open_standby(self):
+        if self.transport == "asyncio":
+            ws = self._new_transport()
+            runner = self.loop.create_task(ws.run(ping_interval=20, ping_timeout=10))
+        else:
+            ws = self._new_ws_app()
+            runner = threading.Thread(target=ws.run_forever, kwargs={"ping_interval": 20, "ping_timeout": 10},
+                                      name="realtime-standby", daemon=True)
+            runner.start()
+        self._standby_ready = False
+        self._standby = (ws, runner, time.monotonic())
+
+    def _on_standby_message(self, ws, raw):
+        ev = json.loads(raw)
+        typ = ev.get("type")
+        if typ == "session.created":
+            self._send_prompt(ws)
+            if self._standby is not None and ws is self._standby[0]:
+                self._standby_ready = True
+                log_event("api", source="websocket", value="standby_ready")
+        elif typ == "error":
+            log_event("api", source="websocket", value="standby_error", extra=json.dumps(ev))
+
+    async def _standby_keeper(self):
+        while not self._closing:
+            await asyncio.sleep(1)
+            if not self._session_ready:
+                continue
+            standby = self._standby
+            if standby is None:
+                self._open_standby()
+            elif time.monotonic() - standby[2] > REALTIME_STANDBY_MAX_AGE_S:
+                self._standby = None
+                self._standby_ready = False
+                standby[0].close()
+
+    # small, cheap snapshot for the control API
+    def status(self) -> dict:
+        return {
+            "session_ready": self._session_ready,
+            "response_active": self._response_active,
+            "mic_muted": self.mic_muted,
+            "turn_detection": self.turn_detection,
+            "transport": self.transport,
+            "audio_format": self.audio_format,
+            "reconnects": self.reconnects,
+        }
+
+    def stats(self) -> dict:
+        out = {
+            "dispatch": self.dispatcher.stats(),
+            "connection": {
+                "connected": self._session_ready,
+                "reconnects": self.reconnects,
+                "last_downtime_ms": self.last_downtime_ms,
+                "standby_ready": self._standby_ready,
+            },
+        }
+        out["conversation"] = {**self.conversation.stats(), "pending_deletes": len(self._pending_deletes)}
+        if self.say_cache is not None:
+            out["say_cache"] = {**self.say_cache.stats(), "prefill_pending": len(self._say_prefill)}
+        if self.uplink:
+            out["uplink"] = self.uplink.stats()
+        if self.audio_source:
+            out["audio_source"] = self.audio_source.stats()
+        if self.mic_gate:
+            out["mic_gate"] = self.mic_gate.stats()
+        if self.turn_detector:
+            out["turn_detector"] = self.turn_detector.stats()
+        if hasattr(self.ws, "stats"):
+            out["transport"] = self.ws.stats()
+        return out
+
+    def close(self):
+        self._closing = True
+        self._mic_go.set()
+        if self.audio_source:
+            self.audio_source.stop()
+        if self.uplink:
+            self.uplink.close()
+        if self._user_recorder:
+            self._user_recorder.close()
+        if self._standby is not None:
+            self._standby[0].close()
+        if self.ws:
+            self.ws.close()
 
 
     
\ No newline at end of file
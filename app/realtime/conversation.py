@@ -0,0 +1,124 @@
+from collections import OrderedDict, deque
+
+# rough Realtime token rates, only used to decide when to trim
+AUDIO_IN_TOKENS_PER_S = 10
+AUDIO_OUT_TOKENS_PER_S = 20
+CHARS_PER_TOKEN = 4
+SPOKEN_CHARS_PER_S = 15
+
+
+def estimate_tokens(text="", audio_ms=0.0, role="user"):
+    rate = AUDIO_OUT_TOKENS_PER_S if role == "assistant" else AUDIO_IN_TOKENS_PER_S
+    return int(len(text) / CHARS_PER_TOKEN + audio_ms / 1000 * rate) + 1
+
+
+def estimate_spoken_tokens(transcript, role="user"):
+    """Tokens of an audio item from its transcript (audio duration from speaking rate)."""
+    return estimate_tokens(transcript, len(transcript) / SPOKEN_CHARS_PER_S * 1000, role)
+
+
+class ConversationStore:
+    """
+    Bounded conversation state of one RealtimeClient.
+
+      dialog:  ring buffer of the last `max_lines` "User: ..." / "AI: ..."
+               lines (reconnect summaries, logging)
+      items:   the server-side conversation items in order, with a token
+               estimate each. `trim()` returns the oldest items to delete
+               (conversation.item.delete) once there are more than
+               `max_items` or the context exceeds `max_tokens`. System items
+               (the prompt) are pinned and never trimmed.
+
+    The token count is an estimate from text length and audio duration; when
+    the server reports the real context size (response.done usage), the
+    larger of the two is used.
+    """
+
+    def __init__(self, max_items=40, max_tokens=6000, max_lines=200):
+        self.max_items = max_items
+        self.max_tokens = max_tokens
+        self.dialog = deque(maxlen=max_lines)
+        self._items = OrderedDict()         # id -> [tokens, pinned, truncated]
+        self.tokens = 0
+        self.reported_tokens = None
+        self.items_trimmed = 0
+        self.tokens_trimmed = 0
+
+    # -- dialog --------------------------------------------------------------
+
+    def add_line(self, who, text):
+        self.dialog.append(f"{who}: {text}")
+
+    def lines(self, n=None):
+        lines = list(self.dialog)
+        return lines[-n:] if n else lines
+
+    # -- server items ----------------------------------------------------------
+
+    def add_item(self, item_id, tokens=1, pinned=False):
+        if not item_id or item_id in self._items:
+            return
+        self._items[item_id] = [tokens, pinned, False]
+        self.tokens += tokens
+
+    def update_tokens(self, item_id, tokens):
+        entry = self._items.get(item_id)
+        if entry is not None and tokens > entry[0] and not entry[2]:
+            self.tokens += tokens - entry[0]
+            entry[0] = tokens
+
+    def truncate_item(self, item_id, audio_ms):
+        # after conversation.item.truncate only the heard audio stays in context
+        entry = self._items.get(item_id)
+        if entry is not None:
+            tokens = estimate_tokens(audio_ms=audio_ms, role="assistant")
+            self.tokens += tokens - entry[0]
+            entry[0] = tokens
+            entry[2] = True
+
+    def remove_item(self, item_id):
+        entry = self._items.pop(item_id, None)
+        if entry is not None:
+            self.tokens -= entry[0]
+
+    def report_context(self, input_tokens):
+        self.reported_tokens = input_tokens
+
+    def reset_items(self):
+        # new server session: it starts with an empty conversation
+        self._items.clear()
+        self.tokens = 0
+        self.reported_tokens = None
+
+    def trim(self):
+        """Remove and return the ids of the oldest unpinned items over the caps."""
+        total = max(self.tokens, self.reported_tokens or 0)
+        count = len(self._items)
+        out = []
+        removed = 0
+        for item_id, (tokens, pinned, _) in list(self._items.items()):
+            if count <= self.max_items and total - removed <= self.max_tokens:
+                break
+            if pinned:
+                continue
+            out.append(item_id)
+            self.remove_item(item_id)
+            count -= 1
+            removed += tokens
+        if out:
+            self.items_trimmed += len(out)
+            self.tokens_trimmed += removed
+            if self.reported_tokens is not None:
+                # until the next report, assume the server dropped what we deleted
+                self.reported_tokens = max(0, self.reported_tokens - removed)
+        return out
+
+    def stats(self) -> dict:
+        return {
+            "items": len(self._items),
+            "tokens": self.tokens,
+            "reported_tokens": self.reported_tokens,
+            "dialog_lines": len(self.dialog),
+            "items_trimmed": self.items_trimmed,
+            "tokens_trimmed": self.tokens_trimmed,
+        }
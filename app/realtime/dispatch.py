@@ -0,0 +1,127 @@
+import binascii
+import json
+import time
+from util.logger import log_event
+
+AUDIO_DELTA = "response.audio.delta"
+_AUDIO_DELTA_QUOTED = f'"{AUDIO_DELTA}"'
+
+
+def _str_field(raw, key, start=0, end=None):
+    """Value of a top-level string field `"key": "value"` in a JSON text, or None."""
+    i = raw.find(key, start, len(raw) if end is None else end)
+    if i < 0:
+        return None
+    j = raw.find('"', raw.find(":", i + len(key)) + 1)
+    k = raw.find('"', j + 1)
+    return raw[j + 1:k] if j >= 0 and k > j else None
+
+
+class EventDispatcher:
+    """
+    Table-driven dispatch of Realtime server events.
+
+    Handlers are registered per event type with `on(typ, fn)` and called with
+    the parsed event dict, in registration order; integrators can hook any
+    event type the same way without touching RealtimeClient.
+
+    `response.audio.delta` has a fast path: the type is recognised without
+    parsing, the base64 payload is decoded straight from the message text and
+    `on_audio` handlers get `(pcm, response_id, item_id)`. The full event is
+    only parsed if someone registered a plain `on("response.audio.delta")`.
+    With a `decoder` (audio.g711.AudioDecoder for a G.711 output_audio_format)
+    the audio handlers still get 24 kHz PCM16.
+
+    Per event type, the number of events and the time spent in handlers are
+    recorded (`stats()`).
+    """
+
+    def __init__(self, fast_audio=True, decoder=None):
+        self.fast_audio = fast_audio
+        self.decoder = decoder
+        self._handlers = {}
+        self._audio_handlers = []
+        self._counts = {}
+        self._time_ns = {}
+        self._max_ns = {}
+        self.handler_errors = 0
+
+    def on(self, typ, handler):
+        self._handlers.setdefault(typ, []).append(handler)
+        return handler
+
+    def on_audio(self, handler):
+        self._audio_handlers.append(handler)
+        return handler
+
+    def off(self, typ, handler):
+        handlers = self._handlers.get(typ, [])
+        if handler in handlers:
+            handlers.remove(handler)
+
+    def dispatch(self, raw):
+        t0 = time.perf_counter_ns()
+        if isinstance(raw, (bytes, bytearray)):
+            raw = raw.decode()
+
+        if (self.fast_audio and self._audio_handlers and raw.find(_AUDIO_DELTA_QUOTED, 0, 200) >= 0
+                and self._dispatch_audio(raw)):
+            typ = AUDIO_DELTA
+            if AUDIO_DELTA in self._handlers:
+                self._call(typ, json.loads(raw))
+        else:
+            ev = json.loads(raw)
+            typ = ev.get("type", "")
+            if typ == AUDIO_DELTA and self._audio_handlers:
+                pcm = binascii.a2b_base64(ev["delta"])
+                if self.decoder:
+                    pcm = self.decoder.decode(pcm)
+                for h in self._audio_handlers:
+                    self._guard(typ, h, pcm, ev.get("response_id"), ev.get("item_id"))
+            self._call(typ, ev)
+
+        dt = time.perf_counter_ns() - t0
+        self._counts[typ] = self._counts.get(typ, 0) + 1
+        self._time_ns[typ] = self._time_ns.get(typ, 0) + dt
+        if dt > self._max_ns.get(typ, 0):
+            self._max_ns[typ] = dt
+        return typ
+
+    def _dispatch_audio(self, raw):
+        # "delta" is normally the last key, search from the end
+        i = raw.rfind('"delta"')
+        if i < 0:
+            return False
+        j = raw.find('"', raw.find(":", i + 7) + 1)
+        k = raw.find('"', j + 1)
+        pcm = binascii.a2b_base64(raw[j + 1:k])
+        if self.decoder:
+            pcm = self.decoder.decode(pcm)
+        rid = _str_field(raw, '"response_id"', 0, i) or _str_field(raw, '"response_id"', k + 1)
+        item_id = _str_field(raw, '"item_id"', 0, i) or _str_field(raw, '"item_id"', k + 1)
+        for h in self._audio_handlers:
+            self._guard(AUDIO_DELTA, h, pcm, rid, item_id)
+        return True
+
+    def _call(self, typ, ev):
+        for h in self._handlers.get(typ, ()):
+            self._guard(typ, h, ev)
+
+    def _guard(self, typ, handler, *args):
+        try:
+            handler(*args)
+        except Exception as e:
+            self.handler_errors += 1
+            log_event("api", source="dispatcher", value="handler_error",
+                      extra=f"{typ} {getattr(handler, '__name__', handler)}: {type(e).__name__}: {e}")
+
+    def stats(self) -> dict:
+        return {
+            typ: {
+                "count": n,
+                "total_ms": round(self._time_ns[typ] / 1e6, 3),
+                "mean_us": round(self._time_ns[typ] / n / 1e3, 2),
+                "max_us": round(self._max_ns[typ] / 1e3, 2),
+            }
+            for typ, n in self._counts.items()
+        }
@@ -0,0 +1,138 @@
+import asyncio
+import inspect
+import time
+from realtime.client import RealtimeClient
+from util.metrics import registry as default_registry
+from util.logger import log_event
+from util.runtime_monitor import InstrumentedExecutor
+
+STATES = ("created", "running", "closed", "failed")
+
+
+class Session:
+    def __init__(self, session_id, client, speaker):
+        self.id = session_id
+        self.client = client
+        self.speaker = speaker
+        self.task = None
+        self.state = "created"
+        self.error = None
+        self.started_at = None
+        self.ended_at = None
+
+    def status(self) -> dict:
+        end = self.ended_at or time.monotonic()
+        return {
+            "state": self.state,
+            "uptime_s": round(end - self.started_at, 1) if self.started_at else 0.0,
+            "error": self.error,
+        }
+
+
+class SessionManager:
+    """
+    Runs many RealtimeClient sessions in one process, all on one event loop.
+
+    Every session uses the asyncio transport, so sockets and event handling of
+    all sessions share the loop instead of a receive thread each. Blocking
+    work goes to the loop's default executor: `executor` if given, else the
+    one already installed (RuntimeMonitor's InstrumentedExecutor), else a new
+    InstrumentedExecutor. An installed executor is never replaced.
+    Speakers are per-session objects (interfaces.speaker.Speaker,
+    interfaces.speaker_remote.RemoteSpeaker); remote speakers are started on
+    the manager's loop.
+
+    Each session's metrics carry a `session` label, and its client / speaker
+    stats are registered as collectors under that label.
+    """
+
+    def __init__(self, loop=None, registry=None, max_workers=None, executor=None):
+        self.loop = loop or asyncio.get_running_loop()
+        self.registry = registry or default_registry
+        # asyncio has no public getter for the default executor
+        installed = getattr(self.loop, "_default_executor", None)
+        if executor is None:
+            executor = installed or InstrumentedExecutor(max_workers=max_workers, thread_name_prefix="session")
+        if executor is not installed:
+            self.loop.set_default_executor(executor)
+        self.executor = executor
+        self.sessions = {}
+        self.registry.add_collector("sessions", self.stats)
+
+    def add(self, session_id, speaker=None, **client_kwargs) -> RealtimeClient:
+        if session_id in self.sessions:
+            raise ValueError(f"session {session_id!r} already exists")
+        client = RealtimeClient(loop=self.loop, speaker=speaker, transport="asyncio",
+                                session_id=session_id, **client_kwargs)
+        self.sessions[session_id] = Session(session_id, client, speaker)
+        self.registry.add_collector("client", client.stats, session=session_id)
+        if hasattr(speaker, "stats"):
+            self.registry.add_collector("speaker", speaker.stats, session=session_id)
+        return client
+
+    def start(self, session_id) -> None:
+        s = self.sessions[session_id]
+        if s.task is not None:
+            return
+        if hasattr(s.speaker, "start"):
+            # remote speakers without a loop of their own live on ours
+            s.speaker.start(self.loop)
+        s.task = self.loop.create_task(self._run(s))
+
+    def start_all(self) -> None:
+        for session_id in self.sessions:
+            self.start(session_id)
+
+    async def _run(self, s):
+        s.state, s.started_at = "running", time.monotonic()
+        log_event("session", s.id, "started")
+        try:
+            await s.client.run_async()
+            s.state = "closed"
+        except asyncio.CancelledError:
+            s.state = "closed"
+            raise
+        except Exception as e:
+            s.state, s.error = "failed", f"{type(e).__name__}: {e}"
+            self.registry.inc("session_failures_total", session=s.id)
+        finally:
+            s.ended_at = time.monotonic()
+            log_event("session", s.id, s.state, extra=s.error or "")
+
+    async def stop(self, session_id, timeout=2.0) -> None:
+        s = self.sessions.pop(session_id, None)
+        if s is None:
+            return
+        try:
+            s.client.close()
+        except Exception:
+            pass
+        if s.task is not None and not s.task.done():
+            try:
+                await asyncio.wait_for(s.task, timeout)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                pass
+        close = getattr(s.speaker, "close", None)
+        if close is not None:
+            result = close()
+            if inspect.isawaitable(result):
+                await result
+        self.registry.remove_collector("client", session=session_id)
+        self.registry.remove_collector("speaker", session=session_id)
+
+    async def stop_all(self, timeout=2.0) -> None:
+        await asyncio.gather(*(self.stop(sid, timeout) for sid in list(self.sessions)))
+
+    async def shutdown(self) -> None:
+        await self.stop_all()
+        self.registry.remove_collector("sessions")
+        self.executor.shutdown(wait=False)
+
+    def status(self) -> dict:
+        return {sid: s.status() for sid, s in self.sessions.items()}
+
+    def stats(self) -> dict:
+        counts = dict.fromkeys(STATES, 0)
+        for s in self.sessions.values():
+            counts[s.state] += 1
+        return counts
@@ -0,0 +1,141 @@
+import asyncio
+import concurrent.futures
+from collections import deque
+from websockets.asyncio.client import connect
+
+
+class AsyncRealtimeTransport:
+    """
+    websockets-based Realtime transport that runs on the caller's event loop.
+
+    Mirrors the part of websocket.WebSocketApp that RealtimeClient uses
+    (`send`, `close` and the on_open/on_message/on_error/on_close callbacks,
+    which receive the transport as `ws`), so the client handlers work
+    unchanged in both modes.
+
+    Backpressure:
+      * outgoing: `send` enqueues into a bounded queue drained by one sender
+        task. Called from another thread (e.g. the mic uplink) it blocks until
+        there is room, so a slow socket pushes back on the producer instead of
+        growing memory; after `send_timeout` the put is withdrawn and
+        ConnectionError raised, so a late event never goes out after its caller
+        was told it failed. Called on the loop it never blocks: with the queue
+        full, events wait in an overflow deque that moves into the queue in
+        order as it drains, so later control events cannot overtake them.
+      * incoming: messages are handled inline; while a handler runs nothing
+        else is read, and websockets' bounded receive queue throttles TCP.
+    """
+
+    def __init__(self, url, headers, on_open=None, on_message=None, on_error=None, on_close=None,
+                 max_send_queue=256, send_timeout=2.0):
+        self.url = url
+        # websocket-client style "Key: value" strings -> (key, value) pairs
+        self.headers = [tuple(h.split(": ", 1)) for h in headers]
+        self.on_open = on_open
+        self.on_message = on_message
+        self.on_error = on_error
+        self.on_close = on_close
+        self.max_send_queue = max_send_queue
+        self.send_timeout = send_timeout
+
+        self.loop = None
+        self._ws = None
+        self._queue = None
+        self._overflow = deque()
+        self._closing = False
+
+        self.messages_sent = 0
+        self.messages_received = 0
+        self.max_depth = 0
+
+    async def run(self, ping_interval=20, ping_timeout=10):
+        self.loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.max_send_queue)
+        self._overflow.clear()
+        code, reason = None, None
+        try:
+            async with connect(self.url, additional_headers=self.headers, max_size=None,
+                               ping_interval=ping_interval, ping_timeout=ping_timeout) as ws:
+                self._ws = ws
+                sender = asyncio.create_task(self._sender(ws))
+                try:
+                    if self.on_open:
+                        self.on_open(self)
+                    async for raw in ws:
+                        self.messages_received += 1
+                        self.on_message(self, raw)
+                finally:
+                    sender.cancel()
+                    code, reason = ws.close_code, ws.close_reason
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if self.on_error:
+                self.on_error(self, e)
+        finally:
+            self._ws = None
+        if self.on_close:
+            self.on_close(self, code, reason)
+
+    async def _sender(self, ws):
+        while True:
+            data = await self._queue.get()
+            self._refill()
+            if isinstance(data, (bytes, bytearray)):
+                # prebuilt JSON payloads arrive as bytes but must go out as text frames
+                await ws.send(data, text=True)
+            else:
+                await ws.send(data)
+            self.messages_sent += 1
+
+    def _refill(self):
+        while self._overflow and not self._queue.full():
+            self._queue.put_nowait(self._overflow.popleft())
+
+    async def _put(self, data):
+        await asyncio.wait_for(self._queue.put(data), self.send_timeout)
+
+    def _in_loop(self):
+        try:
+            return asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            return False
+
+    def send(self, data) -> None:
+        if self._ws is None or self._closing:
+            raise ConnectionError("realtime transport is not connected")
+        if self._in_loop():
+            # control events must not be lost or reordered: queue behind the overflow
+            if self._overflow or self._queue.full():
+                self._overflow.append(data)
+            else:
+                self._queue.put_nowait(data)
+        else:
+            # the timeout runs on the loop, so a put that gives up is withdrawn atomically
+            fut = asyncio.run_coroutine_threadsafe(self._put(data), self.loop)
+            try:
+                fut.result(self.send_timeout + 1.0)
+            except (asyncio.TimeoutError, concurrent.futures.TimeoutError) as e:
+                fut.cancel()
+                raise ConnectionError(f"realtime send queue full for {self.send_timeout}s") from e
+        depth = self._queue.qsize() + len(self._overflow)
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+    def close(self) -> None:
+        self._closing = True
+        ws = self._ws
+        if ws is None:
+            return
+        if self._in_loop():
+            self.loop.create_task(ws.close())
+        else:
+            asyncio.run_coroutine_threadsafe(ws.close(), self.loop)
+
+    def stats(self) -> dict:
+        return {
+            "send_queue_depth": (self._queue.qsize() if self._queue else 0) + len(self._overflow),
+            "max_send_queue_depth": self.max_depth,
+            "messages_sent": self.messages_sent,
+            "messages_received": self.messages_received,
+        }
@@ -0,0 +1,171 @@
+import threading
+import time
+from collections import OrderedDict
+from util.lru import LruDict
+from util.metrics import registry as default_registry
+
+_MAX_TURNS = 64
+_BYTES_PER_MS = 48
+_RATIO_BUCKETS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+
+
+class TurnMetrics:
+    """
+    Links the events of each conversational turn by response id and feeds
+    latency histograms (seconds) into a MetricsRegistry:
+
+      turn_stop_to_transcript_seconds          VAD stop -> transcription completed
+      turn_stop_to_response_created_seconds    VAD stop -> response.created
+      turn_stop_to_first_audio_seconds         VAD stop -> first audio delta (time to first audio)
+      turn_stop_to_first_playback_seconds      VAD stop -> first audible playback
+      turn_created_to_first_audio_seconds      response.created -> first audio delta
+      turn_response_duration_seconds           response.created -> response.done
+      interrupt_to_silence_seconds             barge-in speech start -> speaker silent
+
+    and, from the speaker's playback clock ("item_played"), how much of the
+    generated agent audio was actually heard:
+
+      agent_audio_played_ratio                 played / generated per item
+      agent_audio_generated_seconds_total
+      agent_audio_played_seconds_total
+
+    Hooks into the client through its dispatcher and, when the speaker backend
+    supports it, the speaker's playback listeners (called from the audio
+    callback thread, hence the lock).
+    """
+
+    def __init__(self, registry=None, **labels):
+        self.registry = registry or default_registry
+        self.labels = labels
+        self._lock = threading.Lock()
+        self._turns = OrderedDict()
+        self._last_stop = None
+        self._transcript_pending = False
+        self._latest_rid = None
+        self._received = LruDict(maxsize=16)    # item_id -> audio bytes received
+
+        r = self.registry
+        r.describe("turn_stop_to_first_audio_seconds", "VAD speech stop to first response audio delta")
+        r.describe("turn_stop_to_first_playback_seconds", "VAD speech stop to first audible agent playback")
+        r.describe("interrupt_to_silence_seconds", "Barge-in speech start to speaker silence")
+        r.describe("agent_audio_played_ratio", "Share of an item's generated agent audio that was played")
+        r.describe("agent_audio_generated_seconds_total", "Agent audio received from the model")
+        r.describe("agent_audio_played_seconds_total", "Agent audio played to the user")
+
+    def attach(self, client):
+        d = client.dispatcher
+        d.on("input_audio_buffer.speech_started", self._on_speech_started)
+        d.on("input_audio_buffer.speech_stopped", self._on_speech_stopped)
+        d.on("conversation.item.input_audio_transcription.completed", self._on_transcript)
+        d.on("response.created", self._on_response_created)
+        d.on_audio(self._on_audio)
+        d.on("response.done", self._on_response_done)
+        d.on("error", self._on_error)
+        if hasattr(client.speaker, "add_listener"):
+            client.speaker.add_listener(self._on_speaker)
+
+    # client-side turn detection: no server VAD events, the client reports them
+    def speech_started(self):
+        self._on_speech_started(None)
+
+    def speech_stopped(self):
+        self._on_speech_stopped(None)
+
+    def _observe(self, name, seconds):
+        if seconds is not None and seconds >= 0:
+            self.registry.observe(name, seconds, **self.labels)
+
+    # -- dispatcher hooks ----------------------------------------------------
+
+    def _on_speech_started(self, ev):
+        self.registry.inc("speech_started_total", **self.labels)
+
+    def _on_speech_stopped(self, ev):
+        with self._lock:
+            self._last_stop = time.monotonic()
+            self._transcript_pending = True
+
+    def _on_transcript(self, ev):
+        now = time.monotonic()
+        with self._lock:
+            if not self._transcript_pending or self._last_stop is None:
+                return
+            self._transcript_pending = False
+            stop = self._last_stop
+        self._observe("turn_stop_to_transcript_seconds", now - stop)
+
+    def _on_response_created(self, ev):
+        now = time.monotonic()
+        rid = ev.get("response", {}).get("id")
+        # say() cache prefills run out-of-band and are not conversational turns
+        if not rid or (ev["response"].get("metadata") or {}).get("say_prefill"):
+            return
+        with self._lock:
+            if rid in self._turns:
+                return
+            # a response without a preceding VAD stop (e.g. say()) has no stop time
+            stop, self._last_stop = self._last_stop, None
+            self._turns[rid] = {"stop": stop, "created": now}
+            self._latest_rid = rid
+            while len(self._turns) > _MAX_TURNS:
+                self._turns.popitem(last=False)
+        self.registry.inc("turns_total", **self.labels)
+        if stop is not None:
+            self._observe("turn_stop_to_response_created_seconds", now - stop)
+
+    def _on_audio(self, data, rid, item_id):
+        if item_id:
+            with self._lock:
+                self._received[item_id] = self._received.get(item_id, 0) + len(data)
+        turn = self._turns.get(rid or self._latest_rid)
+        if turn is None or "first_audio" in turn:
+            return
+        now = time.monotonic()
+        turn["first_audio"] = now
+        self._observe("turn_created_to_first_audio_seconds", now - turn["created"])
+        if turn["stop"] is not None:
+            self._observe("turn_stop_to_first_audio_seconds", now - turn["stop"])
+
+    def _on_response_done(self, ev):
+        now = time.monotonic()
+        resp = ev.get("response", {})
+        turn = self._turns.get(resp.get("id"))
+        self.registry.inc("responses_total", status=resp.get("status", "unknown"), **self.labels)
+        if turn is not None and "done" not in turn:
+            turn["done"] = now
+            self._observe("turn_response_duration_seconds", now - turn["created"])
+
+    def _on_error(self, ev):
+        err = ev.get("error", {}) if isinstance(ev.get("error"), dict) else {}
+        self.registry.inc("api_errors_total", type=err.get("type", "unknown"), **self.labels)
+
+    # -- speaker listener (audio callback thread) -----------------------------
+
+    def _on_speaker(self, kind, value):
+        if kind == "playback_start":
+            with self._lock:
+                turn = self._turns.get(self._latest_rid)
+                if turn is None or "playback" in turn or "first_audio" not in turn:
+                    return
+                turn["playback"] = value
+            if turn["stop"] is not None:
+                self._observe("turn_stop_to_first_playback_seconds", value - turn["stop"])
+        elif kind == "interrupt_silenced":
+            with self._lock:
+                turn = self._turns.get(self._latest_rid)
+                if turn is not None:
+                    turn["interrupted"] = True
+            self.registry.inc("interruptions_total", **self.labels)
+            self._observe("interrupt_to_silence_seconds", value / 1000)
+        elif kind == "item_played":
+            item_id, played_ms, written_ms = value
+            with self._lock:
+                received_ms = self._received.pop(item_id, 0) / _BYTES_PER_MS
+            # audio dropped before it reached the speaker was generated but not heard
+            generated_ms = max(received_ms, written_ms)
+            if generated_ms <= 0:
+                return
+            self.registry.inc("agent_audio_generated_seconds_total", generated_ms / 1000, **self.labels)
+            self.registry.inc("agent_audio_played_seconds_total", played_ms / 1000, **self.labels)
+            self.registry.observe("agent_audio_played_ratio", min(1.0, played_ms / generated_ms),
+                                  buckets=_RATIO_BUCKETS, **self.labels)
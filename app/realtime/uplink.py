@@ -0,0 +1,194 @@
+import binascii
+import json
+import queue
+import threading
+import time
+from util.logger import log_event
+from util.runtime_monitor import BlockTimer
+
+# input_audio_buffer.append, split around the base64 audio so a message is
+# PREFIX + b64 + SUFFIX instead of a dict + json.dumps per frame
+_APPEND_PREFIX, _APPEND_SUFFIX = (
+    json.dumps({"type": "input_audio_buffer.append", "audio": "\0"}).encode().split(b"\\u0000")
+)
+
+
+def encode_append(pcm) -> bytes:
+    """`input_audio_buffer.append` event for `pcm` as UTF-8 JSON bytes."""
+    return b"".join((_APPEND_PREFIX, binascii.b2a_base64(pcm, newline=False), _APPEND_SUFFIX))
+
+
+class AudioUplink:
+    """
+    Decouples mic capture from the websocket.
+
+    `push` is called on the capture thread and never blocks: chunks go into a
+    bounded queue (full queue = chunk dropped and counted). A sender thread
+    coalesces chunks into one `input_audio_buffer.append` per `interval_ms`
+    and hands the UTF-8 JSON payload (bytes) to `send`, which must send it as
+    a text frame (websocket-client's `ws.send` does).
+
+    `speed` > 1 is for sources that deliver audio faster than real time (file
+    replay): batch size and queue bound scale with it, so an append still
+    goes out every `interval_ms` of wall time without drops.
+
+    `encoder` (audio.g711.AudioEncoder) converts each batch to the session's
+    input_audio_format on the sender thread; default is raw PCM16.
+    `reset_encoder` (new connection) resets it there before the next batch.
+    `wire_bytes` counts the encoded audio (as RemoteSpeaker does),
+    `payload_bytes` the JSON messages that carry it.
+
+    While `muted`, pushed chunks (`chunks_muted`) and batches already pending
+    when the mute came (`muted_dropped`) are discarded.
+
+    `send_event` queues a control event (e.g. input_audio_buffer.commit)
+    behind the audio pushed so far: the pending batch goes out first, so the
+    server has all audio up to that point. Events are never dropped.
+    """
+
+    def __init__(self, send, interval_ms=40, max_queue_ms=1000, rate=24000, chunk_ms=10, speed=1.0, encoder=None):
+        self.send = send
+        self.encoder = encoder
+        self.interval = interval_ms / 1000
+        self._batch_bytes = int(rate * interval_ms * speed / 1000) * 2
+        # bounded for audio in push(); unbounded so control events always fit
+        self._max_chunks = max(1, int(max_queue_ms * speed) // chunk_ms)
+        self._q = queue.Queue()
+        self._closed = False
+        self.muted = False
+        self._encoder_reset = False
+
+        self.messages_sent = 0
+        self.bytes_sent = 0
+        self.wire_bytes = 0
+        self.payload_bytes = 0
+        self.chunks_dropped = 0
+        self.chunks_muted = 0
+        self.muted_dropped = 0
+        self.events_sent = 0
+        self.send_errors = 0
+        self.max_depth = 0
+        # how long `send` blocks (socket write buffer full = slow uplink)
+        self.send_timer = BlockTimer()
+
+        self._thread = threading.Thread(target=self._run, name="audio-uplink", daemon=True)
+        self._thread.start()
+
+    def push(self, chunk: bytes) -> None:
+        if self._closed:
+            return
+        if self.muted:
+            self.chunks_muted += 1
+            return
+        depth = self._q.qsize()
+        if depth >= self._max_chunks:
+            self.chunks_dropped += 1
+            return
+        self._q.put_nowait(chunk)
+        depth += 1
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+    def reset_encoder(self) -> None:
+        self._encoder_reset = True
+
+    def send_event(self, payload: bytes) -> None:
+        if not self._closed:
+            self._q.put_nowait((payload,))
+
+    def _run(self):
+        batch = bytearray()
+        while True:
+            try:
+                chunk = self._q.get(timeout=0.5)
+            except queue.Empty:
+                if self._closed:
+                    break
+                continue
+            if chunk is None:
+                break
+            event = None
+            if isinstance(chunk, tuple):
+                event = chunk[0]
+            else:
+                batch += chunk
+                deadline = time.monotonic() + self.interval
+                # coalesce until the interval is full or has elapsed (or an event is due)
+                while len(batch) < self._batch_bytes:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        chunk = self._q.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                    if chunk is None:
+                        self._closed = True
+                        break
+                    if isinstance(chunk, tuple):
+                        event = chunk[0]
+                        break
+                    batch += chunk
+            if batch:
+                self._send(batch)
+                batch.clear()
+            if event is not None:
+                self._send_event(event)
+            if self._closed:
+                break
+
+    def _send(self, pcm):
+        if self.muted:
+            self.muted_dropped += 1
+            return
+        if self._encoder_reset:
+            self._encoder_reset = False
+            if self.encoder:
+                self.encoder.reset()
+        wire = self.encoder.encode(pcm) if self.encoder else pcm
+        payload = encode_append(wire)
+        t0 = time.perf_counter()
+        try:
+            self.send(payload)
+        except Exception as e:
+            self.send_errors += 1
+            if self.send_errors == 1 or self.send_errors % 100 == 0:
+                log_event("mic", "uplink", "send_error", extra=f"{type(e).__name__}: {e} (x{self.send_errors})")
+            return
+        self.send_timer.observe(time.perf_counter() - t0)
+        self.messages_sent += 1
+        self.bytes_sent += len(pcm)
+        self.wire_bytes += len(wire)
+        self.payload_bytes += len(payload)
+
+    def _send_event(self, payload):
+        try:
+            self.send(payload)
+        except Exception as e:
+            self.send_errors += 1
+            log_event("mic", "uplink", "send_error", extra=f"{type(e).__name__}: {e} (event)")
+            return
+        self.events_sent += 1
+
+    def close(self):
+        self._closed = True
+        try:
+            self._q.put_nowait(None)
+        except queue.Full:
+            pass
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self._q.qsize(),
+            "max_depth": self.max_depth,
+            "messages_sent": self.messages_sent,
+            "bytes_sent": self.bytes_sent,
+            "wire_bytes": self.wire_bytes,
+            "payload_bytes": self.payload_bytes,
+            "chunks_dropped": self.chunks_dropped,
+            "chunks_muted": self.chunks_muted,
+            "muted_dropped": self.muted_dropped,
+            "events_sent": self.events_sent,
+            "send_errors": self.send_errors,
+            "send": self.send_timer.stats(),
+        }
@@ -0,0 +1,501 @@
+"""
+Local stand-in for the OpenAI Realtime API.
+
+Speaks the subset of the Realtime event protocol that RealtimeClient handles,
+with scripted timing and audio, so the client can be exercised and benchmarked
+without network access.
+
+    python -m sim.realtime_server --port 8800 --turns 20
+"""
+import argparse
+import asyncio
+import base64
+import contextlib
+import json
+import math
+import random
+import time
+import wave
+from array import array
+
+import numpy as np
+import websockets
+
+from audio.g711 import AudioDecoder, AudioEncoder
+
+SAMPLE_RATE = 24000
+SAMPLE_WIDTH = 2
+
+
+def sine_pcm16(duration_ms, freq=220.0, amplitude=0.3, rate=SAMPLE_RATE):
+    """Mono PCM16 sine tone, used as default scripted agent audio."""
+    n = int(rate * duration_ms / 1000)
+    peak = int(32767 * amplitude)
+    buf = array("h", (int(peak * math.sin(2 * math.pi * freq * i / rate)) for i in range(n)))
+    return buf.tobytes()
+
+
+def load_wav_pcm16(path):
+    """Read a mono 24 kHz PCM16 WAV file as raw bytes."""
+    with wave.open(str(path), "rb") as wav:
+        if wav.getsampwidth() != SAMPLE_WIDTH or wav.getnchannels() != 1 or wav.getframerate() != SAMPLE_RATE:
+            raise ValueError(f"{path}: expected mono 16-bit {SAMPLE_RATE} Hz")
+        return wav.readframes(wav.getnframes())
+
+
+class TurnScript:
+    """
+    Timing of one scripted conversation turn (all values in ms):
+
+      speech_started --speech_ms--> speech_stopped --response_delay_ms-->
+      response.created --first_audio_ms--> audio deltas (chunk_ms each, paced
+      at `pace` x real time; 0 = as fast as possible) --> response.done
+      --gap_ms--> next turn
+
+    `jitter_ms` adds uniform random jitter to every scripted delay.
+    `error_every` injects an `error` event after every n-th turn.
+    `drop_every` closes the connection (code 1011) after every n-th turn.
+    `ms_per_1k_ctx` adds response delay per 1000 tokens of conversation
+    context, like a real model whose latency grows with the context.
+    With `wait_for_audio`, turns only start once the client streams input
+    audio, like the real server (an idle standby connection stays quiet).
+    With `audio_vad`, there are no scripted turns: an energy VAD over the
+    received input audio (in audio time, so replay faster than real time
+    works) starts a turn after `vad_silence_ms` of silence following speech.
+    """
+
+    def __init__(self, turns=10, speech_ms=800, response_delay_ms=120, first_audio_ms=150,
+                 audio_ms=1200, chunk_ms=20, pace=1.0, gap_ms=400, jitter_ms=0,
+                 transcript="This is a scripted reply.", audio=None, error_every=0, seed=0,
+                 drop_every=0, wait_for_audio=False, ms_per_1k_ctx=0.0,
+                 audio_vad=False, vad_threshold=0.02, vad_silence_ms=500, vad_min_speech_ms=200):
+        self.turns = turns
+        self.speech_ms = speech_ms
+        self.response_delay_ms = response_delay_ms
+        self.first_audio_ms = first_audio_ms
+        self.audio_ms = audio_ms
+        self.chunk_ms = chunk_ms
+        self.pace = pace
+        self.gap_ms = gap_ms
+        self.jitter_ms = jitter_ms
+        self.transcript = transcript
+        self.audio = audio
+        self.error_every = error_every
+        self.seed = seed
+        self.drop_every = drop_every
+        self.wait_for_audio = wait_for_audio
+        self.ms_per_1k_ctx = ms_per_1k_ctx
+        self.audio_vad = audio_vad
+        self.vad_threshold = vad_threshold
+        self.vad_silence_ms = vad_silence_ms
+        self.vad_min_speech_ms = vad_min_speech_ms
+
+
+class _AudioVad:
+    """Energy VAD over 10 ms frames of PCM16 input; positions are ms of received audio."""
+
+    FRAME_BYTES = SAMPLE_RATE // 100 * SAMPLE_WIDTH
+
+    def __init__(self, threshold, silence_ms, min_speech_ms):
+        self.threshold = threshold * 32768
+        self.silence_frames = max(1, int(silence_ms // 10))
+        self.min_speech_frames = max(1, int(min_speech_ms // 10))
+        self._buf = bytearray()
+        self._frame = 0
+        self._speech_start = None
+        self._voiced = 0
+        self._silent = 0
+
+    def feed(self, pcm):
+        """Returns [("started" | "stopped", audio_ms), ...] for the new audio."""
+        self._buf += pcm
+        n = len(self._buf) // self.FRAME_BYTES
+        if not n:
+            return []
+        frames = np.frombuffer(bytes(self._buf[:n * self.FRAME_BYTES]), dtype="<i2").reshape(n, -1)
+        del self._buf[:n * self.FRAME_BYTES]
+        loud = np.sqrt((frames.astype(np.float32) ** 2).mean(axis=1)) > self.threshold
+        events = []
+        for is_loud in loud:
+            self._frame += 1
+            if self._speech_start is None:
+                if is_loud:
+                    self._speech_start = self._frame - 1
+                    self._voiced, self._silent = 1, 0
+                    events.append(("started", self._speech_start * 10))
+                continue
+            if is_loud:
+                self._voiced += 1
+                self._silent = 0
+            else:
+                self._silent += 1
+                if self._silent >= self.silence_frames:
+                    # too short for a turn (a click): stopped again without a response
+                    kind = "stopped" if self._voiced >= self.min_speech_frames else "cancelled"
+                    events.append((kind, (self._frame - self._silent) * 10))
+                    self._speech_start = None
+        return events
+
+
+class _Conversation:
+    """
+    Server-side state of one connection: conversation items (item id ->
+    estimated tokens), the audio formats and turn detection set by
+    `session.update`, the uncommitted input audio and the running responses.
+    """
+
+    def __init__(self):
+        self.items = {}
+        self._seq = 0
+        self.output_audio_format = "pcm16"
+        self.input_decoder = None
+        self.server_vad = True
+        self.input_ms = 0.0
+        self.responses = {}     # rid -> task
+        self.pending_log = {}   # turn log of the last commit, for the response.create that follows
+
+    def add(self, item, tokens):
+        if not item.get("id"):
+            self._seq += 1
+            item = {**item, "id": f"item_c{self._seq:05d}"}
+        self.items[item["id"]] = tokens
+        return item
+
+    @property
+    def tokens(self):
+        return sum(self.items.values())
+
+
+class RealtimeStandInServer:
+    """
+    Scripted Realtime API server. Runs `script.turns` turns per connection
+    after the client has sent `session.update`, and answers `response.create`
+    (RealtimeClient.say) with a scripted response. With `turn_detection: null`
+    in the session the client ends turns itself: `input_audio_buffer.commit`
+    turns the audio appended since into a user item. `response.cancel` stops
+    a response (response.done with status "cancelled").
+
+    Each connection keeps a conversation (items with rough token counts) that
+    `conversation.item.create` / `.delete` and the scripted turns modify;
+    response.done reports its size as `usage.input_tokens`.
+
+    Send times of every event are kept in `turn_log` (time.perf_counter, so
+    they can be compared with timestamps taken in the same process).
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, script=None):
+        self.host = host
+        self.port = port
+        self.script = script or TurnScript()
+        self.turn_log = []
+        self.received = {}
+        self.audio_bytes_in = 0
+        self.connections = 0
+        self.drops = 0
+        self.max_context_items = 0
+        self.vad_turns = 0
+        self.responses_cancelled = 0
+        self.finished = asyncio.Event()
+        self._server = None
+        self._rng = random.Random(self.script.seed)
+        self._audio = self.script.audio or sine_pcm16(self.script.audio_ms)
+        self._encoded = {"pcm16": self._audio}
+        self._rid_seq = 0
+
+    @property
+    def url(self):
+        return f"ws://{self.host}:{self.port}"
+
+    async def start(self):
+        self._server = await websockets.serve(self._handler, self.host, self.port, max_size=None)
+        self.port = self._server.sockets[0].getsockname()[1]
+        print(f"[StandIn] Realtime stand-in listening on {self.url}")
+        return self
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    # -- helpers -------------------------------------------------------------
+
+    async def _sleep(self, ms):
+        if self.script.jitter_ms:
+            ms += self._rng.uniform(-self.script.jitter_ms, self.script.jitter_ms)
+        if ms > 0:
+            await asyncio.sleep(ms / 1000)
+
+    async def _send(self, ws, ev, log=None):
+        await ws.send(json.dumps(ev))
+        if log is not None:
+            log.setdefault(ev["type"], time.perf_counter())
+
+    def _audio_as(self, fmt):
+        """Scripted audio in `fmt` (encoded once per format) and its bytes per ms."""
+        encoder = AudioEncoder(fmt)
+        if fmt not in self._encoded:
+            self._encoded[fmt] = encoder.encode(self._audio)
+        return self._encoded[fmt], encoder.bytes_per_ms
+
+    def _next_rid(self):
+        self._rid_seq += 1
+        return f"resp_{self._rid_seq:05d}"
+
+    # -- protocol ------------------------------------------------------------
+
+    async def _handler(self, ws, *_):
+        self.connections += 1
+        session_ready = asyncio.Event()
+        audio_seen = asyncio.Event()
+        conv = _Conversation()
+        s = self.script
+        vad = _AudioVad(s.vad_threshold, s.vad_silence_ms, s.vad_min_speech_ms) if s.audio_vad else None
+        await self._send(ws, {"type": "session.created", "session": {"id": "sess_standin"}})
+        turns = asyncio.create_task(self._run_turns(ws, session_ready, audio_seen, conv))
+        try:
+            async for raw in ws:
+                ev = json.loads(raw)
+                typ = ev.get("type", "")
+                self.received[typ] = self.received.get(typ, 0) + 1
+
+                if typ == "input_audio_buffer.append":
+                    self.audio_bytes_in += len(ev.get("audio", "")) * 3 // 4
+                    audio_seen.set()
+                    if not conv.server_vad:
+                        conv.input_ms += len(ev.get("audio", "")) * 3 / 4 / (
+                            conv.input_decoder.bytes_per_ms if conv.input_decoder else SAMPLE_RATE * SAMPLE_WIDTH / 1000)
+                    elif vad is not None:
+                        pcm = base64.b64decode(ev.get("audio", ""))
+                        if conv.input_decoder is not None:
+                            pcm = conv.input_decoder.decode(pcm)
+                        for kind, audio_ms in vad.feed(pcm):
+                            await self._on_vad(ws, conv, kind, audio_ms)
+                elif typ == "session.update":
+                    session = ev.get("session", {})
+                    conv.output_audio_format = session.get("output_audio_format", conv.output_audio_format)
+                    fmt = session.get("input_audio_format")
+                    if fmt:
+                        conv.input_decoder = AudioDecoder(fmt) if fmt != "pcm16" else None
+                    if "turn_detection" in session:
+                        conv.server_vad = session["turn_detection"] is not None
+                    await self._send(ws, {"type": "session.updated", "session": ev.get("session", {})})
+                    session_ready.set()
+                elif typ == "conversation.item.create":
+                    item = ev.get("item", {})
+                    text = "".join(c.get("text", "") for c in item.get("content", []))
+                    item = conv.add(item, len(text) // 4 + 1)
+                    await self._send(ws, {"type": "conversation.item.created", "item": item})
+                elif typ == "conversation.item.delete":
+                    item_id = ev.get("item_id")
+                    if conv.items.pop(item_id, None) is None:
+                        await self._send(ws, {"type": "error", "error": {
+                            "type": "invalid_request_error", "message": f"unknown item {item_id!r}"}})
+                    else:
+                        await self._send(ws, {"type": "conversation.item.deleted", "item_id": item_id})
+                elif typ == "response.create":
+                    log, conv.pending_log = conv.pending_log, {}
+                    asyncio.create_task(self._respond(ws, log, conv, ev.get("response") or {}))
+                elif typ == "input_audio_buffer.commit":
+                    await self._on_commit(ws, conv)
+                elif typ == "input_audio_buffer.clear":
+                    conv.input_ms = 0.0
+                    await self._send(ws, {"type": "input_audio_buffer.cleared"})
+                elif typ == "response.cancel":
+                    rid = ev.get("response_id") or next(reversed(conv.responses), None)
+                    task = conv.responses.get(rid)
+                    if task is None:
+                        await self._send(ws, {"type": "error", "error": {
+                            "type": "invalid_request_error", "message": "no active response to cancel"}})
+                    else:
+                        task.cancel()
+                elif typ == "conversation.item.truncate":
+                    pass
+                else:
+                    await self._send(ws, {"type": "error", "error": {
+                        "type": "invalid_request_error", "message": f"unsupported event {typ!r}"}})
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            turns.cancel()
+
+    async def _on_vad(self, ws, conv, kind, audio_ms):
+        item_id = f"item_v{self.vad_turns:05d}"
+        if kind == "started":
+            await self._send(ws, {"type": "input_audio_buffer.speech_started", "item_id": item_id,
+                                  "audio_start_ms": audio_ms})
+            return
+        await self._send(ws, {"type": "input_audio_buffer.speech_stopped", "item_id": item_id,
+                              "audio_end_ms": audio_ms})
+        if kind != "stopped":
+            return
+        self.vad_turns += 1
+        log = {"turn": self.vad_turns, "speech_stopped": time.perf_counter()}
+        self.turn_log.append(log)
+        item = conv.add({"id": item_id, "type": "message", "role": "user"}, 10)
+        await self._send(ws, {"type": "conversation.item.created", "item": item})
+        await self._send(ws, {"type": "conversation.item.input_audio_transcription.completed",
+                              "item_id": item_id, "transcript": f"Detected user turn {self.vad_turns}."})
+        asyncio.create_task(self._respond(ws, log, conv))
+
+    async def _on_commit(self, ws, conv):
+        # client-side turn detection: the committed audio becomes a user turn
+        if conv.input_ms < 100:
+            await self._send(ws, {"type": "error", "error": {
+                "type": "invalid_request_error",
+                "message": f"buffer too small: {conv.input_ms:.0f} ms, at least 100 ms required"}})
+            return
+        self.vad_turns += 1
+        item_id = f"item_v{self.vad_turns:05d}"
+        log = {"turn": self.vad_turns, "committed": time.perf_counter(), "input_ms": conv.input_ms}
+        self.turn_log.append(log)
+        # the response.create that follows belongs to this turn
+        conv.pending_log = log
+        item = conv.add({"id": item_id, "type": "message", "role": "user"}, int(conv.input_ms / 100) + 1)
+        conv.input_ms = 0.0
+        await self._send(ws, {"type": "input_audio_buffer.committed", "item_id": item_id})
+        await self._send(ws, {"type": "conversation.item.created", "item": item})
+        await self._send(ws, {"type": "conversation.item.input_audio_transcription.completed",
+                              "item_id": item_id, "transcript": f"Committed user turn {self.vad_turns}."})
+
+    async def _run_turns(self, ws, session_ready, audio_seen, conv):
+        s = self.script
+        if s.audio_vad:
+            return
+        await session_ready.wait()
+        if s.wait_for_audio:
+            await audio_seen.wait()
+        try:
+            for i in range(s.turns):
+                log = {"turn": i}
+                self.turn_log.append(log)
+                await self._send(ws, {"type": "input_audio_buffer.speech_started", "item_id": f"item_u{i}"}, log)
+                await self._sleep(s.speech_ms)
+                await self._send(ws, {"type": "input_audio_buffer.speech_stopped", "item_id": f"item_u{i}"}, log)
+                item = conv.add({"id": f"item_u{i}", "type": "message", "role": "user"}, int(s.speech_ms / 100) + 1)
+                await self._send(ws, {"type": "conversation.item.created", "item": item})
+                await self._send(ws, {"type": "conversation.item.input_audio_transcription.completed",
+                                      "item_id": item["id"], "transcript": f"Scripted user turn {i}."})
+                # own task: response.cancel stops the response, not the script
+                await asyncio.create_task(self._respond(ws, log, conv))
+                if s.error_every and (i + 1) % s.error_every == 0:
+                    await self._send(ws, {"type": "error", "error": {
+                        "type": "server_error", "message": "scripted error"}}, log)
+                if s.drop_every and (i + 1) % s.drop_every == 0:
+                    self.drops += 1
+                    await ws.close(1011, "scripted drop")
+                    return
+                await self._sleep(s.gap_ms)
+        except websockets.ConnectionClosed:
+            return
+        self.finished.set()
+
+    async def _respond(self, ws, log, conv, request=None):
+        # `request`: the client's response.create parameters; metadata is echoed,
+        # conversation "none" (out-of-band) leaves the conversation untouched.
+        # Runs as its own task, so response.cancel can stop it.
+        s = self.script
+        request = request or {}
+        rid = self._next_rid()
+        log["rid"] = rid
+        conv.responses[rid] = asyncio.current_task()
+        response = {"id": rid, "status": "in_progress"}
+        if request.get("metadata"):
+            response["metadata"] = request["metadata"]
+        output = []
+        try:
+            context = conv.tokens
+            self.max_context_items = max(self.max_context_items, len(conv.items))
+            await self._sleep(s.response_delay_ms + context / 1000 * s.ms_per_1k_ctx)
+            await self._send(ws, {"type": "response.created", "response": response}, log)
+            item = {"id": f"item_{rid}", "type": "message", "role": "assistant"}
+            if request.get("conversation") != "none":
+                item = conv.add(item, int(s.audio_ms / 50 + len(s.transcript) / 4) + 1)
+                await self._send(ws, {"type": "conversation.item.created", "item": item})
+            output.append(item)
+            await self._sleep(s.first_audio_ms)
+
+            audio, bytes_per_ms = self._audio_as(conv.output_audio_format)
+            step = int(bytes_per_ms * s.chunk_ms)
+            n_chunks = max(1, math.ceil(len(audio) / step))
+
+            # spread transcript words evenly over the audio chunks
+            words = s.transcript.split()
+            words_at = {}
+            for k, word in enumerate(words):
+                words_at.setdefault(k * n_chunks // len(words), []).append(word)
+
+            for n, off in enumerate(range(0, len(audio), step)):
+                await self._send(ws, {
+                    "type": "response.audio.delta",
+                    "response_id": rid,
+                    "item_id": f"item_{rid}",
+                    "delta": base64.b64encode(audio[off:off + step]).decode(),
+                }, log)
+                if n in words_at:
+                    await self._send(ws, {"type": "response.audio_transcript.delta", "response_id": rid,
+                                          "delta": " ".join(words_at[n]) + " "}, log)
+                if s.pace > 0:
+                    await asyncio.sleep(s.chunk_ms / 1000 / s.pace)
+            await self._send(ws, {"type": "response.done", "response": {
+                **response, "status": "completed", "output": output,
+                "usage": {"input_tokens": context, "output_tokens": conv.items.get(item["id"], 0)}}}, log)
+        except asyncio.CancelledError:
+            self.responses_cancelled += 1
+            log["cancelled"] = time.perf_counter()
+            with contextlib.suppress(websockets.ConnectionClosed):
+                await self._send(ws, {"type": "response.done", "response": {
+                    **response, "status": "cancelled", "output": output}})
+        finally:
+            conv.responses.pop(rid, None)
+
+
+async def _serve(host, port, script):
+    server = await RealtimeStandInServer(host, port, script).start()
+    try:
+        await asyncio.Future()
+    finally:
+        await server.stop()
+
+
+def serve_forever(host, port, script):
+    """Blocking entry point, e.g. for running the stand-in in a child process."""
+    asyncio.run(_serve(host, port, script))
+
+
+def add_script_args(parser):
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--speech-ms", type=float, default=800)
+    parser.add_argument("--response-delay-ms", type=float, default=120)
+    parser.add_argument("--first-audio-ms", type=float, default=150)
+    parser.add_argument("--audio-ms", type=float, default=1200)
+    parser.add_argument("--chunk-ms", type=float, default=20)
+    parser.add_argument("--pace", type=float, default=1.0, help="audio pacing vs real time, 0 = unpaced")
+    parser.add_argument("--gap-ms", type=float, default=400)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--wav", default=None, help="mono 24 kHz PCM16 WAV used as agent audio")
+    parser.add_argument("--drop-every", type=int, default=0, help="close the connection after every n-th turn")
+    parser.add_argument("--wait-for-audio", action="store_true", help="start turns on the first input audio")
+    parser.add_argument("--ms-per-1k-ctx", type=float, default=0, help="extra response delay per 1k context tokens")
+    parser.add_argument("--audio-vad", action="store_true", help="turns from an energy VAD on the input audio")
+    parser.add_argument("--vad-threshold", type=float, default=0.02, help="RMS speech threshold (full scale = 1)")
+    parser.add_argument("--vad-silence-ms", type=float, default=500)
+
+
+def script_from_args(args):
+    return TurnScript(turns=args.turns, speech_ms=args.speech_ms, response_delay_ms=args.response_delay_ms,
+                      first_audio_ms=args.first_audio_ms, audio_ms=args.audio_ms, chunk_ms=args.chunk_ms,
+                      pace=args.pace, gap_ms=args.gap_ms, jitter_ms=args.jitter_ms,
+                      audio=load_wav_pcm16(args.wav) if args.wav else None,
+                      drop_every=args.drop_every, wait_for_audio=args.wait_for_audio,
+                      ms_per_1k_ctx=args.ms_per_1k_ctx, audio_vad=args.audio_vad,
+                      vad_threshold=args.vad_threshold, vad_silence_ms=args.vad_silence_ms)
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="Local Realtime API stand-in server")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8800)
+    add_script_args(p)
+    args = p.parse_args()
+    serve_forever(args.host, args.port, script_from_args(args))
@@ -0,0 +1,141 @@
+"""
+Local stand-in for the robot's speech endpoints, for testing speaker_remote
+without hardware.
+
+  audio port    receives binary PCM16 (24 kHz mono; or G.711 at 24 kHz with
+                `audio_format`) and "plays" it in real time
+  control port  receives "FLUSH", drops queued audio and answers "ACK FLUSH"
+
+    python -m sim.robot_server --audio-port 8765 --control-port 8766
+"""
+import argparse
+import asyncio
+import time
+
+import websockets
+
+from audio.g711 import FORMATS
+
+BYTES_PER_S = 24000 * 2
+
+
+class RobotStandInServer:
+    def __init__(self, host="127.0.0.1", audio_port=0, control_port=0, ack=True, ack_delay_ms=0.0,
+                 audio_format="pcm16"):
+        if audio_format not in FORMATS:
+            raise ValueError(f"audio format must be one of {list(FORMATS)}")
+        self.audio_format = audio_format
+        # G.711: one byte per sample, i.e. half the PCM16 bytes per second of audio
+        self._pcm_per_wire = 1 if audio_format == "pcm16" else 2
+        self.host = host
+        self.audio_port = audio_port
+        self.control_port = control_port
+        self.ack = ack
+        self.ack_delay_ms = ack_delay_ms
+
+        self.bytes_received = 0
+        self.frames_received = 0
+        self.flushes = 0
+        self.control_connections = 0
+        self.audio_connections = 0
+
+        # simulated playout: queued bytes drain at real time
+        self._queued = 0
+        self._drained_at = time.monotonic()
+        self.played_bytes = 0
+        self._servers = []
+
+    @property
+    def speech_url(self):
+        return f"ws://{self.host}:{self.audio_port}"
+
+    @property
+    def flush_url(self):
+        return f"ws://{self.host}:{self.control_port}"
+
+    async def start(self):
+        audio = await websockets.serve(self._audio_handler, self.host, self.audio_port, max_size=None)
+        control = await websockets.serve(self._control_handler, self.host, self.control_port)
+        self.audio_port = audio.sockets[0].getsockname()[1]
+        self.control_port = control.sockets[0].getsockname()[1]
+        self._servers = [audio, control]
+        print(f"[RobotStandIn] audio {self.speech_url}  control {self.flush_url}")
+        return self
+
+    async def stop(self):
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+        self._servers = []
+
+    def _drain(self):
+        now = time.monotonic()
+        played = min(self._queued, int((now - self._drained_at) * BYTES_PER_S))
+        self._queued -= played
+        self.played_bytes += played
+        self._drained_at = now
+
+    def queued_ms(self):
+        self._drain()
+        return self._queued / BYTES_PER_S * 1000
+
+    async def _audio_handler(self, ws, *_):
+        self.audio_connections += 1
+        try:
+            async for msg in ws:
+                if isinstance(msg, bytes):
+                    self._drain()
+                    self.bytes_received += len(msg)
+                    self.frames_received += 1
+                    self._queued += len(msg) * self._pcm_per_wire
+        except websockets.ConnectionClosed:
+            pass
+
+    async def _control_handler(self, ws, *_):
+        self.control_connections += 1
+        try:
+            async for msg in ws:
+                if msg == "FLUSH":
+                    self._drain()
+                    self._queued = 0
+                    self.flushes += 1
+                    if self.ack:
+                        if self.ack_delay_ms:
+                            await asyncio.sleep(self.ack_delay_ms / 1000)
+                        await ws.send("ACK FLUSH")
+        except websockets.ConnectionClosed:
+            pass
+
+    def stats(self) -> dict:
+        return {
+            "bytes_received": self.bytes_received,
+            "frames_received": self.frames_received,
+            "queued_ms": round(self.queued_ms(), 1),
+            "played_bytes": self.played_bytes,
+            "flushes": self.flushes,
+            "audio_connections": self.audio_connections,
+            "control_connections": self.control_connections,
+        }
+
+
+async def _serve(args):
+    server = await RobotStandInServer(args.host, args.audio_port, args.control_port,
+                                      ack=not args.no_ack, ack_delay_ms=args.ack_delay_ms,
+                                      audio_format=args.audio_format).start()
+    try:
+        while True:
+            await asyncio.sleep(5)
+            print(f"[RobotStandIn] {server.stats()}")
+    finally:
+        await server.stop()
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="Local robot speech stand-in server")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--audio-port", type=int, default=8765)
+    p.add_argument("--control-port", type=int, default=8766)
+    p.add_argument("--no-ack", action="store_true", help="behave like a robot that does not acknowledge FLUSH")
+    p.add_argument("--ack-delay-ms", type=float, default=0)
+    p.add_argument("--audio-format", choices=["pcm16", "g711_ulaw", "g711_alaw"], default="pcm16")
+    asyncio.run(_serve(p.parse_args()))
@@ -0,0 +1,70 @@
+import asyncio
+import inspect
+import time
+from util.logger import log_event
+from util.metrics import registry as metrics
+
+DISPATCH_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+
+
+class CommandError(Exception):
+    """Unknown command or bad arguments; reported to the caller, not logged as a failure."""
+
+
+class CommandBus:
+    """
+    Control commands (say, interrupt, mute, status, shutdown, ...) from any
+    source: keyboard, control API, tests. Handlers run on the main event
+    loop the moment a command arrives; nothing polls.
+
+      register(name, fn)     fn(**args) -> result (or a coroutine)
+      await call(name, ...)  on the loop
+      submit(name, ...)      from any thread: concurrent.futures.Future
+
+    The time from submit to the handler starting is kept per command
+    (`command_dispatch_seconds`). `stopped` is set by `shutdown()`.
+    """
+
+    def __init__(self, loop=None):
+        self.loop = loop or asyncio.get_running_loop()
+        self.stopped = asyncio.Event()
+        self._handlers = {}
+        self.counts = {}
+        metrics.describe("command_dispatch_seconds", "Command submit -> handler start on the main loop")
+
+    def register(self, name, fn):
+        self._handlers[name] = fn
+        return fn
+
+    @property
+    def commands(self):
+        return sorted(self._handlers)
+
+    async def call(self, name, /, _submitted=None, **args):
+        fn = self._handlers.get(name)
+        if fn is None:
+            raise CommandError(f"unknown command {name!r}, one of {self.commands}")
+        try:
+            inspect.signature(fn).bind(**args)
+        except TypeError as e:
+            raise CommandError(f"{name}: {e}") from None
+        started = time.perf_counter()
+        metrics.observe("command_dispatch_seconds", started - (_submitted or started),
+                        buckets=DISPATCH_BUCKETS, command=name)
+        self.counts[name] = self.counts.get(name, 0) + 1
+        result = fn(**args)
+        if asyncio.iscoroutine(result):
+            result = await result
+        log_event("command", source="bus", value=name,
+                  extra=f"{(started - _submitted) * 1000:.2f} ms" if _submitted else "")
+        return result
+
+    def submit(self, name, /, **args):
+        """Thread-safe: runs the command on the loop, returns a concurrent.futures.Future."""
+        return asyncio.run_coroutine_threadsafe(self.call(name, _submitted=time.perf_counter(), **args), self.loop)
+
+    def shutdown(self):
+        self.stopped.set()
+
+    def stats(self) -> dict:
+        return {"commands": dict(self.counts), "stopped": self.stopped.is_set()}
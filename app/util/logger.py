@@ -1,7 +1,10 @@
-
-
-
+import json
+import os
+import queue
+import threading
+import time
 from datetime import datetime
+from pathlib import Path
 
 class C:
     RESET  = "\033[0m"
@@ -17,14 +20,53 @@ class C:
     BOLD    = "\033[1m"
 
 
+# Callers only enqueue; a background writer batches rows into rotating JSONL
+# files and (optionally) echoes them to the console. Config is read from .env
+# when the writer starts (first log_event), or set with configure_logging().
+_config = {}
+_q = None
+_writer = None
+_start_lock = threading.Lock()
+_dropped = 0
+_written = 0
+
+_BATCH = 512
+
+
+def configure_logging(console=None, log_dir=None, max_mb=None, backups=None, queue_size=None):
+    """Override .env logging config. Call before the first log_event (console can change any time)."""
+    for key, val in (("console", console), ("log_dir", log_dir), ("max_mb", max_mb),
+                     ("backups", backups), ("queue_size", queue_size)):
+        if val is not None:
+            _config[key] = val
+
+
+def _start():
+    global _q, _writer
+    with _start_lock:
+        if _q is not None:
+            return
+        _config.setdefault("console", os.getenv("LOG_CONSOLE", "1") == "1")
+        _config.setdefault("log_dir", os.getenv("LOG_DIR", "logs"))
+        _config.setdefault("max_mb", float(os.getenv("LOG_MAX_MB", "50")))
+        _config.setdefault("backups", int(os.getenv("LOG_BACKUPS", "10")))
+        _config.setdefault("queue_size", int(os.getenv("LOG_QUEUE_SIZE", "10000")))
+        _q = queue.Queue(maxsize=_config["queue_size"])
+        _writer = threading.Thread(target=_run, name="log-writer", daemon=True)
+        _writer.start()
+
+
 def log_event(event, source="", value="", extra=""):
-    row = {
-        "timestamp": datetime.now().isoformat(timespec="milliseconds"),
-        "event": event,
-        "source": source,
-        "value": value.replace("\n", " ").strip(),
-        "extra": extra.replace("\n", " ").strip()
-    }
+    global _dropped
+    if _q is None:
+        _start()
+    try:
+        _q.put_nowait((time.time(), time.monotonic(), event, source, value, extra))
+    except queue.Full:
+        _dropped += 1
+
+
+def _echo(event, value):
     try:
         if event == "user_text" or event == "ai_response":
             role = "User" if event == "user_text" else "Agent"
@@ -32,4 +74,91 @@ def log_event(event, source="", value="", extra=""):
         else:
             print(f'{C.GRAY}[{event}] {value}{C.RESET}')
     except Exception:
-        pass
\ No newline at end of file
+        pass
+
+
+class _RotatingJsonl:
+    def __init__(self, log_dir, max_bytes, backups):
+        self.dir = Path(log_dir)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._f = None
+        self._size = 0
+
+    def _open(self):
+        if self._f:
+            self._f.close()
+        self.dir.mkdir(parents=True, exist_ok=True)
+        ts = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        self._f = open(self.dir / f"events_{ts}.jsonl", "a", encoding="utf-8")
+        self._size = 0
+        old = sorted(self.dir.glob("events_*.jsonl"))
+        for path in old[:max(0, len(old) - self.backups - 1)]:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    def write(self, lines):
+        if self._f is None or self._size >= self.max_bytes:
+            self._open()
+        data = "\n".join(lines) + "\n"
+        self._f.write(data)
+        self._f.flush()
+        self._size += len(data)
+
+
+def _run():
+    global _written
+    sink = None
+    if _config["log_dir"]:
+        sink = _RotatingJsonl(_config["log_dir"], int(_config["max_mb"] * 1024 * 1024), _config["backups"])
+
+    while True:
+        rows = [_q.get()]
+        try:
+            while len(rows) < _BATCH:
+                rows.append(_q.get_nowait())
+        except queue.Empty:
+            pass
+
+        lines = []
+        for ts, mono, event, source, value, extra in rows:
+            value = str(value).replace("\n", " ").strip()
+            extra = str(extra).replace("\n", " ").strip()
+            if _config["console"]:
+                _echo(event, value)
+            if sink:
+                lines.append(json.dumps({
+                    "timestamp": datetime.fromtimestamp(ts).isoformat(timespec="milliseconds"),
+                    "mono": round(mono, 6),
+                    "event": event,
+                    "source": source,
+                    "value": value,
+                    "extra": extra
+                }))
+        if lines:
+            try:
+                sink.write(lines)
+            except Exception as e:
+                print(f"[Log] write error: {e}")
+        _written += len(rows)
+        for _ in rows:
+            _q.task_done()
+
+
+def flush_log(timeout=2.0):
+    """Wait (bounded) until queued rows are written. Call before os._exit()."""
+    if _q is None:
+        return
+    deadline = time.monotonic() + timeout
+    while _q.unfinished_tasks and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def log_stats() -> dict:
+    return {
+        "queued": _q.qsize() if _q else 0,
+        "written": _written,
+        "dropped": _dropped,
+    }
@@ -0,0 +1,38 @@
+from collections import OrderedDict
+
+
+class LruSet:
+    """Set that keeps only the `maxsize` most recently added keys."""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._keys = OrderedDict()
+
+    def add(self, key) -> bool:
+        """Add `key`; returns False if it was already present."""
+        if key in self._keys:
+            self._keys.move_to_end(key)
+            return False
+        self._keys[key] = None
+        if len(self._keys) > self.maxsize:
+            self._keys.popitem(last=False)
+        return True
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __len__(self):
+        return len(self._keys)
+
+
+class LruDict(OrderedDict):
+    """OrderedDict that drops its oldest entries beyond `maxsize`."""
+
+    def __init__(self, maxsize=16):
+        super().__init__()
+        self.maxsize = maxsize
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        while len(self) > self.maxsize:
+            self.popitem(last=False)
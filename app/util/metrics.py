@@ -0,0 +1,171 @@
+import bisect
+import re
+import threading
+from collections import deque
+from util.stats import percentile
+
+NAMESPACE = "agent"
+DEFAULT_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items())) if labels else ()
+
+
+def _fmt_labels(key, extra=None):
+    items = list(key) + (list(extra.items()) if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+def _sanitize(name):
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+class Histogram:
+    """Cumulative buckets (Prometheus) plus a rolling window of recent samples for percentiles."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, window=1024):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.recent = deque(maxlen=window)
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.recent.append(value)
+
+    def summary(self):
+        recent = list(self.recent)
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "p50": percentile(recent, 50),
+            "p95": percentile(recent, 95),
+            "p99": percentile(recent, 99),
+        }
+
+
+class MetricsRegistry:
+    """
+    Thread-safe counters and histograms (optionally labelled), plus collectors:
+    callables returning a (possibly nested) dict of numbers that are exported
+    as gauges, e.g. `registry.add_collector("speaker", speaker.stats)`.
+    """
+
+    def __init__(self, namespace=NAMESPACE):
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._help = {}
+        self._collectors = {}
+
+    def inc(self, name, n=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + n
+
+    def observe(self, name, value, buckets=DEFAULT_BUCKETS, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            hist = series.get(key)
+            if hist is None:
+                hist = series[key] = Histogram(buckets)
+            hist.observe(value)
+
+    def describe(self, name, text):
+        self._help[name] = text
+
+    def add_collector(self, prefix, fn, **labels):
+        self._collectors[(prefix, _label_key(labels))] = fn
+
+    def remove_collector(self, prefix, **labels):
+        self._collectors.pop((prefix, _label_key(labels)), None)
+
+    def _gauges(self):
+        out = []
+        for (prefix, key), fn in list(self._collectors.items()):
+            try:
+                values = fn()
+            except Exception:
+                continue
+            stack = [(prefix, values)]
+            while stack:
+                name, val = stack.pop()
+                if isinstance(val, dict):
+                    stack.extend((f"{name}_{k}", v) for k, v in val.items())
+                elif isinstance(val, bool):
+                    out.append((_sanitize(name), key, int(val)))
+                elif isinstance(val, (int, float)):
+                    out.append((_sanitize(name), key, val))
+        return sorted(out, key=lambda g: g[0])
+
+    # -- export --------------------------------------------------------------
+
+    def to_prometheus(self) -> str:
+        ns = self.namespace
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                full = f"{ns}_{name}"
+                if name in self._help:
+                    lines.append(f"# HELP {full} {self._help[name]}")
+                lines.append(f"# TYPE {full} counter")
+                for key, value in series.items():
+                    lines.append(f"{full}{_fmt_labels(key)} {value}")
+
+            for name, series in sorted(self._histograms.items()):
+                full = f"{ns}_{name}"
+                if name in self._help:
+                    lines.append(f"# HELP {full} {self._help[name]}")
+                lines.append(f"# TYPE {full} histogram")
+                recent = []
+                for key, h in series.items():
+                    cumulative = 0
+                    for bound, c in zip(h.buckets, h.counts):
+                        cumulative += c
+                        lines.append(f"{full}_bucket{_fmt_labels(key, {'le': bound})} {cumulative}")
+                    lines.append(f"{full}_bucket{_fmt_labels(key, {'le': '+Inf'})} {h.count}")
+                    lines.append(f"{full}_sum{_fmt_labels(key)} {h.sum}")
+                    lines.append(f"{full}_count{_fmt_labels(key)} {h.count}")
+                    s = h.summary()
+                    for q in ("p50", "p95", "p99"):
+                        if s[q] is not None:
+                            recent.append(f"{full}_recent{_fmt_labels(key, {'quantile': int(q[1:]) / 100})} {s[q]}")
+                if recent:
+                    lines.append(f"# TYPE {full}_recent gauge")
+                    lines.extend(recent)
+
+        seen = set()
+        for name, key, value in self._gauges():
+            full = f"{ns}_{name}"
+            if full not in seen:
+                lines.append(f"# TYPE {full} gauge")
+                seen.add(full)
+            lines.append(f"{full}{_fmt_labels(key)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def to_json(self) -> dict:
+        def label_str(key):
+            return ",".join(f"{k}={v}" for k, v in key)
+
+        with self._lock:
+            counters = {name: {label_str(k): v for k, v in series.items()}
+                        for name, series in self._counters.items()}
+            histograms = {name: {label_str(k): h.summary() for k, h in series.items()}
+                          for name, series in self._histograms.items()}
+        gauges = {}
+        for name, key, value in self._gauges():
+            gauges.setdefault(name, {})[label_str(key)] = value
+        return {"counters": counters, "histograms": histograms, "gauges": gauges}
+
+
+# process-wide default registry
+registry = MetricsRegistry()
@@ -0,0 +1,29 @@
+import threading
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from util.metrics import registry as default_registry
+
+
+def create_metrics_app(registry=None) -> FastAPI:
+    registry = registry or default_registry
+    app = FastAPI(title="voice agent metrics")
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    def metrics_prometheus():
+        return PlainTextResponse(registry.to_prometheus(), media_type="text/plain; version=0.0.4")
+
+    @app.get("/metrics.json")
+    def metrics_json():
+        return registry.to_json()
+
+    return app
+
+
+def start_metrics_server(host="127.0.0.1", port=9100, registry=None):
+    """Serve /metrics (Prometheus text) and /metrics.json on a daemon thread, off the audio event loop."""
+    config = uvicorn.Config(create_metrics_app(registry), host=host, port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, name="metrics-http", daemon=True).start()
+    print(f"[Metrics] serving on http://{host}:{port}/metrics")
+    return server
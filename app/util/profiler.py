@@ -0,0 +1,113 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+
+
+def _frame_name(code):
+    return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    On-demand wall-clock sampling profiler for all threads. While running, a
+    daemon thread takes `sys._current_frames()` every `interval_ms` and counts
+    each thread's stack; `stop()` writes them in collapsed-stack format
+    ("thread;outer;...;inner count" per line), the input of flamegraph.pl,
+    speedscope and inferno:
+
+        flamegraph.pl profiles/profile_20250101_120000.folded > flame.svg
+
+    Threads blocked in C (socket reads, audio callbacks waiting in PortAudio)
+    are sampled too, so the output shows where time is spent waiting as well
+    as computing. Cost while running is roughly one stack walk per thread per
+    sample; nothing runs while stopped.
+    """
+
+    def __init__(self, out_dir=PROFILE_DIR, interval_ms=PROFILE_INTERVAL_MS):
+        self.out_dir = out_dir
+        self.interval = interval_ms / 1000
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self._stacks = Counter()
+        self.samples = 0
+        self.started_at = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> bool:
+        with self._lock:
+            if self._thread is not None:
+                return False
+            self._stacks = Counter()
+            self.samples = 0
+            self.started_at = time.time()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+            self._thread.start()
+        print(f"[Profiler] sampling every {self.interval * 1000:g} ms")
+        return True
+
+    def _run(self):
+        own = threading.get_ident()
+        names = {}
+        next_at = time.perf_counter()
+        while not self._stop.is_set():
+            frames = sys._current_frames()
+            if len(names) != len(frames):
+                names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in frames.items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_name(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                self._stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+            next_at += self.interval
+            delay = next_at - time.perf_counter()
+            if delay < 0:
+                next_at = time.perf_counter()
+            elif self._stop.wait(delay):
+                break
+
+    def stop(self):
+        """Stops sampling and writes the collapsed stacks; returns the file path (None if not running)."""
+        with self._lock:
+            if self._thread is None:
+                return None
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+            stacks = self._stacks
+        path = Path(self.out_dir, time.strftime("profile_%Y%m%d_%H%M%S.folded", time.localtime(self.started_at)))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, n in stacks.most_common():
+                f.write(f"{stack} {n}\n")
+        print(f"[Profiler] {self.samples} samples, {len(stacks)} stacks -> {path}")
+        return path
+
+    def toggle(self):
+        """start() if stopped, otherwise stop(); returns the written path or None."""
+        if self.running:
+            return self.stop()
+        self.start()
+        return None
+
+    def stats(self) -> dict:
+        return {"running": self.running, "samples": self.samples}
+
+
+# process-wide profiler (keyboard "p", control API)
+profiler = SamplingProfiler()
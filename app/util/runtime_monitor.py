@@ -0,0 +1,172 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from util.logger import log_event
+from util.metrics import Histogram, registry as metrics
+
+# blocking / callback durations are micro- to milliseconds
+BLOCK_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+LOOP_LAG_INTERVAL_MS = int(os.getenv("LOOP_LAG_INTERVAL_MS", "100"))
+LOOP_LAG_WARN_MS = float(os.getenv("LOOP_LAG_WARN_MS", "50"))
+
+
+class BlockTimer:
+    """
+    Duration histogram for a hot path that must not block (audio callbacks,
+    buffer writes, socket sends). No lock: it is updated from one thread and
+    read by the metrics collector, like the other stats counters.
+
+        t0 = time.perf_counter()
+        ...
+        timer.observe(time.perf_counter() - t0)
+    """
+
+    def __init__(self, buckets=BLOCK_BUCKETS):
+        self.hist = Histogram(buckets)
+        self.max = 0.0
+        self._last = None
+        self.max_gap = 0.0
+
+    def observe(self, seconds):
+        self.hist.observe(seconds)
+        if seconds > self.max:
+            self.max = seconds
+
+    def tick(self, now):
+        """Time between calls (e.g. audio callbacks); the max gap shows stalls."""
+        if self._last is not None and now - self._last > self.max_gap:
+            self.max_gap = now - self._last
+        self._last = now
+
+    def stats(self) -> dict:
+        s = self.hist.summary()
+        out = {"count": s["count"], "max_ms": round(self.max * 1000, 3)}
+        for q in ("p50", "p99"):
+            if s[q] is not None:
+                out[f"{q}_ms"] = round(s[q] * 1000, 3)
+        if self._last is not None:
+            out["max_gap_ms"] = round(self.max_gap * 1000, 3)
+        return out
+
+
+class InstrumentedExecutor(ThreadPoolExecutor):
+    """
+    Default executor that reports its queue depth (submitted, not yet running),
+    the tasks running, and per function the wait before a worker picks a task
+    up and the run time (`executor_wait_seconds` / `executor_run_seconds`).
+    Long-lived tasks such as the keyboard `input()` show up under their own
+    function name.
+    """
+
+    def __init__(self, max_workers=None, thread_name_prefix="executor"):
+        super().__init__(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self._stats_lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.max_queued = 0
+        self.submitted = 0
+
+    def submit(self, fn, /, *args, **kwargs):
+        name = getattr(fn, "__name__", type(fn).__name__)
+        submitted_at = time.perf_counter()
+
+        def run():
+            started = time.perf_counter()
+            with self._stats_lock:
+                self.queued -= 1
+                self.running += 1
+            metrics.observe("executor_wait_seconds", started - submitted_at, buckets=LAG_BUCKETS, fn=name)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._stats_lock:
+                    self.running -= 1
+                metrics.observe("executor_run_seconds", time.perf_counter() - started, fn=name)
+
+        with self._stats_lock:
+            self.queued += 1
+            self.submitted += 1
+            self.max_queued = max(self.max_queued, self.queued)
+        return super().submit(run)
+
+    def stats(self) -> dict:
+        return {"queued": self.queued, "running": self.running, "max_queued": self.max_queued,
+                "submitted": self.submitted, "workers": len(self._threads)}
+
+
+def thread_cpu() -> dict:
+    """CPU seconds per live thread (by name), where the platform has per-thread clocks."""
+    out = {}
+    for t in threading.enumerate():
+        try:
+            clock = time.pthread_getcpuclockid(t.ident)
+            out[t.name] = round(time.clock_gettime(clock), 3)
+        except (AttributeError, OSError, TypeError):
+            continue
+    return out
+
+
+class RuntimeMonitor:
+    """
+    Event-loop and thread health for the main process:
+
+      loop lag      a task sleeps LOOP_LAG_INTERVAL_MS and measures how late it
+                    wakes up (`event_loop_lag_seconds`); a wake-up later than
+                    LOOP_LAG_WARN_MS is logged as "loop_lag"
+      executor      the loop's default executor is replaced by an
+                    InstrumentedExecutor, unless it already is one (e.g.
+                    SessionManager's), which is then reported instead
+      threads       CPU seconds per thread (collector)
+
+    Audio callback / write blocking times are kept by the audio classes
+    themselves (BlockTimer) and exported with their stats.
+    """
+
+    def __init__(self, loop, interval_ms=LOOP_LAG_INTERVAL_MS, warn_ms=LOOP_LAG_WARN_MS, max_workers=None):
+        self.loop = loop
+        self.interval = interval_ms / 1000
+        self.warn = warn_ms / 1000
+        self.executor = InstrumentedExecutor(max_workers=max_workers)
+        self.max_lag = 0.0
+        self.lag_warnings = 0
+        self._task = None
+
+    def start(self):
+        installed = getattr(self.loop, "_default_executor", None)
+        if isinstance(installed, InstrumentedExecutor):
+            self.executor = installed
+        else:
+            self.loop.set_default_executor(self.executor)
+        self._task = self.loop.create_task(self._watch_lag())
+        metrics.describe("event_loop_lag_seconds", "How late the main event loop runs a timer")
+        metrics.add_collector("runtime", self.stats)
+        return self
+
+    async def _watch_lag(self):
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - expected)
+            metrics.observe("event_loop_lag_seconds", lag, buckets=LAG_BUCKETS)
+            if lag > self.max_lag:
+                self.max_lag = lag
+            if lag > self.warn:
+                self.lag_warnings += 1
+                log_event("loop_lag", source="runtime", value=f"{lag * 1000:.0f} ms")
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "loop_max_lag_ms": round(self.max_lag * 1000, 2),
+            "loop_lag_warnings": self.lag_warnings,
+            "executor": self.executor.stats(),
+            "thread_cpu_s": thread_cpu(),
+        }
@@ -0,0 +1,57 @@
+import json
+import threading
+import time
+from util.logger import log_event
+
+# milestones that complete once all their parts are marked
+_COMPOSITES = {
+    "ready_to_speak": ("session_ready", "speaker_open"),
+}
+
+
+class StartupTimer:
+    """
+    Startup milestones in ms since the timer was created (process start when
+    created at import of the entry point). Each milestone is kept once, the
+    first time it is marked, so reconnects and further sessions don't move it.
+
+      prompt_loaded, speaker_open, mic_open, ws_open, session_ready,
+      first_audio_sent, ready_to_speak (session_ready + speaker_open)
+
+    The report is printed and logged once both `first_audio_sent` and
+    `ready_to_speak` are reached (or on `report()`).
+    """
+
+    def __init__(self, report_when=("first_audio_sent", "ready_to_speak")):
+        self.t0 = time.perf_counter()
+        self.report_when = report_when
+        self.marks = {}
+        self.reported = False
+        self._lock = threading.Lock()
+
+    def mark(self, name):
+        with self._lock:
+            if name in self.marks:
+                return
+            self.marks[name] = (time.perf_counter() - self.t0) * 1000
+            for composite, parts in _COMPOSITES.items():
+                if composite not in self.marks and all(p in self.marks for p in parts):
+                    self.marks[composite] = self.marks[name]
+            due = not self.reported and all(m in self.marks for m in self.report_when)
+        if due:
+            self.report()
+
+    def report(self):
+        with self._lock:
+            self.reported = True
+            marks = sorted(self.marks.items(), key=lambda kv: kv[1])
+        print("[Startup] " + "  ".join(f"{name}={ms:.0f}ms" for name, ms in marks))
+        log_event("startup", source="main", value="ready", extra=json.dumps(dict(marks)))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {name: round(ms, 1) for name, ms in self.marks.items()}
+
+
+# process-wide timer, shared like the metrics registry
+timer = StartupTimer()